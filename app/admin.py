@@ -1,3 +1,8 @@
 from django.contrib import admin
 
+from app.models import Department, ScheduleRule, Shift
+
 # Register your models here.
+admin.site.register(Department)
+admin.site.register(Shift)
+admin.site.register(ScheduleRule)
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        from app.services.dashboard_service import DashboardService
+        from app.services.report_service import ReportService
+        from app.services.schedule_service import ScheduleService
+
+        ScheduleService.connect_signals()
+        ReportService.connect_signals()
+        DashboardService.connect_signals()
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.archive_service import ArchiveService
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve por lotes las jornadas anteriores al horizonte de archivo a la "
+        "tabla ArchivedAttendance (ver ArchiveService)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.ATTENDANCE_ARCHIVE_AFTER_DAYS,
+            help=(
+                "Archivar jornadas con más de N días; no puede ser menor que "
+                "ATTENDANCE_ARCHIVE_AFTER_DAYS (por defecto: %(default)s)"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ArchiveService.DEFAULT_BATCH_SIZE,
+            help="Jornadas por lote/transacción (por defecto: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser mayor que cero")
+
+        try:
+            stats = ArchiveService.archive(
+                days=options["days"], batch_size=options["batch_size"]
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Jornadas archivadas: {stats['archived']} en {stats['batches']} "
+                f"lote(s) (anteriores a {stats['cutoff'].isoformat()}, "
+                f"{stats['seconds']} s)"
+            )
+        )
@@ -0,0 +1,62 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.import_service import ImportService, PunchImportError
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa marcaciones de entrada/salida desde un archivo CSV exportado "
+        "por los relojes de asistencia (ver ImportService para el formato)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Ruta del archivo CSV ('-' para stdin)")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ImportService.DEFAULT_BATCH_SIZE,
+            help="Jornadas por lote/transacción (por defecto: %(default)s)",
+        )
+        parser.add_argument(
+            "--delimiter", default=",", help="Separador de columnas (por defecto: ',')"
+        )
+        parser.add_argument(
+            "--timezone",
+            help="Zona horaria de las marcaciones sin zona (por defecto: TIME_ZONE)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser mayor que cero")
+
+        service = ImportService(
+            batch_size=options["batch_size"], time_zone=options["timezone"]
+        )
+        try:
+            if options["path"] == "-":
+                stats = service.import_file(sys.stdin, options["delimiter"])
+            else:
+                with open(
+                    options["path"], newline="", encoding="utf-8-sig"
+                ) as file_obj:
+                    stats = service.import_file(file_obj, options["delimiter"])
+        except (OSError, PunchImportError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"Filas leídas: {stats['rows']} "
+            f"(inválidas: {stats['invalid']}, usuarios desconocidos: "
+            f"{stats['unknown_users']}, salidas sin entrada: {stats['orphan_exits']})"
+        )
+        self.stdout.write(
+            f"Jornadas creadas: {stats['created']}, actualizadas: {stats['updated']}, "
+            f"sin cambios: {stats['unchanged']} en {stats['batches']} lote(s)"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Importación completada en {stats['seconds']} s "
+                f"({stats['rows_per_second']} filas/s)"
+            )
+        )
@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.attendance_service import AttendanceService
+from app.services.dashboard_service import DashboardService
+from app.services.summary_service import SummaryService
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye la tabla DailyAttendanceSummary desde los registros de "
+        "asistencia para un rango de fechas locales (por defecto, hoy)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start", help="Fecha inicial (YYYY-MM-DD). Por defecto: hoy"
+        )
+        parser.add_argument(
+            "--end", help="Fecha final inclusive (YYYY-MM-DD). Por defecto: --start"
+        )
+
+    def parse_date(self, value, option):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Fecha inválida para {option}: {value}")
+
+    def handle(self, *args, **options):
+        today = AttendanceService.get_local_time().date()
+        start = (
+            self.parse_date(options["start"], "--start") if options["start"] else today
+        )
+        end = self.parse_date(options["end"], "--end") if options["end"] else start
+
+        if end < start:
+            raise CommandError("--end no puede ser anterior a --start")
+
+        current = start
+        rebuilt = 0
+        while current <= end:
+            summary = SummaryService.rebuild(current)
+            rebuilt += 1
+            if options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"{current}: {summary.total} registros, "
+                    f"{summary.late_arrivals} tarde, {summary.open_shifts} abiertos"
+                )
+            current += timedelta(days=1)
+        DashboardService.invalidate_dates(
+            start + timedelta(days=n) for n in range(rebuilt)
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Resumen reconstruido para {rebuilt} día(s)")
+        )
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_user_password'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['user', '-entry_time'], name='attendance_user_entry_idx'),
+        ),
+    ]
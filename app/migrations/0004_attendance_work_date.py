@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:35
+
+import pytz
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_work_date(apps, schema_editor):
+    """
+    Asigna la fecha local de la jornada a los registros existentes. Si un
+    usuario tiene registros duplicados en un mismo día, solo el más reciente
+    (el que usa AttendanceService) recibe la fecha; los demás quedan en NULL
+    para no violar la restricción de unicidad.
+    """
+    Attendance = apps.get_model("app", "Attendance")
+    local_tz = pytz.timezone(settings.TIME_ZONE)
+    current_user_id = None
+    seen_dates = set()
+    batch = []
+
+    for attendance in Attendance.objects.order_by("user_id", "-entry_time").iterator(
+        chunk_size=2000
+    ):
+        if attendance.user_id != current_user_id:
+            current_user_id = attendance.user_id
+            seen_dates = set()
+        work_date = attendance.entry_time.astimezone(local_tz).date()
+        if work_date in seen_dates:
+            continue
+        seen_dates.add(work_date)
+        attendance.work_date = work_date
+        batch.append(attendance)
+        if len(batch) >= 1000:
+            Attendance.objects.bulk_update(batch, ["work_date"])
+            batch = []
+
+    if batch:
+        Attendance.objects.bulk_update(batch, ["work_date"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_attendance_user_entry_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='work_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_work_date, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('user', 'work_date'), name='attendance_one_shift_per_day'),
+        ),
+    ]
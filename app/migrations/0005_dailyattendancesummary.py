@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_attendance_work_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('on_time', models.PositiveIntegerField(default=0)),
+                ('late_arrivals', models.PositiveIntegerField(default=0)),
+                ('open_shifts', models.IntegerField(default=0)),
+                ('total_hours', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
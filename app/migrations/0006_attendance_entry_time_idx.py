@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0005_dailyattendancesummary"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(fields=["entry_time"], name="attendance_entry_time_idx"),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0006_attendance_entry_time_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedAttendance",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("entry_time", models.DateTimeField()),
+                ("exit_time", models.DateTimeField(blank=True, null=True)),
+                ("work_date", models.DateField(blank=True, null=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="app.user"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-entry_time"], name="archive_user_entry_idx"
+                    ),
+                    models.Index(fields=["entry_time"], name="archive_entry_time_idx"),
+                ],
+            },
+        ),
+    ]
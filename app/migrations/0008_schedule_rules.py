@@ -0,0 +1,112 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:26
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0007_archivedattendance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Department",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Shift",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("entry_time", models.TimeField(default=datetime.time(7, 0))),
+                ("exit_time", models.TimeField(default=datetime.time(16, 0))),
+                ("tolerance_minutes", models.PositiveSmallIntegerField(default=30)),
+                ("late_after", models.TimeField(default=datetime.time(8, 30))),
+            ],
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="department",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="app.department",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ScheduleRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        blank=True,
+                        choices=[
+                            (0, "Lunes"),
+                            (1, "Martes"),
+                            (2, "Miércoles"),
+                            (3, "Jueves"),
+                            (4, "Viernes"),
+                            (5, "Sábado"),
+                            (6, "Domingo"),
+                        ],
+                        null=True,
+                    ),
+                ),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="app.department",
+                    ),
+                ),
+                (
+                    "shift",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="app.shift"
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("department", "weekday"),
+                        name="schedule_rule_unique_scope",
+                    )
+                ],
+            },
+        ),
+    ]
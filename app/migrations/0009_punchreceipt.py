@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0008_schedule_rules"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PunchReceipt",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64)),
+                ("action", models.CharField(max_length=10)),
+                ("punched_at", models.DateTimeField()),
+                ("result", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="app.user"
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "key"), name="punch_receipt_unique_key"
+                    )
+                ],
+            },
+        ),
+    ]
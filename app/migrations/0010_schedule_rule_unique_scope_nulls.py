@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-17 13:25
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+def remove_duplicate_rules(apps, schema_editor):
+    """
+    Conserva la regla más reciente de cada alcance repetido (departamento o
+    día vacíos), antes de crear la restricción
+    """
+    ScheduleRule = apps.get_model("app", "ScheduleRule")
+    seen = set()
+    for rule in ScheduleRule.objects.order_by("-id"):
+        scope = (rule.department_id, rule.weekday)
+        if scope in seen:
+            rule.delete()
+        seen.add(scope)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0009_punchreceipt"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_rules, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name="schedulerule",
+            name="schedule_rule_unique_scope",
+        ),
+        migrations.AddConstraint(
+            model_name="schedulerule",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.comparison.Coalesce(
+                    "department", models.Value(0)
+                ),
+                django.db.models.functions.comparison.Coalesce(
+                    "weekday", models.Value(7)
+                ),
+                name="schedule_rule_unique_scope",
+                violation_error_message="Ya existe una regla para ese departamento y día de la semana",
+            ),
+        ),
+    ]
@@ -1,13 +1,90 @@
+from datetime import time
+
 from django.db import models
+from django.db.models.functions import Coalesce
+
+# Días de la semana de ScheduleRule (date.weekday(): 0 = lunes)
+WEEKDAY_CHOICES = [
+    (0, "Lunes"),
+    (1, "Martes"),
+    (2, "Miércoles"),
+    (3, "Jueves"),
+    (4, "Viernes"),
+    (5, "Sábado"),
+    (6, "Domingo"),
+]
+
+
+class Department(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Shift(models.Model):
+    """
+    Turno de trabajo en hora local. Los valores por defecto son el horario
+    estándar que se aplica cuando ninguna ScheduleRule corresponde
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    entry_time = models.TimeField(default=time(7, 0))
+    exit_time = models.TimeField(default=time(16, 0))
+    # Margen alrededor de la entrada/salida antes de avisar "fuera de horario"
+    tolerance_minutes = models.PositiveSmallIntegerField(default=30)
+    # Hora local a partir de la cual una entrada cuenta como llegada tarde
+    late_after = models.TimeField(default=time(8, 30))
+
+    def __str__(self):
+        return self.name
+
+
+class ScheduleRule(models.Model):
+    """
+    Asigna un turno a un departamento y/o día de la semana (vacío = todos).
+    Gana la regla más específica: departamento y día, solo departamento, solo
+    día y por último la regla general (ver ScheduleService)
+    """
+
+    shift = models.ForeignKey(Shift, on_delete=models.CASCADE)
+    department = models.ForeignKey(
+        Department, null=True, blank=True, on_delete=models.CASCADE
+    )
+    weekday = models.PositiveSmallIntegerField(
+        null=True, blank=True, choices=WEEKDAY_CHOICES
+    )
+
+    class Meta:
+        constraints = [
+            # Vacío cuenta como un valor más: una sola regla general y una
+            # sola "departamento, todos los días" (en un índice único NULL no
+            # se repite consigo mismo)
+            models.UniqueConstraint(
+                Coalesce("department", models.Value(0)),
+                Coalesce("weekday", models.Value(7)),
+                name="schedule_rule_unique_scope",
+                violation_error_message=(
+                    "Ya existe una regla para ese departamento y día de la semana"
+                ),
+            ),
+        ]
+
+    def __str__(self):
+        department = self.department.name if self.department_id else "Todos"
+        weekday = self.get_weekday_display() if self.weekday is not None else "todos"
+        return f"{department} ({weekday}): {self.shift.name}"
 
 
-# Create your models here.
 class User(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     password = models.CharField(
         max_length=128, default="changeme123"
     )  # Valor por defecto temporal
+    department = models.ForeignKey(
+        Department, null=True, blank=True, on_delete=models.SET_NULL
+    )
 
     def __str__(self):
         return self.name
@@ -16,7 +93,97 @@ class User(models.Model):
 class Attendance(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     entry_time = models.DateTimeField()
-    exit_time = models.DateTimeField()
+    exit_time = models.DateTimeField(null=True, blank=True)
+    # Fecha local de la jornada; junto con el usuario garantiza en la base de
+    # datos una sola jornada por usuario y día (evita entradas duplicadas)
+    work_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "work_date"], name="attendance_one_shift_per_day"
+            ),
+        ]
+        indexes = [
+            # Índice compuesto para las consultas del día actual y el historial:
+            # filtra por usuario + rango de entry_time y ordena por -entry_time
+            models.Index(
+                fields=["user", "-entry_time"], name="attendance_user_entry_idx"
+            ),
+            # Consultas de todos los usuarios por rango de fechas (dashboard, exportación)
+            models.Index(fields=["entry_time"], name="attendance_entry_time_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.name} - {self.entry_time}"
+
+
+class ArchivedAttendance(models.Model):
+    """
+    Jornadas antiguas movidas desde Attendance con
+    `python manage.py archive_attendance` (ver ArchiveService). Conserva el id
+    original para que los cursores (entry_time, id) del historial y de la
+    exportación sigan siendo únicos entre ambas tablas
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    entry_time = models.DateTimeField()
+    exit_time = models.DateTimeField(null=True, blank=True)
+    work_date = models.DateField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-entry_time"], name="archive_user_entry_idx"),
+            models.Index(fields=["entry_time"], name="archive_entry_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.name} - {self.entry_time} (archivado)"
+
+
+class DailyAttendanceSummary(models.Model):
+    """
+    Resumen de asistencia por día local. Se actualiza de forma incremental en
+    cada entrada/salida (ver SummaryService) y se puede reconstruir con
+    `python manage.py rebuild_daily_summary`
+    """
+
+    date = models.DateField(unique=True)
+    total = models.PositiveIntegerField(default=0)
+    on_time = models.PositiveIntegerField(default=0)
+    late_arrivals = models.PositiveIntegerField(default=0)
+    open_shifts = models.IntegerField(default=0)
+    total_hours = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Resumen {self.date}: {self.total} registros"
+
+
+class PunchReceipt(models.Model):
+    """
+    Resultado de una marcación enviada por lotes desde un kiosco (ver
+    PunchBatchService). La clave de idempotencia la genera el cliente: si el
+    lote se reenvía (conexión cortada antes de recibir la respuesta), la
+    marcación no se aplica de nuevo y se devuelve el mismo resultado
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    action = models.CharField(max_length=10)
+    # Hora de la marcación según el reloj del kiosco (UTC)
+    punched_at = models.DateTimeField()
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="punch_receipt_unique_key"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.action} {self.key}"
@@ -0,0 +1,138 @@
+"""
+Enrutamiento de lecturas de reportes a una réplica de la base de datos.
+
+Solo las vistas de reportes (páginas de la tabla del dashboard, reportes e
+historial) leen de la réplica, solo dentro de replica_reads() y solo los
+modelos de la app. Lo que se guarda en caché con una versión (fragmentos del
+dashboard, reportes cerrados) se calcula en el primario: una lectura atrasada
+quedaría guardada hasta el siguiente cambio. El resto del tráfico, en particular el registro de
+entradas/salidas y el estado del día, usa siempre el primario. Después de
+registrar una marcación, la sesión queda fijada al primario durante
+ATTENDANCE_REPLICA_STICKY_SECONDS (cookie PIN_COOKIE) para que el historial
+que el kiosco recarga enseguida incluya la marcación aunque la réplica vaya
+atrasada. Si no hay alias "replica" configurado todo va al primario.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = "replica"
+PIN_COOKIE = "attendance_primary"
+
+# True mientras las lecturas del contexto actual pueden ir a la réplica
+_replica_reads = ContextVar("attendance_replica_reads", default=False)
+
+
+def replica_available():
+    return REPLICA_ALIAS in connections.settings
+
+
+def is_pinned_to_primary(request):
+    """
+    La sesión escribió hace menos de ATTENDANCE_REPLICA_STICKY_SECONDS
+    """
+    return request is not None and PIN_COOKIE in request.COOKIES
+
+
+def pin_to_primary(response):
+    """
+    Fija la sesión al primario durante la ventana posterior a una escritura
+    """
+    if replica_available():
+        response.set_cookie(
+            PIN_COOKIE,
+            "1",
+            max_age=settings.ATTENDANCE_REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+@contextmanager
+def replica_reads(request=None):
+    """
+    Las lecturas dentro del bloque van a la réplica, salvo que no exista o
+    que la sesión de la petición esté fijada al primario
+    """
+    token = _replica_reads.set(
+        replica_available() and not is_pinned_to_primary(request)
+    )
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reading_replica():
+    """
+    Las lecturas de modelos de la app en el contexto actual van a la réplica
+    """
+    return _replica_reads.get()
+
+
+@contextmanager
+def primary_reads():
+    """
+    Fuerza las lecturas al primario (por ejemplo, cálculos que luego se guardan)
+    """
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reporting_view(view):
+    """
+    Decorador de vistas de reportes (síncronas o asíncronas): sus lecturas
+    van a la réplica según replica_reads()
+    """
+    if asyncio.iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            with replica_reads(request):
+                return await view(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads(request):
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Router de DATABASE_ROUTERS: escrituras al primario, lecturas a la réplica
+    solo dentro de replica_reads()
+    """
+
+    def db_for_read(self, model, **hints):
+        # Sesiones y demás tablas de Django siempre en el primario: una sesión
+        # recién creada puede no haber llegado todavía a la réplica
+        if _replica_reads.get() and model._meta.app_label == "app":
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Lo que se lea después de escribir en el mismo contexto debe ver la
+        # escritura: se deja de leer de la réplica
+        if _replica_reads.get():
+            _replica_reads.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica contiene los mismos datos que el primario
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -0,0 +1,166 @@
+import logging
+from datetime import time, timedelta
+from time import perf_counter
+
+from django.conf import settings
+from django.db import transaction
+from app.models import ArchivedAttendance, Attendance
+from app.services import caching, localization
+from app.services.attendance_service import AttendanceService
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveService:
+    """
+    Archivo de jornadas antiguas (datos fríos)
+
+    `python manage.py archive_attendance` mueve por lotes las jornadas con
+    entrada anterior al horizonte (ATTENDANCE_ARCHIVE_AFTER_DAYS días) desde
+    Attendance a ArchivedAttendance. Las consultas diarias, el dashboard y las
+    páginas recientes del historial solo recorren la tabla caliente; el
+    historial y la exportación leen además el archivo solo cuando el rango
+    pedido llega a fechas anteriores al horizonte.
+    """
+
+    DEFAULT_BATCH_SIZE = 2000
+
+    @staticmethod
+    def get_cutoff(days=None):
+        """
+        Instante UTC del horizonte: inicio del día local de hace `days` días
+        """
+        days = settings.ATTENDANCE_ARCHIVE_AFTER_DAYS if days is None else days
+        cutoff_date = localization.local_now().date() - timedelta(days=days)
+        return localization.local_to_utc(cutoff_date, time.min)
+
+    @staticmethod
+    def reaches_archive(range_start):
+        """
+        Indica si un rango que empieza en `range_start` (None = sin límite)
+        puede incluir jornadas archivadas. El archivo solo tiene jornadas
+        anteriores al horizonte, así que los rangos recientes no lo consultan
+        """
+        return range_start is None or range_start < ArchiveService.get_cutoff()
+
+    @staticmethod
+    def archive(days=None, batch_size=None):
+        """
+        Mueve las jornadas anteriores al horizonte al archivo, un lote por
+        transacción (copia + borrado). Se puede interrumpir y volver a ejecutar
+        `days` no puede ser menor que ATTENDANCE_ARCHIVE_AFTER_DAYS
+        Returns: dict con archived, batches, cutoff y seconds
+        """
+        days = settings.ATTENDANCE_ARCHIVE_AFTER_DAYS if days is None else days
+        if days < settings.ATTENDANCE_ARCHIVE_AFTER_DAYS:
+            # Las lecturas no buscarían en el archivo jornadas tan recientes
+            raise ValueError(
+                "No se puede archivar dentro del horizonte "
+                f"ATTENDANCE_ARCHIVE_AFTER_DAYS ({settings.ATTENDANCE_ARCHIVE_AFTER_DAYS} días)"
+            )
+        from app.services.dashboard_service import DashboardService
+        from app.services.report_service import ReportService
+
+        batch_size = batch_size or ArchiveService.DEFAULT_BATCH_SIZE
+        cutoff = ArchiveService.get_cutoff(days)
+        stats = {"archived": 0, "batches": 0, "cutoff": cutoff}
+        started = perf_counter()
+
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    Attendance.objects.select_for_update()
+                    .filter(entry_time__lt=cutoff)
+                    .order_by("entry_time", "id")
+                    .values_list(
+                        "id", "user_id", "entry_time", "exit_time", "work_date"
+                    )[:batch_size]
+                )
+                if not rows:
+                    break
+                # ignore_conflicts: un lote ya copiado en una ejecución
+                # interrumpida no falla, solo se borra del origen
+                ArchivedAttendance.objects.bulk_create(
+                    (
+                        ArchivedAttendance(
+                            id=attendance_id,
+                            user_id=user_id,
+                            entry_time=entry_time,
+                            exit_time=exit_time,
+                            work_date=work_date,
+                        )
+                        for attendance_id, user_id, entry_time, exit_time, work_date in rows
+                    ),
+                    ignore_conflicts=True,
+                )
+                # Mover al archivo no cambia los datos que se leen: los
+                # receptores post_delete no invalidan por fila y las cachés
+                # de las fechas del lote se invalidan una sola vez
+                with caching.batch_invalidation():
+                    Attendance.objects.filter(id__in=[row[0] for row in rows]).delete()
+                dates = {localization.to_local(row[2]).date() for row in rows}
+                DashboardService.invalidate_dates(dates)
+                ReportService.invalidate_dates(dates)
+
+            stats["archived"] += len(rows)
+            stats["batches"] += 1
+            if len(rows) < batch_size:
+                break
+
+        stats["seconds"] = round(perf_counter() - started, 3)
+        logger.info(
+            "Jornadas archivadas",
+            extra={
+                "archived": stats["archived"],
+                "batches": stats["batches"],
+                "cutoff": cutoff.isoformat(),
+            },
+        )
+        return stats
+
+    @staticmethod
+    def needs_archive_page(page, limit):
+        """
+        Una página del historial (filas id, entry_time, exit_time con el
+        registro extra) puede continuar en el archivo si la tabla caliente se
+        agotó o si ya llegó a fechas anteriores al horizonte
+        """
+        if len(page) <= limit:
+            return True
+        return page[-1][1] < ArchiveService.get_cutoff()
+
+    @staticmethod
+    def merge_pages(page, archived, limit):
+        """
+        Combina filas de ambas tablas en el orden del historial (entry_time,
+        id descendente) y conserva el registro extra
+        """
+        rows = sorted(page + archived, key=lambda row: (row[1], row[0]), reverse=True)
+        return rows[: limit + 1]
+
+    @staticmethod
+    def complete_history_page(user_id, cursor, limit, page):
+        """
+        Completa una página del historial con jornadas archivadas si hace falta
+        """
+        if not ArchiveService.needs_archive_page(page, limit):
+            return page
+
+        queryset, _ = AttendanceService.get_history_page_queryset(
+            user_id, cursor, limit, model=ArchivedAttendance
+        )
+        return ArchiveService.merge_pages(page, list(queryset), limit)
+
+    @staticmethod
+    async def acomplete_history_page(user_id, cursor, limit, page):
+        """
+        Versión asíncrona de complete_history_page
+        """
+        if not ArchiveService.needs_archive_page(page, limit):
+            return page
+
+        queryset, _ = AttendanceService.get_history_page_queryset(
+            user_id, cursor, limit, model=ArchivedAttendance
+        )
+        archived = [row async for row in queryset]
+        return ArchiveService.merge_pages(page, archived, limit)
@@ -1,49 +1,121 @@
 from django.utils import timezone
-from django.http import JsonResponse
-from app.models import User, Attendance
-from datetime import time, timedelta
-import pytz
-from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from app.models import ArchivedAttendance, User, Attendance
+from app.services import caching, localization
+from app.services.logging_config import should_log
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from datetime import datetime, timedelta
+import base64
+import hashlib
+import logging
+from time import perf_counter
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+# Logger de la ruta de sondeo de estado; se muestrea en la configuración de LOGGING
+status_logger = logging.getLogger(f"{__name__}.status")
 
 
 class AttendanceService:
-    # Horarios establecidos (puedes configurarlos según necesites)
-    STANDARD_ENTRY_TIME = time(7, 0)  # 7:00 AM
-    STANDARD_EXIT_TIME = time(16, 0)  # 4:00 PM
-    TOLERANCE_MINUTES = 30  # 30 minutos de tolerancia
+    # Paginación del historial (registros por página y límite máximo permitido)
+    HISTORY_PAGE_SIZE = 20
+    HISTORY_MAX_PAGE_SIZE = 100
+
+    # Tiempo de vida del estado del día en caché (segundos). La caché se
+    # actualiza en cada entrada/salida; este límite solo cubre cambios hechos
+    # por fuera del servicio (por ejemplo desde el admin)
+    STATUS_CACHE_TIMEOUT = 60 * 60
 
     @staticmethod
     def get_local_time():
         """
         Obtiene la hora actual en la zona horaria configurada de Django
         """
-        # Asegurar que siempre use la fecha local correctamente
-        utc_time = timezone.now()
-        local_tz = pytz.timezone(settings.TIME_ZONE)
-        local_time = utc_time.astimezone(local_tz)
-        return local_time
+        return localization.local_now()
 
     @staticmethod
     def format_time_local(datetime_obj):
         """
-        Formatea una fecha/hora en la zona horaria local
+        Formatea una fecha/hora en la zona horaria local ("07:05 AM")
+        Las fechas sin zona horaria se asumen UTC
         """
-        if datetime_obj is None:
-            return None
+        return localization.format_local_time(datetime_obj)
 
-        # Si es UTC, convertir a zona local
-        if (
-            datetime_obj.tzinfo is None
-            or datetime_obj.tzinfo.utcoffset(datetime_obj) is None
-        ):
-            # Si no tiene zona horaria, asumimos que es UTC
-            utc_time = timezone.make_aware(datetime_obj, pytz.UTC)
-        else:
-            utc_time = datetime_obj
+    @staticmethod
+    def get_local_day_range(local_date):
+        """
+        Devuelve el rango UTC (inicio, fin) que corresponde a un día local
+        """
+        return localization.local_day_range(local_date)
 
-        local_tz = pytz.timezone(settings.TIME_ZONE)
-        local_time = utc_time.astimezone(local_tz)
-        return local_time.strftime("%I:%M %p")
+    @staticmethod
+    def get_today_attendance_queryset(user_id):
+        """
+        Consulta de los registros del día local actual de un usuario, del más
+        reciente al más antiguo. Usa el índice attendance_user_entry_idx.
+        """
+        today = AttendanceService.get_local_time().date()
+        start_of_day_utc, end_of_day_utc = AttendanceService.get_local_day_range(today)
+        return Attendance.objects.filter(
+            user_id=user_id,
+            entry_time__range=(start_of_day_utc, end_of_day_utc),
+        ).order_by("-entry_time")
+
+    @staticmethod
+    def get_daily_statistics(local_date):
+        """
+        Calcula las estadísticas de un día local (total, a tiempo, tarde,
+        jornadas abiertas y horas trabajadas) con una consulta agregada por
+        tabla: los días anteriores al horizonte de archivo suman el archivo
+        Los umbrales de llegada tarde se convierten a instantes UTC: el conteo
+        compara entry_time sin conversiones de zona en la base de datos
+        """
+        from app.services.archive_service import ArchiveService
+        from app.services.schedule_service import ScheduleService
+
+        start_of_day_utc, end_of_day_utc = AttendanceService.get_local_day_range(
+            local_date
+        )
+        late_filter = ScheduleService.late_arrival_filter(local_date)
+        models = [Attendance]
+        if ArchiveService.reaches_archive(start_of_day_utc):
+            models.append(ArchivedAttendance)
+
+        total = late_arrivals = open_shifts = 0
+        time_worked = timedelta(0)
+        for model in models:
+            stats = model.objects.filter(
+                entry_time__range=(start_of_day_utc, end_of_day_utc)
+            ).aggregate(
+                total=Count("id"),
+                late_arrivals=Count("id", filter=late_filter),
+                open_shifts=Count("id", filter=Q(exit_time__isnull=True)),
+                time_worked=Sum(
+                    ExpressionWrapper(
+                        F("exit_time") - F("entry_time"), output_field=DurationField()
+                    ),
+                    filter=Q(exit_time__isnull=False),
+                ),
+            )
+            total += stats["total"]
+            late_arrivals += stats["late_arrivals"]
+            open_shifts += stats["open_shifts"]
+            time_worked += stats["time_worked"] or timedelta(0)
+        on_time = total - late_arrivals
+
+        return {
+            "total": total,
+            "on_time": on_time,
+            "late_arrivals": late_arrivals,
+            "open_shifts": open_shifts,
+            "total_hours": round(time_worked.total_seconds() / 3600, 2),
+            "attendance_percentage": (on_time / max(total, 1)) * 100,
+        }
 
     @staticmethod
     def get_user_today_attendance(user_id):
@@ -56,54 +128,277 @@ class AttendanceService:
             # Obtener fecha local actual
             local_time = AttendanceService.get_local_time()
             today = local_time.date()
-            print(
-                f"🔍 Buscando asistencia para usuario {user_id} en fecha local: {today}"
+
+            # Obtener el registro MÁS RECIENTE del día actual usando rango UTC
+            attendance = AttendanceService.get_today_attendance_queryset(
+                user_id
+            ).first()
+
+            status_logger.debug(
+                "Asistencia del día consultada: fecha=%s attendance_id=%s",
+                today,
+                attendance.id if attendance else None,
+                extra={"user_id": user_id},
+            )
+            return attendance
+        except Exception:
+            logger.exception(
+                "Error en get_user_today_attendance", extra={"user_id": user_id}
             )
+            return None
 
-            # CORREGIDO: Buscar por rango de fechas UTC que corresponda al día local
-            local_tz = pytz.timezone(settings.TIME_ZONE)
+    @staticmethod
+    async def aget_user_today_attendance(user_id):
+        """
+        Versión asíncrona de get_user_today_attendance (ORM asíncrono)
+        """
+        try:
+            return await AttendanceService.get_today_attendance_queryset(
+                user_id
+            ).afirst()
+        except Exception:
+            logger.exception(
+                "Error en aget_user_today_attendance", extra={"user_id": user_id}
+            )
+            return None
 
-            # Inicio del día en zona local, convertido a UTC
-            start_of_day_local = local_tz.localize(
-                timezone.datetime.combine(
-                    today, timezone.datetime.min.time().replace(tzinfo=None)
-                )
+    @staticmethod
+    def get_status_cache_key(user_id, local_date=None):
+        """
+        Clave de caché del estado del día de un usuario. Incluye la fecha local
+        para que el estado expire solo al cambiar de día
+        """
+        if local_date is None:
+            local_date = AttendanceService.get_local_time().date()
+        return f"attendance:today:{user_id}:{local_date.isoformat()}"
+
+    @staticmethod
+    def build_today_snapshot(attendance):
+        """
+        Resumen mínimo del registro del día que se guarda en caché
+        """
+        if attendance is None:
+            return {"attendance_id": None, "entry_time": None, "exit_time": None}
+        return {
+            "attendance_id": attendance.id,
+            "entry_time": attendance.entry_time,
+            "exit_time": attendance.exit_time,
+        }
+
+    @staticmethod
+    def set_today_snapshot(user_id, attendance):
+        """
+        Actualiza en caché el estado del día de un usuario
+        """
+        cache.set(
+            AttendanceService.get_status_cache_key(user_id),
+            AttendanceService.build_today_snapshot(attendance),
+            AttendanceService.STATUS_CACHE_TIMEOUT,
+        )
+        AttendanceService.bump_user_version(user_id)
+
+    @staticmethod
+    def invalidate_today_snapshot(user_id):
+        """
+        Elimina de caché el estado del día de un usuario
+        """
+        cache.delete(AttendanceService.get_status_cache_key(user_id))
+        AttendanceService.bump_user_version(user_id)
+
+    @staticmethod
+    def get_version_cache_key(user_id):
+        return f"attendance:version:{user_id}"
+
+    @staticmethod
+    def bump_user_version(user_id):
+        """
+        Cambia la versión de los datos de asistencia de un usuario. Se llama
+        después de actualizar el estado del día en caché, así quien lee la
+        versión nueva también lee el estado nuevo. Vence como el estado del
+        día, lo que acota cambios hechos por fuera del servicio
+        """
+        cache.set(
+            AttendanceService.get_version_cache_key(user_id),
+            uuid4().hex,
+            AttendanceService.get_version_timeout(),
+        )
+
+    @staticmethod
+    def get_version_timeout():
+        """
+        Vencimiento de la versión: el del estado del día, o el de las entradas
+        de la caché del proceso si es menor (las correcciones hechas en otro
+        proceso no la cambian)
+        """
+        if caching.is_shared():
+            return AttendanceService.STATUS_CACHE_TIMEOUT
+        return min(
+            AttendanceService.STATUS_CACHE_TIMEOUT,
+            caching.persistent_timeout(),
+        )
+
+    @staticmethod
+    def build_shift_stamp(snapshot):
+        """
+        Sello de la jornada del día: cambia con la entrada y con la salida
+        """
+        if snapshot["attendance_id"] is None:
+            return "-"
+        exit_time = snapshot["exit_time"]
+        return (
+            f"{snapshot['attendance_id']}:{snapshot['entry_time'].timestamp()}:"
+            f"{exit_time.timestamp() if exit_time else ''}"
+        )
+
+    @staticmethod
+    async def aget_user_version(user_id):
+        """
+        Versión de los datos de asistencia de un usuario. Si no está en caché
+        se crea una nueva: los clientes con un ETag anterior reciben una vez
+        la respuesta completa
+
+        Con una caché compartida no hace consultas. Con la caché del proceso
+        una marcación atendida por otro proceso no cambia la versión ni el
+        estado en caché de este, así que la versión incluye el sello de la
+        jornada del día (una consulta por índice) y el estado en caché se
+        descarta si no coincide con ella
+        """
+        cache_key = AttendanceService.get_version_cache_key(user_id)
+        version = await AttendanceService.acache_get(cache_key)
+        if version is None:
+            version = uuid4().hex
+            await AttendanceService.acache_set(
+                cache_key, version, AttendanceService.get_version_timeout()
             )
-            start_of_day_utc = start_of_day_local.astimezone(pytz.UTC)
-
-            # Fin del día en zona local, convertido a UTC
-            end_of_day_local = local_tz.localize(
-                timezone.datetime.combine(
-                    today,
-                    timezone.datetime.max.time()
-                    .replace(tzinfo=None)
-                    .replace(microsecond=0),
-                )
+        if caching.is_shared():
+            return version
+
+        attendance = await AttendanceService.aget_user_today_attendance(user_id)
+        snapshot = AttendanceService.build_today_snapshot(attendance)
+        status_key = AttendanceService.get_status_cache_key(user_id)
+        cached = await AttendanceService.acache_get(status_key)
+        if cached is None:
+            await AttendanceService.acache_add(
+                status_key, snapshot, AttendanceService.STATUS_CACHE_TIMEOUT
             )
-            end_of_day_utc = end_of_day_local.astimezone(pytz.UTC)
+        elif cached != snapshot:
+            # delete y no set: una marcación de este proceso posterior a la
+            # lectura no se sobrescribe con un estado anterior
+            cache.delete(status_key)
+        return f"{version}:{AttendanceService.build_shift_stamp(snapshot)}"
 
-            print(f"🔍 Rango de búsqueda UTC: {start_of_day_utc} a {end_of_day_utc}")
+    @staticmethod
+    def build_etag(*parts):
+        digest = hashlib.blake2b(
+            ":".join(str(part) for part in parts).encode(), digest_size=8
+        ).hexdigest()
+        # Débil: las horas de una jornada en curso avanzan sin cambiar la versión
+        return f'W/"{digest}"'
 
-            # Obtener el registro MÁS RECIENTE del día actual usando rango UTC
-            attendance = (
-                Attendance.objects.filter(
-                    user_id=user_id,
-                    entry_time__range=(start_of_day_utc, end_of_day_utc),
-                )
-                .order_by("-entry_time")
-                .first()
-            )
+    @staticmethod
+    def get_status_etag(version, local_date=None):
+        """
+        ETag del estado actual: cambia con cada marcación y al cambiar de día.
+        El tiempo trabajado de una jornada en curso lo avanza el cliente
+        """
+        local_date = local_date or AttendanceService.get_local_time().date()
+        return AttendanceService.build_etag("status", version, local_date)
 
-            print(f"🔍 Registro encontrado: {attendance}")
-            if attendance:
-                print(f"🔍 Entry time UTC: {attendance.entry_time}")
-                local_entry = attendance.entry_time.astimezone(local_tz)
-                print(f"🔍 Entry time local: {local_entry}")
+    @staticmethod
+    def get_history_etag(version, cursor, limit, in_progress, now=None):
+        """
+        ETag de una página del historial. Si la primera página incluye la
+        jornada en curso, sus horas trabajadas cambian cada minuto
+        """
+        now = now or timezone.now()
+        minute = int(now.timestamp() // 60) if in_progress and not cursor else None
+        return AttendanceService.build_etag(
+            "history",
+            version,
+            localization.to_local(now).date(),
+            cursor,
+            limit,
+            minute,
+        )
 
-            return attendance
-        except Exception as e:
-            print(f"❌ Error en get_user_today_attendance: {str(e)}")
+    @staticmethod
+    def not_modified(request, etag):
+        """
+        Respuesta 304 si If-None-Match coincide con `etag` (comparación débil)
+        """
+        header = request.headers.get("If-None-Match")
+        if not header:
+            return None
+        etags = parse_etags(header)
+        if etags != ["*"] and etag.removeprefix("W/") not in {
+            tag.removeprefix("W/") for tag in etags
+        }:
             return None
+        return AttendanceService.with_etag(HttpResponseNotModified(), etag)
+
+    @staticmethod
+    def with_etag(response, etag):
+        """
+        Agrega el ETag y obliga al navegador a revalidar antes de reutilizar
+        """
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @staticmethod
+    def get_today_snapshot(user_id):
+        """
+        Obtiene el estado del día desde caché, consultando la base de datos
+        solo si no está en caché. Lo leído se guarda con add: si una marcación
+        actualizó la caché entre la consulta y la escritura, gana la marcación
+        """
+        cache_key = AttendanceService.get_status_cache_key(user_id)
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            attendance = AttendanceService.get_user_today_attendance(user_id)
+            snapshot = AttendanceService.build_today_snapshot(attendance)
+            cache.add(cache_key, snapshot, AttendanceService.STATUS_CACHE_TIMEOUT)
+        return snapshot
+
+    @staticmethod
+    async def acache_get(key):
+        """
+        Lectura de caché desde código asíncrono. Los backends de caché de
+        Django implementan aget() delegando en un hilo (sync_to_async); la
+        caché en memoria del proceso no hace E/S, así que se lee directamente
+        """
+        if isinstance(caches["default"], LocMemCache):
+            return cache.get(key)
+        return await cache.aget(key)
+
+    @staticmethod
+    async def acache_set(key, value, timeout):
+        if isinstance(caches["default"], LocMemCache):
+            cache.set(key, value, timeout)
+        else:
+            await cache.aset(key, value, timeout)
+
+    @staticmethod
+    async def acache_add(key, value, timeout):
+        if isinstance(caches["default"], LocMemCache):
+            cache.add(key, value, timeout)
+        else:
+            await cache.aadd(key, value, timeout)
+
+    @staticmethod
+    async def aget_today_snapshot(user_id):
+        """
+        Versión asíncrona de get_today_snapshot
+        """
+        cache_key = AttendanceService.get_status_cache_key(user_id)
+        snapshot = await AttendanceService.acache_get(cache_key)
+        if snapshot is None:
+            attendance = await AttendanceService.aget_user_today_attendance(user_id)
+            snapshot = AttendanceService.build_today_snapshot(attendance)
+            await AttendanceService.acache_add(
+                cache_key, snapshot, AttendanceService.STATUS_CACHE_TIMEOUT
+            )
+        return snapshot
 
     @staticmethod
     def can_register_entry(user_id):
@@ -145,88 +440,75 @@ class AttendanceService:
         return True, "Puede registrar salida"
 
     @staticmethod
-    def is_outside_schedule(entry_type, current_time):
+    def is_outside_schedule(entry_type, current_time, user_id=None):
         """
-        Verifica si el registro está fuera del horario establecido
+        Verifica si el registro está fuera del horario del turno del usuario
+        (reglas compiladas de ScheduleService)
         """
-        # Convertir a hora local para la comparación
-        local_tz = pytz.timezone(settings.TIME_ZONE)
-        local_current_time = current_time.astimezone(local_tz)
-        current_hour_minute = local_current_time.time()
-
-        if entry_type == "entry":
-            # Calcular ventana de entrada (con tolerancia)
-            early_limit = time(
-                max(0, AttendanceService.STANDARD_ENTRY_TIME.hour - 1),
-                AttendanceService.STANDARD_ENTRY_TIME.minute,
-            )
-            late_limit = time(
-                AttendanceService.STANDARD_ENTRY_TIME.hour,
-                AttendanceService.STANDARD_ENTRY_TIME.minute
-                + AttendanceService.TOLERANCE_MINUTES,
-            )
-
-            # Si está fuera del rango permitido
-            if current_hour_minute < early_limit or current_hour_minute > late_limit:
-                return (
-                    True,
-                    f"Horario estándar de entrada: {AttendanceService.STANDARD_ENTRY_TIME.strftime('%I:%M %p')}",
-                )
+        from app.services.schedule_service import ScheduleService
 
-        elif entry_type == "exit":
-            # Calcular ventana de salida (con tolerancia)
-            early_limit = time(
-                AttendanceService.STANDARD_EXIT_TIME.hour,
-                max(
-                    0,
-                    AttendanceService.STANDARD_EXIT_TIME.minute
-                    - AttendanceService.TOLERANCE_MINUTES,
-                ),
-            )
-            late_limit = time(
-                AttendanceService.STANDARD_EXIT_TIME.hour + 2,
-                AttendanceService.STANDARD_EXIT_TIME.minute,
-            )
+        return ScheduleService.is_outside_schedule(entry_type, current_time, user_id)
 
-            # Si está fuera del rango permitido
-            if current_hour_minute < early_limit or current_hour_minute > late_limit:
-                return (
-                    True,
-                    f"Horario estándar de salida: {AttendanceService.STANDARD_EXIT_TIME.strftime('%I:%M %p')}",
-                )
+    @staticmethod
+    def notify_change(user_id):
+        """
+        Publica el nuevo estado a los clientes conectados por SSE una vez que
+        la transacción en curso (si la hay) se confirma
+        """
+        from app.services.event_service import EventService
 
-        return False, ""
+        transaction.on_commit(lambda: EventService.publish_attendance_change(user_id))
 
     @staticmethod
     def register_entry(user_id):
         """
         Registra la entrada de un usuario
+        La entrada es un único INSERT: la restricción única (user, work_date)
+        impide en la base de datos una segunda jornada el mismo día, incluso
+        con clics dobles o peticiones concurrentes
         """
         try:
-            # Verificar si puede registrar entrada
-            can_register, message = AttendanceService.can_register_entry(user_id)
-            if not can_register:
-                return {
-                    "success": False,
-                    "message": message,
-                    "notification_type": "error",
-                }
-
-            # Obtener usuario
-            user = User.objects.get(id=user_id)
             current_time = timezone.now()  # Esto sigue siendo UTC para la base de datos
+            local_time = AttendanceService.get_local_time()
 
             # Verificar si está fuera de horario
             is_outside, schedule_info = AttendanceService.is_outside_schedule(
-                "entry", current_time
+                "entry", current_time, user_id
             )
 
-            # Crear el registro de asistencia
-            attendance = Attendance.objects.create(user=user, entry_time=current_time)
+            from app.services.summary_service import SummaryService
+
+            # Crear el registro de asistencia y sumarlo al resumen del día
+            try:
+                with transaction.atomic():
+                    attendance = Attendance.objects.create(
+                        user_id=user_id,
+                        entry_time=current_time,
+                        work_date=local_time.date(),
+                    )
+                    SummaryService.record_entry(
+                        local_time.date(), current_time, user_id
+                    )
+            except IntegrityError:
+                # Ya existe una jornada para hoy (o el usuario no existe). La
+                # caché puede no reflejarla (otro proceso, otra pestaña)
+                AttendanceService.invalidate_today_snapshot(user_id)
+                can_register, message = AttendanceService.can_register_entry(user_id)
+                if can_register and not User.objects.filter(id=user_id).exists():
+                    message = "Usuario no encontrado"
+                elif can_register:
+                    message = "No se pudo registrar la entrada. Inténtalo de nuevo."
+                return {
+                    "success": False,
+                    "message": message,
+                    "notification_type": "error",
+                }
+
+            AttendanceService.set_today_snapshot(user_id, attendance)
+            AttendanceService.notify_change(user_id)
 
             # Formatear tiempo para mostrar al usuario (zona local)
             local_time_str = AttendanceService.format_time_local(current_time)
-            local_time = AttendanceService.get_local_time()
 
             response_data = {
                 "success": True,
@@ -247,12 +529,6 @@ class AttendanceService:
 
             return response_data
 
-        except User.DoesNotExist:
-            return {
-                "success": False,
-                "message": "Usuario no encontrado",
-                "notification_type": "error",
-            }
         except Exception as e:
             return {
                 "success": False,
@@ -264,28 +540,50 @@ class AttendanceService:
     def register_exit(user_id):
         """
         Registra la salida de un usuario
+        La salida es un UPDATE condicional que solo afecta una jornada abierta
+        del día, seguido de la lectura del registro actualizado
         """
         try:
-            # Verificar si puede registrar salida
-            can_register, message = AttendanceService.can_register_exit(user_id)
-            if not can_register:
+            current_time = timezone.now()  # UTC para la base de datos
+            local_time = AttendanceService.get_local_time()
+
+            from app.services.summary_service import SummaryService
+
+            with transaction.atomic():
+                updated = Attendance.objects.filter(
+                    user_id=user_id,
+                    work_date=local_time.date(),
+                    exit_time__isnull=True,
+                ).update(exit_time=current_time)
+
+                if updated:
+                    attendance = Attendance.objects.only(
+                        "id", "entry_time", "exit_time"
+                    ).get(user_id=user_id, work_date=local_time.date())
+                    SummaryService.record_exit(
+                        local_time.date(),
+                        (current_time - attendance.entry_time).total_seconds() / 3600,
+                    )
+
+            if not updated:
+                # No hay jornada abierta: la caché que la mostraba abierta está
+                # desactualizada. Determinar el motivo para el usuario
+                AttendanceService.invalidate_today_snapshot(user_id)
+                can_register, message = AttendanceService.can_register_exit(user_id)
+                if can_register:
+                    message = "No se pudo registrar la salida. Inténtalo de nuevo."
                 return {
                     "success": False,
                     "message": message,
                     "notification_type": "error",
                 }
 
-            # Obtener el registro de asistencia del día
-            attendance = AttendanceService.get_user_today_attendance(user_id)
-            current_time = timezone.now()  # UTC para la base de datos
-
-            # Actualizar la hora de salida
-            attendance.exit_time = current_time
-            attendance.save()
+            AttendanceService.set_today_snapshot(user_id, attendance)
+            AttendanceService.notify_change(user_id)
 
             # Verificar si está fuera de horario
             is_outside, schedule_info = AttendanceService.is_outside_schedule(
-                "exit", current_time
+                "exit", current_time, user_id
             )
 
             # Calcular horas trabajadas
@@ -295,7 +593,6 @@ class AttendanceService:
             # Formatear tiempos para mostrar al usuario (zona local)
             exit_time_str = AttendanceService.format_time_local(current_time)
             entry_time_str = AttendanceService.format_time_local(attendance.entry_time)
-            local_time = AttendanceService.get_local_time()
 
             response_data = {
                 "success": True,
@@ -329,101 +626,124 @@ class AttendanceService:
     def get_current_status(user_id):
         """
         Obtiene el estado actual de asistencia del usuario
-        Calcula el tiempo trabajado en tiempo real desde la base de datos
+        Usa el estado del día en caché y calcula el tiempo trabajado en tiempo
+        real a partir de la hora de entrada, sin consultar la base de datos
+        mientras la caché esté vigente
         """
+        started = perf_counter()
         try:
-            print(f"🔍 get_current_status llamado para usuario: {user_id}")
-            attendance = AttendanceService.get_user_today_attendance(user_id)
-            print(f"🔍 Registro de asistencia encontrado: {attendance}")
+            snapshot = AttendanceService.get_today_snapshot(user_id)
+            return AttendanceService.build_current_status(user_id, snapshot, started)
+        except Exception as e:
+            logger.exception("Error en get_current_status", extra={"user_id": user_id})
+            return AttendanceService.build_status_error(e)
 
-            if attendance:
-                print(f"🔍 Entry time: {attendance.entry_time}")
-                print(f"🔍 Exit time: {attendance.exit_time}")
+    @staticmethod
+    async def aget_current_status(user_id):
+        """
+        Versión asíncrona de get_current_status para vistas async: con la caché
+        vigente no ocupa ningún hilo del pool
+        """
+        started = perf_counter()
+        try:
+            snapshot = await AttendanceService.aget_today_snapshot(user_id)
+            return AttendanceService.build_current_status(user_id, snapshot, started)
+        except Exception as e:
+            logger.exception("Error en aget_current_status", extra={"user_id": user_id})
+            return AttendanceService.build_status_error(e)
 
-            if not attendance:
-                print("🔍 No hay registro de asistencia para hoy - Estado: OUT")
-                return {
-                    "status": "out",
-                    "message": "No has iniciado tu jornada",
-                    "can_register_entry": True,
-                    "can_register_exit": False,
-                    "hours_worked": 0,
-                    "entry_time": None,
-                    "exit_time": None,
-                }
+    @staticmethod
+    def build_status_error(error):
+        return {
+            "status": "error",
+            "message": f"Error al obtener estado: {str(error)}",
+            "can_register_entry": False,
+            "can_register_exit": False,
+            "hours_worked": 0,
+        }
 
-            # Si tiene entrada pero no salida (jornada en progreso)
-            if attendance and not attendance.exit_time:
-                print("🔍 Jornada EN PROGRESO detectada - Estado: IN")
-                # SIEMPRE calcular desde la base de datos usando timezone.now()
-                current_time = timezone.now()  # Tiempo actual del servidor
-                work_duration = current_time - attendance.entry_time
-                hours_worked = work_duration.total_seconds() / 3600
-
-                # Formatear tiempos
-                entry_time_str = AttendanceService.format_time_local(
-                    attendance.entry_time
-                )
+    @staticmethod
+    def build_current_status(user_id, snapshot, started):
+        """
+        Construye la respuesta de estado a partir del estado del día en caché
+        """
+        attendance_id = snapshot["attendance_id"]
+        entry_time = snapshot["entry_time"]
+        exit_time = snapshot["exit_time"]
+
+        if not attendance_id:
+            result = {
+                "status": "out",
+                "message": "No has iniciado tu jornada",
+                "can_register_entry": True,
+                "can_register_exit": False,
+                "hours_worked": 0,
+                "entry_time": None,
+                "exit_time": None,
+            }
 
-                # Calcular tiempo transcurrido para mostrar
-                hours = int(hours_worked)
-                minutes = int((hours_worked - hours) * 60)
-
-                result = {
-                    "status": "in",
-                    "message": f"Jornada iniciada a las {entry_time_str}",
-                    "entry_time": entry_time_str,
-                    "exit_time": None,
-                    "hours_worked": round(hours_worked, 2),
-                    "hours_worked_display": f"{hours}h {minutes}m",
-                    "can_register_entry": False,
-                    "can_register_exit": True,
-                    "attendance_id": attendance.id,
-                }
-                print(f"🔍 Resultado para jornada EN PROGRESO: {result}")
-                return result
+        # Si tiene entrada pero no salida (jornada en progreso)
+        elif not exit_time:
+            # SIEMPRE calcular desde la hora de entrada usando timezone.now()
+            current_time = timezone.now()  # Tiempo actual del servidor
+            work_duration = current_time - entry_time
+            hours_worked = work_duration.total_seconds() / 3600
 
-            # Si tiene entrada Y salida (jornada completada)
-            if attendance and attendance.exit_time:
-                print("🔍 Jornada COMPLETADA detectada - Estado: COMPLETED")
-                work_duration = attendance.exit_time - attendance.entry_time
-                hours_worked = work_duration.total_seconds() / 3600
+            # Formatear tiempos
+            entry_time_str = AttendanceService.format_time_local(entry_time)
 
-                entry_time_str = AttendanceService.format_time_local(
-                    attendance.entry_time
-                )
-                exit_time_str = AttendanceService.format_time_local(
-                    attendance.exit_time
-                )
+            # Calcular tiempo transcurrido para mostrar
+            hours = int(hours_worked)
+            minutes = int((hours_worked - hours) * 60)
 
-                # Calcular tiempo transcurrido para mostrar
-                hours = int(hours_worked)
-                minutes = int((hours_worked - hours) * 60)
-
-                result = {
-                    "status": "completed",
-                    "message": f"Jornada completada ({round(hours_worked, 2)} horas)",
-                    "entry_time": entry_time_str,
-                    "exit_time": exit_time_str,
-                    "hours_worked": round(hours_worked, 2),
-                    "hours_worked_display": f"{hours}h {minutes}m",
-                    "can_register_entry": False,
-                    "can_register_exit": False,
-                    "attendance_id": attendance.id,
-                }
-                print(f"🔍 Resultado para jornada COMPLETADA: {result}")
-                return result
+            result = {
+                "status": "in",
+                "message": f"Jornada iniciada a las {entry_time_str}",
+                "entry_time": entry_time_str,
+                "exit_time": None,
+                "hours_worked": round(hours_worked, 2),
+                "hours_worked_display": f"{hours}h {minutes}m",
+                "can_register_entry": False,
+                "can_register_exit": True,
+                "attendance_id": attendance_id,
+            }
 
-        except Exception as e:
-            print(f"❌ Error en get_current_status: {str(e)}")
-            return {
-                "status": "error",
-                "message": f"Error al obtener estado: {str(e)}",
+        # Si tiene entrada Y salida (jornada completada)
+        else:
+            work_duration = exit_time - entry_time
+            hours_worked = work_duration.total_seconds() / 3600
+
+            entry_time_str = AttendanceService.format_time_local(entry_time)
+            exit_time_str = AttendanceService.format_time_local(exit_time)
+
+            # Calcular tiempo transcurrido para mostrar
+            hours = int(hours_worked)
+            minutes = int((hours_worked - hours) * 60)
+
+            result = {
+                "status": "completed",
+                "message": f"Jornada completada ({round(hours_worked, 2)} horas)",
+                "entry_time": entry_time_str,
+                "exit_time": exit_time_str,
+                "hours_worked": round(hours_worked, 2),
+                "hours_worked_display": f"{hours}h {minutes}m",
                 "can_register_entry": False,
                 "can_register_exit": False,
-                "hours_worked": 0,
+                "attendance_id": attendance_id,
             }
 
+        if should_log(status_logger):
+            status_logger.info(
+                "Estado consultado",
+                extra={
+                    "sampled": True,
+                    "user_id": user_id,
+                    "status": result["status"],
+                    "duration_ms": round((perf_counter() - started) * 1000, 3),
+                },
+            )
+        return result
+
     @staticmethod
     def process_attendance_action(request):
         """
@@ -438,9 +758,7 @@ class AttendanceService:
         if not user_id:
             return JsonResponse({"success": False, "message": "Usuario no autenticado"})
 
-        # Log para depuración
-        print(f"Acción recibida: {action}, Usuario ID: {user_id}")
-
+        started = perf_counter()
         if action == "entry":
             result = AttendanceService.register_entry(user_id)
         elif action == "exit":
@@ -448,8 +766,16 @@ class AttendanceService:
         else:
             return JsonResponse({"success": False, "message": "Acción no válida"})
 
-        # Log para depuración del resultado
-        print(f"Resultado de la acción {action}: {result}")
+        logger.info(
+            "Acción de asistencia procesada: %s",
+            result.get("message"),
+            extra={
+                "user_id": user_id,
+                "action": action,
+                "success": result.get("success"),
+                "duration_ms": round((perf_counter() - started) * 1000, 3),
+            },
+        )
 
         return JsonResponse(result)
 
@@ -465,87 +791,40 @@ class AttendanceService:
 
             # Si no se especifica days, obtener todos los registros
             if days is None:
-                # Obtener TODOS los registros de asistencia del usuario
-                attendances = Attendance.objects.filter(user_id=user_id).order_by(
-                    "-entry_time"
-                )
+                range_start = None
+                filters = {"user_id": user_id}
             else:
                 # Calcular fecha límite usando hora local
                 end_date = local_now.date()
                 start_date = end_date - timedelta(days=days - 1)
 
-                # Obtener registros de asistencia en el rango
-                attendances = Attendance.objects.filter(
-                    user_id=user_id, entry_time__date__range=[start_date, end_date]
-                ).order_by("-entry_time__date")
-
-            history_data = []
-            local_tz = pytz.timezone(settings.TIME_ZONE)
-
-            for attendance in attendances:
-                # Convertir tiempos a zona local
-                entry_local = attendance.entry_time.astimezone(local_tz)
-
-                # Calcular horas trabajadas
-                if attendance.exit_time:
-                    exit_local = attendance.exit_time.astimezone(local_tz)
-                    work_duration = attendance.exit_time - attendance.entry_time
-                    hours_worked = work_duration.total_seconds() / 3600
-                    exit_time = exit_local.strftime("%I:%M %p")
-                    status = "completed"
-                else:
-                    hours_worked = 0
-                    exit_time = None
-                    # Verificar si es el día actual y está en curso
-                    if entry_local.date() == local_now.date():
-                        status = "in_progress"
-                        # Calcular horas actuales
-                        current_duration = timezone.now() - attendance.entry_time
-                        hours_worked = current_duration.total_seconds() / 3600
-                    else:
-                        status = "incomplete"
-
-                # Usar nombres de días y meses en español
-                day_names = {
-                    "Monday": "Lunes",
-                    "Tuesday": "Martes",
-                    "Wednesday": "Miércoles",
-                    "Thursday": "Jueves",
-                    "Friday": "Viernes",
-                    "Saturday": "Sábado",
-                    "Sunday": "Domingo",
+                # Rango UTC equivalente a los días locales, para que la consulta
+                # use el índice (user, -entry_time) en lugar de funciones de fecha
+                range_start, _ = AttendanceService.get_local_day_range(start_date)
+                _, range_end = AttendanceService.get_local_day_range(end_date)
+                filters = {
+                    "user_id": user_id,
+                    "entry_time__range": (range_start, range_end),
                 }
 
-                month_names = {
-                    "January": "enero",
-                    "February": "febrero",
-                    "March": "marzo",
-                    "April": "abril",
-                    "May": "mayo",
-                    "June": "junio",
-                    "July": "julio",
-                    "August": "agosto",
-                    "September": "septiembre",
-                    "October": "octubre",
-                    "November": "noviembre",
-                    "December": "diciembre",
-                }
+            rows = list(
+                Attendance.objects.filter(**filters)
+                .order_by("-entry_time")
+                .values_list("entry_time", "exit_time")
+            )
 
-                day_name_en = entry_local.strftime("%A")
-                month_name_en = entry_local.strftime("%B")
-
-                history_data.append(
-                    {
-                        "date": entry_local.date().strftime("%Y-%m-%d"),
-                        "day_name": day_names.get(day_name_en, day_name_en),
-                        "day_number": entry_local.day,
-                        "month_name": month_names.get(month_name_en, month_name_en),
-                        "entry_time": entry_local.strftime("%I:%M %p"),
-                        "exit_time": exit_time,
-                        "hours_worked": round(hours_worked, 2),
-                        "status": status,
-                    }
+            # El archivo solo se consulta si el rango llega antes del horizonte
+            from app.services.archive_service import ArchiveService
+
+            if ArchiveService.reaches_archive(range_start):
+                rows.extend(
+                    ArchivedAttendance.objects.filter(**filters).values_list(
+                        "entry_time", "exit_time"
+                    )
                 )
+                rows.sort(key=lambda row: row[0], reverse=True)
+
+            history_data = localization.serialize_history_rows(rows, local_now.date())
 
             return {
                 "success": True,
@@ -559,3 +838,137 @@ class AttendanceService:
                 "message": f"Error al obtener historial: {str(e)}",
                 "history": [],
             }
+
+    @staticmethod
+    def encode_history_cursor(entry_time, attendance_id):
+        """
+        Genera un cursor opaco (entry_time, id) a partir del último registro de una página
+        """
+        raw = f"{entry_time.isoformat()}|{attendance_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_history_cursor(cursor):
+        """
+        Interpreta un cursor del historial
+        Returns: tupla (entry_time, id). Lanza ValueError si el cursor no es válido
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            entry_time_str, attendance_id = raw.split("|")
+            entry_time = datetime.fromisoformat(entry_time_str)
+            attendance_id = int(attendance_id)
+        except (ValueError, UnicodeError) as e:
+            raise ValueError("Cursor inválido") from e
+
+        if timezone.is_naive(entry_time):
+            raise ValueError("Cursor inválido")
+        return entry_time, attendance_id
+
+    @staticmethod
+    def get_history_page_queryset(user_id, cursor=None, limit=None, model=Attendance):
+        """
+        Consulta de una página del historial con paginación por cursor (keyset)
+        sobre (entry_time, id). Incluye un registro extra para saber si hay
+        otra página. `model` permite la misma consulta sobre ArchivedAttendance
+        Returns: (queryset, limit normalizado). Lanza ValueError si el cursor
+        no es válido
+        """
+        try:
+            limit = int(limit) if limit else AttendanceService.HISTORY_PAGE_SIZE
+        except (TypeError, ValueError):
+            limit = AttendanceService.HISTORY_PAGE_SIZE
+        limit = max(1, min(limit, AttendanceService.HISTORY_MAX_PAGE_SIZE))
+
+        attendances = model.objects.filter(user_id=user_id)
+        if cursor:
+            entry_time, attendance_id = AttendanceService.decode_history_cursor(cursor)
+            attendances = attendances.filter(
+                Q(entry_time__lt=entry_time)
+                | Q(entry_time=entry_time, id__lt=attendance_id)
+            )
+        page = attendances.order_by("-entry_time", "-id").values_list(
+            "id", "entry_time", "exit_time"
+        )
+        return page[: limit + 1], limit
+
+    @staticmethod
+    def build_history_page(page, limit):
+        """
+        Serializa una página del historial a partir de filas (id, entry_time,
+        exit_time), con el registro extra incluido
+        """
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        history_data = localization.serialize_history_rows(
+            (entry_time, exit_time) for _, entry_time, exit_time in page
+        )
+
+        return {
+            "success": True,
+            "history": history_data,
+            "total_records": len(history_data),
+            "has_more": has_more,
+            "next_cursor": (
+                AttendanceService.encode_history_cursor(page[-1][1], page[-1][0])
+                if has_more
+                else None
+            ),
+        }
+
+    @staticmethod
+    def build_history_page_error(error):
+        message = str(error)
+        if not isinstance(error, ValueError):
+            message = f"Error al obtener historial: {message}"
+        return {
+            "success": False,
+            "message": message,
+            "history": [],
+            "next_cursor": None,
+        }
+
+    @staticmethod
+    def get_attendance_history_page(user_id, cursor=None, limit=None):
+        """
+        Obtiene una página del historial usando paginación por cursor (keyset)
+        sobre (entry_time, id), del registro más reciente al más antiguo.
+        El costo de cada página es constante sin importar la antigüedad del usuario.
+        Las páginas que llegan más atrás del horizonte de archivo se completan
+        con ArchivedAttendance
+        """
+        from app.services.archive_service import ArchiveService
+
+        try:
+            queryset, limit = AttendanceService.get_history_page_queryset(
+                user_id, cursor, limit
+            )
+            page = ArchiveService.complete_history_page(
+                user_id, cursor, limit, list(queryset)
+            )
+            return AttendanceService.build_history_page(page, limit)
+        except Exception as e:
+            return AttendanceService.build_history_page_error(e)
+
+    @staticmethod
+    async def aget_attendance_history_page(user_id, cursor=None, limit=None):
+        """
+        Versión asíncrona de get_attendance_history_page (ORM asíncrono)
+        """
+        from app.services.archive_service import ArchiveService
+
+        try:
+            queryset, limit = AttendanceService.get_history_page_queryset(
+                user_id, cursor, limit
+            )
+            # aiterator() no sirve con values_list(): Django ejecuta la consulta
+            # al crear el iterador, fuera del hilo. `async for` sobre el
+            # queryset la ejecuta con sync_to_async (la página es pequeña)
+            page = [row async for row in queryset]
+            page = await ArchiveService.acomplete_history_page(
+                user_id, cursor, limit, page
+            )
+            return AttendanceService.build_history_page(page, limit)
+        except Exception as e:
+            return AttendanceService.build_history_page_error(e)
@@ -0,0 +1,56 @@
+"""
+Caché compartida o caché del proceso.
+
+Con un backend compartido (Redis, Memcached, base de datos) una invalidación
+hecha en cualquier proceso (un worker web, `import_punches`,
+`rebuild_daily_summary`) la ven todos, y las entradas que solo cambian por
+invalidación pueden guardarse sin vencimiento. Con la caché en memoria del
+proceso (LocMem) la invalidación solo llega al proceso que la hizo: esas
+entradas vencen a los ATTENDANCE_LOCAL_CACHE_MAX_AGE segundos.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+_batch_invalidation = ContextVar("attendance_batch_invalidation", default=False)
+
+
+def is_shared(alias="default"):
+    """
+    True si la caché es visible para todos los procesos
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def persistent_timeout():
+    """
+    Vencimiento de las entradas invalidadas explícitamente: sin vencimiento
+    (None) en una caché compartida, acotado en la caché del proceso
+    """
+    return None if is_shared() else settings.ATTENDANCE_LOCAL_CACHE_MAX_AGE
+
+
+@contextmanager
+def batch_invalidation():
+    """
+    Dentro del bloque los receptores post_save/post_delete de Attendance no
+    invalidan por fila: quien modifica el lote invalida sus fechas una vez
+    Solo afecta al hilo o tarea actual
+    """
+    token = _batch_invalidation.set(True)
+    try:
+        yield
+    finally:
+        _batch_invalidation.reset(token)
+
+
+def in_batch_invalidation():
+    """
+    True dentro de batch_invalidation()
+    """
+    return _batch_invalidation.get()
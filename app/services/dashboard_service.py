@@ -0,0 +1,244 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from app.models import ArchivedAttendance, Attendance
+from app.services import caching, localization
+from app.services.attendance_service import AttendanceService
+from app.services.schedule_service import ScheduleService
+
+
+class DashboardService:
+    """
+    Datos del dashboard de administración y versión de sus fragmentos en caché
+
+    La tabla de registros de un día se entrega por páginas con paginación por
+    cursor (keyset) sobre (entry_time, id): el dashboard muestra la primera
+    página y pide las siguientes a /api/dashboard/attendances/, así la
+    respuesta no crece con la cantidad de marcaciones del día.
+
+    El template guarda en caché ({% cache %}) las tarjetas de estadísticas y
+    la primera página de la tabla. La clave de los fragmentos incluye una
+    versión por fecha local y la versión de las reglas de horario; una
+    marcación, una importación o una corrección cambia la versión de su fecha
+    y los fragmentos anteriores dejan de usarse. Las fechas pasadas se
+    guardan sin vencimiento si la caché es compartida (en la caché del proceso
+    vencen con caching.persistent_timeout); las de hoy vencen a los
+    TODAY_CACHE_TIMEOUT segundos
+    """
+
+    VERSION_CACHE_KEY = "dashboard:version:{}"
+    TODAY_CACHE_TIMEOUT = 60
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    # Orden por hora de entrada: más recientes primero (por defecto) o al revés
+    SORTS = ("-entry_time", "entry_time")
+    LATE_FILTERS = ("late", "on_time")
+
+    @staticmethod
+    def get_fragment_cache(selected_date):
+        """
+        Versión y vencimiento de los fragmentos del dashboard para la fecha
+        Returns: dict con version (parte de la clave) y timeout (None = sin
+        vencimiento, solo con caché compartida)
+        """
+        key = DashboardService.VERSION_CACHE_KEY.format(selected_date.isoformat())
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid4().hex, None)
+            version = cache.get(key)
+
+        past = selected_date < localization.local_now().date()
+        return {
+            "version": (
+                f"{selected_date.isoformat()}:{version}:"
+                f"{ScheduleService.get_schedule().version}"
+            ),
+            "timeout": (
+                caching.persistent_timeout()
+                if past
+                else DashboardService.TODAY_CACHE_TIMEOUT
+            ),
+        }
+
+    @staticmethod
+    def invalidate_dates(dates):
+        """
+        Cambia la versión de los fragmentos de las fechas locales indicadas
+        una vez confirmada la transacción en curso (antes, otra petición
+        podría volver a guardar los datos anteriores)
+        """
+        keys = [
+            DashboardService.VERSION_CACHE_KEY.format(local_date.isoformat())
+            for local_date in dates
+        ]
+        if keys:
+            transaction.on_commit(
+                lambda: cache.set_many({key: uuid4().hex for key in keys}, None)
+            )
+
+    @staticmethod
+    def get_page_queryset(
+        local_date,
+        cursor=None,
+        limit=None,
+        sort=None,
+        status=None,
+        late=None,
+        model=Attendance,
+    ):
+        """
+        Consulta de una página de registros del día (en `model`) con el
+        registro extra que indica si hay otra página. Los valores desconocidos
+        de sort, status y late se ignoran (orden por defecto, sin filtro)
+        Returns: (queryset, limit normalizado). Lanza ValueError si el cursor
+        no es válido
+        """
+        try:
+            limit = int(limit) if limit else DashboardService.PAGE_SIZE
+        except (TypeError, ValueError):
+            limit = DashboardService.PAGE_SIZE
+        limit = max(1, min(limit, DashboardService.MAX_PAGE_SIZE))
+        descending = sort != DashboardService.SORTS[1]
+
+        attendances = model.objects.filter(
+            entry_time__range=localization.local_day_range(local_date)
+        )
+        if status == "in_progress":
+            attendances = attendances.filter(exit_time__isnull=True)
+        elif status == "completed":
+            attendances = attendances.filter(exit_time__isnull=False)
+        if late in DashboardService.LATE_FILTERS:
+            late_filter = ScheduleService.late_arrival_filter(local_date)
+            attendances = attendances.filter(
+                late_filter if late == "late" else ~late_filter
+            )
+
+        if cursor:
+            entry_time, attendance_id = AttendanceService.decode_history_cursor(cursor)
+            if descending:
+                after = Q(entry_time__lt=entry_time) | Q(
+                    entry_time=entry_time, id__lt=attendance_id
+                )
+            else:
+                after = Q(entry_time__gt=entry_time) | Q(
+                    entry_time=entry_time, id__gt=attendance_id
+                )
+            attendances = attendances.filter(after)
+
+        order = ("-entry_time", "-id") if descending else ("entry_time", "id")
+        page = attendances.order_by(*order).values_list(
+            "id", "user_id", "user__name", "entry_time", "exit_time"
+        )
+        return page[: limit + 1], limit
+
+    @staticmethod
+    def serialize_rows(rows):
+        """
+        Serializa filas (id, user_id, nombre, entry_time, exit_time) en UTC
+        para la tabla (mismo formato en el template y en la API). La llegada
+        tarde sigue el turno de cada empleado (reglas compiladas, sin
+        consultas por fila)
+        """
+        zone = localization.get_local_timezone()
+        late_flags = ScheduleService.classify_late(
+            (user_id, entry_time) for _, user_id, _, entry_time, _ in rows
+        )
+        serialized = []
+        for (attendance_id, user_id, name, entry_time, exit_time), is_late in zip(
+            rows, late_flags
+        ):
+            entry_local = entry_time.astimezone(zone)
+            if exit_time is None:
+                status, exit_display, duration = "in_progress", None, None
+            else:
+                minutes = int((exit_time - entry_time).total_seconds() // 60)
+                status = "completed"
+                exit_display = exit_time.astimezone(zone).strftime("%H:%M")
+                duration = f"{minutes // 60}h {minutes % 60}m"
+            serialized.append(
+                {
+                    "id": attendance_id,
+                    "user_id": user_id,
+                    "name": name,
+                    "date": entry_local.date().isoformat(),
+                    "entry_time": entry_local.strftime("%H:%M"),
+                    "exit_time": exit_display,
+                    "duration": duration,
+                    "status": status,
+                    "late": is_late,
+                }
+            )
+        return serialized
+
+    @staticmethod
+    def get_attendance_page(
+        local_date, cursor=None, limit=None, sort=None, status=None, late=None
+    ):
+        """
+        Página de registros de un día local para la tabla del dashboard. Los
+        días anteriores al horizonte de archivo combinan ambas tablas
+        Returns: dict con success, rows, has_more y next_cursor. Con un cursor
+        inválido devuelve success False
+        """
+        from app.services.archive_service import ArchiveService
+
+        try:
+            queryset, limit = DashboardService.get_page_queryset(
+                local_date, cursor, limit, sort, status, late
+            )
+        except ValueError as e:
+            return {
+                "success": False,
+                "message": str(e),
+                "rows": [],
+                "next_cursor": None,
+            }
+
+        page = list(queryset)
+        if ArchiveService.reaches_archive(localization.local_day_range(local_date)[0]):
+            archived, _ = DashboardService.get_page_queryset(
+                local_date, cursor, limit, sort, status, late, model=ArchivedAttendance
+            )
+            page = sorted(
+                page + list(archived),
+                key=lambda row: (row[3], row[0]),
+                reverse=sort != DashboardService.SORTS[1],
+            )[: limit + 1]
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            "success": True,
+            "rows": DashboardService.serialize_rows(page),
+            "has_more": has_more,
+            "next_cursor": (
+                AttendanceService.encode_history_cursor(page[-1][3], page[-1][0])
+                if has_more
+                else None
+            ),
+        }
+
+    @staticmethod
+    def on_attendance_changed(sender, instance, **kwargs):
+        # Correcciones desde el admin u otros save(); las marcaciones y las
+        # importaciones invalidan desde SummaryService e ImportService
+        if caching.in_batch_invalidation():
+            return
+        DashboardService.invalidate_dates(
+            [localization.to_local(instance.entry_time).date()]
+        )
+
+    @staticmethod
+    def connect_signals():
+        post_save.connect(
+            DashboardService.on_attendance_changed,
+            sender=Attendance,
+            dispatch_uid="dashboard_attendance_saved",
+        )
+        post_delete.connect(
+            DashboardService.on_attendance_changed,
+            sender=Attendance,
+            dispatch_uid="dashboard_attendance_deleted",
+        )
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryEventBroker:
+    """
+    Pub/sub en memoria del proceso para los eventos en vivo (SSE)
+
+    Cada suscriptor tiene una cola asyncio en el event loop que lo creó; las
+    publicaciones pueden hacerse desde cualquier hilo (las vistas síncronas
+    corren en un hilo aparte bajo ASGI), por eso se entregan con
+    call_soon_threadsafe. Solo sirve con un único proceso ASGI: con varios
+    workers se debe configurar un broker compartido con la misma interfaz
+    (publish / subscribe / unsubscribe / has_subscribers) en
+    ATTENDANCE_EVENT_BROKER.
+    """
+
+    # Eventos pendientes por suscriptor; los eventos de estado son "el último
+    # gana", así que si un cliente lento se atrasa se descarta el más antiguo
+    QUEUE_SIZE = 16
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def has_subscribers(self, channel):
+        return bool(self.subscribers.get(channel))
+
+    def subscribe(self, channel, queue=None):
+        """
+        Registra un suscriptor en el event loop actual
+        Se puede pasar la misma cola para recibir varios canales juntos
+        Returns: asyncio.Queue donde se recibirán los eventos del canal
+        """
+        if queue is None:
+            queue = asyncio.Queue(maxsize=InMemoryEventBroker.QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(subscriber)
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        with self.lock:
+            subscribers = self.subscribers.get(channel, set())
+            subscribers.difference_update(
+                {subscriber for subscriber in subscribers if subscriber[1] is queue}
+            )
+            if not subscribers:
+                self.subscribers.pop(channel, None)
+
+    def publish(self, channel, event):
+        """
+        Entrega un evento a todos los suscriptores del canal
+        Returns: número de suscriptores notificados
+        """
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(InMemoryEventBroker.deliver, queue, event)
+            except RuntimeError:
+                # El event loop del suscriptor ya se cerró
+                self.unsubscribe(channel, queue)
+        return len(subscribers)
+
+    @staticmethod
+    def deliver(queue, event):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class EventService:
+    """
+    Publicación de cambios de asistencia para los clientes conectados por SSE
+    """
+
+    DASHBOARD_CHANNEL = "attendance:dashboard"
+
+    # Milisegundos que espera EventSource antes de reconectarse
+    RETRY_MS = 5000
+
+    @staticmethod
+    def get_broker():
+        """
+        Devuelve el broker configurado en ATTENDANCE_EVENT_BROKER (uno por proceso)
+        """
+        global _broker
+        if _broker is None:
+            with _broker_lock:
+                if _broker is None:
+                    broker_class = import_string(
+                        getattr(
+                            settings,
+                            "ATTENDANCE_EVENT_BROKER",
+                            "app.services.event_service.InMemoryEventBroker",
+                        )
+                    )
+                    _broker = broker_class()
+        return _broker
+
+    @staticmethod
+    def get_user_channel(user_id):
+        return f"attendance:user:{user_id}"
+
+    @staticmethod
+    def format_sse(event_type, data):
+        """
+        Serializa un evento con el formato de Server-Sent Events
+        """
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        return f"event: {event_type}\ndata: {payload}\n\n"
+
+    @staticmethod
+    def get_dashboard_counters():
+        """
+        Contadores del dashboard para el día actual (una fila del resumen diario)
+        """
+        from app.services.attendance_service import AttendanceService
+        from app.services.summary_service import SummaryService
+
+        today = AttendanceService.get_local_time().date()
+        counters = SummaryService.get_summary(today)
+        counters["date"] = today.isoformat()
+        return counters
+
+    @staticmethod
+    def publish_attendance_change(user_id):
+        """
+        Notifica el nuevo estado del usuario y los contadores del dashboard
+        Los datos solo se calculan si hay clientes suscritos al canal
+        """
+        from app.services.attendance_service import AttendanceService
+
+        broker = EventService.get_broker()
+        try:
+            user_channel = EventService.get_user_channel(user_id)
+            if broker.has_subscribers(user_channel):
+                broker.publish(
+                    user_channel,
+                    (
+                        "status",
+                        AttendanceService.get_current_status(user_id),
+                    ),
+                )
+            if broker.has_subscribers(EventService.DASHBOARD_CHANNEL):
+                broker.publish(
+                    EventService.DASHBOARD_CHANNEL,
+                    ("dashboard", EventService.get_dashboard_counters()),
+                )
+        except Exception:
+            # Un fallo al notificar no debe afectar el registro ya guardado
+            logger.exception(
+                "Error al publicar cambio de asistencia", extra={"user_id": user_id}
+            )
+
+    @staticmethod
+    async def stream_events(user_id, is_admin=False):
+        """
+        Generador asíncrono de eventos SSE para un cliente conectado
+        Envía el estado actual al conectarse y luego solo cuando cambia; entre
+        eventos envía comentarios de keepalive para que proxies y navegadores
+        no cierren la conexión. Tras ATTENDANCE_SSE_MAX_SECONDS termina y el
+        navegador se reconecta solo, lo que reparte las conexiones entre workers
+        """
+        from app.services.attendance_service import AttendanceService
+
+        keepalive = getattr(settings, "ATTENDANCE_SSE_KEEPALIVE_SECONDS", 15)
+        max_seconds = getattr(settings, "ATTENDANCE_SSE_MAX_SECONDS", 300)
+
+        broker = EventService.get_broker()
+        channels = [EventService.get_user_channel(user_id)]
+        if is_admin:
+            channels.append(EventService.DASHBOARD_CHANNEL)
+
+        # Suscribirse antes de leer el estado inicial para no perder cambios
+        queue = None
+        for channel in channels:
+            queue = broker.subscribe(channel, queue)
+
+        try:
+            yield f"retry: {EventService.RETRY_MS}\n\n"
+            status = await sync_to_async(AttendanceService.get_current_status)(user_id)
+            yield EventService.format_sse("status", status)
+            if is_admin:
+                counters = await sync_to_async(EventService.get_dashboard_counters)()
+                yield EventService.format_sse("dashboard", counters)
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + max_seconds
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                try:
+                    event_type, data = await asyncio.wait_for(
+                        queue.get(), timeout=min(keepalive, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield EventService.format_sse(event_type, data)
+        finally:
+            for channel in channels:
+                broker.unsubscribe(channel, queue)
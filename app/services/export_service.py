@@ -0,0 +1,188 @@
+import csv
+import heapq
+import io
+import json
+from itertools import chain, islice
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from app.models import ArchivedAttendance, Attendance
+from app.services import localization
+from app.services.attendance_service import AttendanceService
+
+
+class ExportService:
+    """
+    Exportación de registros de asistencia en streaming (CSV o NDJSON)
+    Los registros se leen por bloques con paginación por cursor sobre
+    (entry_time, id), así la memoria usada es constante sin importar el rango.
+    Los rangos que llegan antes del horizonte de archivo incluyen también las
+    jornadas de ArchivedAttendance
+    """
+
+    EXPORT_CHUNK_SIZE = 2000
+
+    COLUMNS = (
+        "attendance_id",
+        "user_id",
+        "name",
+        "email",
+        "date",
+        "entry_time",
+        "exit_time",
+        "hours_worked",
+    )
+
+    FORMATS = {
+        "csv": "text/csv; charset=utf-8",
+        "ndjson": "application/x-ndjson; charset=utf-8",
+    }
+
+    @staticmethod
+    def iter_attendance_chunks(start_date, end_date, chunk_size=None):
+        """
+        Recorre los registros de un rango de fechas locales en bloques
+        Si el rango llega antes del horizonte de archivo, combina en orden las
+        jornadas archivadas con las de la tabla caliente
+        """
+        from app.services.archive_service import ArchiveService
+
+        chunk_size = chunk_size or ExportService.EXPORT_CHUNK_SIZE
+        range_start, _ = AttendanceService.get_local_day_range(start_date)
+        _, range_end = AttendanceService.get_local_day_range(end_date)
+
+        chunks = ExportService.iter_model_chunks(
+            Attendance, range_start, range_end, chunk_size
+        )
+        if not ArchiveService.reaches_archive(range_start):
+            yield from chunks
+            return
+
+        archived_chunks = ExportService.iter_model_chunks(
+            ArchivedAttendance, range_start, range_end, chunk_size
+        )
+        rows = heapq.merge(
+            chain.from_iterable(archived_chunks),
+            chain.from_iterable(chunks),
+            key=lambda row: (row[4], row[0]),
+        )
+        while chunk := list(islice(rows, chunk_size)):
+            yield chunk
+
+    @staticmethod
+    def iter_model_chunks(model, range_start, range_end, chunk_size):
+        """
+        Recorre en bloques los registros de `model` (Attendance o
+        ArchivedAttendance) con entrada dentro del rango UTC
+        Cada bloque es una consulta independiente que continúa desde el último
+        (entry_time, id) leído; no se mantiene un cursor abierto en la base de datos
+        """
+        queryset = (
+            model.objects.filter(entry_time__range=(range_start, range_end))
+            .order_by("entry_time", "id")
+            .values_list(
+                "id", "user_id", "user__name", "user__email", "entry_time", "exit_time"
+            )
+        )
+
+        last = None
+        while True:
+            chunk_queryset = queryset
+            if last is not None:
+                last_entry_time, last_id = last
+                chunk_queryset = queryset.filter(
+                    Q(entry_time__gt=last_entry_time)
+                    | Q(entry_time=last_entry_time, id__gt=last_id)
+                )
+            chunk = list(chunk_queryset[:chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            last = (chunk[-1][4], chunk[-1][0])
+
+    @staticmethod
+    def localize_chunk(chunk, local_tz):
+        """
+        Convierte un bloque de filas a hora local y calcula las horas trabajadas
+        """
+        rows = []
+        for attendance_id, user_id, name, email, entry_time, exit_time in chunk:
+            entry_local = entry_time.astimezone(local_tz)
+            if exit_time:
+                exit_local = exit_time.astimezone(local_tz).isoformat()
+                hours_worked = round((exit_time - entry_time).total_seconds() / 3600, 2)
+            else:
+                exit_local = None
+                hours_worked = None
+            rows.append(
+                (
+                    attendance_id,
+                    user_id,
+                    name,
+                    email,
+                    entry_local.date().isoformat(),
+                    entry_local.isoformat(),
+                    exit_local,
+                    hours_worked,
+                )
+            )
+        return rows
+
+    @staticmethod
+    def stream_csv(start_date, end_date, chunk_size=None):
+        """
+        Generador de texto CSV: una cadena por bloque de registros
+        """
+        local_tz = localization.get_local_timezone()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(ExportService.COLUMNS)
+        yield buffer.getvalue()
+
+        for chunk in ExportService.iter_attendance_chunks(
+            start_date, end_date, chunk_size
+        ):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(ExportService.localize_chunk(chunk, local_tz))
+            yield buffer.getvalue()
+
+    @staticmethod
+    def stream_ndjson(start_date, end_date, chunk_size=None):
+        """
+        Generador de NDJSON (un objeto JSON por línea): una cadena por bloque
+        """
+        local_tz = localization.get_local_timezone()
+        for chunk in ExportService.iter_attendance_chunks(
+            start_date, end_date, chunk_size
+        ):
+            yield "".join(
+                json.dumps(dict(zip(ExportService.COLUMNS, row)), ensure_ascii=False)
+                + "\n"
+                for row in ExportService.localize_chunk(chunk, local_tz)
+            )
+
+    @staticmethod
+    def stream(export_format, start_date, end_date, chunk_size=None):
+        """
+        Devuelve el generador correspondiente al formato solicitado
+        """
+        if export_format == "ndjson":
+            return ExportService.stream_ndjson(start_date, end_date, chunk_size)
+        return ExportService.stream_csv(start_date, end_date, chunk_size)
+
+    @staticmethod
+    async def astream(export_format, start_date, end_date, chunk_size=None):
+        """
+        Versión asíncrona de stream para ASGI
+        Django consume un generador síncrono completo (sync_to_async(list))
+        antes de enviar el primer byte; aquí cada bloque se lee en el hilo del
+        ORM con sync_to_async y se envía en cuanto está listo
+        """
+        parts = ExportService.stream(export_format, start_date, end_date, chunk_size)
+        next_part = sync_to_async(next)
+        while (part := await next_part(parts, None)) is not None:
+            yield part
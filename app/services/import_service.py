@@ -0,0 +1,288 @@
+import csv
+import logging
+from datetime import datetime, time
+from time import perf_counter
+
+from django.conf import settings
+from django.db import transaction
+from app.models import ArchivedAttendance, Attendance, User
+from app.services import localization
+from app.services.archive_service import ArchiveService
+from app.services.attendance_service import AttendanceService
+
+logger = logging.getLogger(__name__)
+
+
+class PunchImportError(Exception):
+    """
+    Error de formato que impide importar el archivo completo
+    """
+
+
+class ImportService:
+    """
+    Importación masiva de marcaciones exportadas por los relojes de asistencia
+
+    El archivo CSV se lee línea por línea. Las marcaciones se agrupan por
+    usuario y día local; cada vez que se acumulan `batch_size` jornadas se
+    combinan con los registros existentes y se escriben con bulk_create /
+    bulk_update dentro de una transacción. La memoria usada depende del
+    tamaño del lote, no del tamaño del archivo.
+
+    Formato esperado (con encabezado):
+        email,timestamp,type
+        ana@empresa.com,2025-08-14 06:58:12,entry
+    - Se acepta `user_id` en lugar de `email`.
+    - `timestamp` en formato ISO; sin zona horaria se interpreta en la zona local.
+    - `type` es opcional (entry/in/entrada, exit/out/salida). Sin tipo, la
+      primera marcación del día es la entrada y la última la salida.
+    - Las jornadas ya existentes se combinan: se conserva la entrada más
+      temprana y la salida más tardía, así reimportar un archivo no duplica datos.
+      Las jornadas ya archivadas se combinan en ArchivedAttendance.
+    """
+
+    DEFAULT_BATCH_SIZE = 5000
+
+    ENTRY_TYPES = {"entry", "in", "entrada", "e", "i"}
+    EXIT_TYPES = {"exit", "out", "salida", "s", "o"}
+
+    def __init__(self, batch_size=None, time_zone=None):
+        self.batch_size = batch_size or ImportService.DEFAULT_BATCH_SIZE
+        self.local_tz = localization.get_zone(time_zone or settings.TIME_ZONE)
+        self.stats = {
+            "rows": 0,
+            "invalid": 0,
+            "unknown_users": 0,
+            "created": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "orphan_exits": 0,
+            "batches": 0,
+        }
+        self.affected_dates = set()
+        self.affected_today_users = set()
+        self.affected_users = set()
+        # (user_id, fecha local) -> [primera entrada, última salida]
+        self.pending = {}
+        self.user_ids = None
+
+    def load_users(self, user_field):
+        """
+        Carga el mapa identificador -> id de usuario (una sola consulta)
+        """
+        if user_field == "email":
+            self.user_ids = {
+                email.lower(): user_id
+                for user_id, email in User.objects.values_list("id", "email")
+            }
+        else:
+            self.user_ids = {
+                str(user_id): user_id
+                for user_id in User.objects.values_list("id", flat=True)
+            }
+
+    def parse_timestamp(self, value):
+        """
+        Convierte una marcación a UTC
+        Returns: (timestamp en UTC, fecha local de la jornada)
+        """
+        timestamp = datetime.fromisoformat(value.strip())
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=self.local_tz)
+        local_timestamp = timestamp.astimezone(self.local_tz)
+        return timestamp.astimezone(localization.UTC), local_timestamp.date()
+
+    def add_punch(self, user_id, timestamp, work_date, punch_type):
+        """
+        Acumula una marcación en la jornada (usuario, día local) correspondiente
+        """
+        key = (user_id, work_date)
+        shift = self.pending.get(key)
+        if shift is None:
+            shift = self.pending[key] = [None, None]
+
+        if punch_type in ImportService.ENTRY_TYPES:
+            candidates = ((0, min),)
+        elif punch_type in ImportService.EXIT_TYPES:
+            candidates = ((1, max),)
+        else:
+            # Sin tipo: la marcación puede ser la primera (entrada) o la última (salida)
+            candidates = ((0, min), (1, max))
+
+        for index, choose in candidates:
+            current = shift[index]
+            shift[index] = timestamp if current is None else choose(current, timestamp)
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Combina las jornadas pendientes con las existentes y las escribe en lote
+        """
+        if not self.pending:
+            return
+
+        pending, self.pending = self.pending, {}
+        user_ids = {user_id for user_id, _ in pending}
+        work_dates = {work_date for _, work_date in pending}
+        today = AttendanceService.get_local_time().date()
+
+        # Los días anteriores al horizonte pueden estar ya en el archivo
+        models = [Attendance]
+        if ArchiveService.reaches_archive(
+            localization.local_to_utc(min(work_dates), time.min)
+        ):
+            models.append(ArchivedAttendance)
+
+        with transaction.atomic():
+            existing = {}
+            for model in models:
+                for attendance in model.objects.filter(
+                    user_id__in=user_ids, work_date__in=work_dates
+                ).only("id", "user_id", "work_date", "entry_time", "exit_time"):
+                    existing.setdefault(
+                        (attendance.user_id, attendance.work_date), attendance
+                    )
+
+            to_create = []
+            to_update = []
+            for (user_id, work_date), (entry_time, exit_time) in pending.items():
+                attendance = existing.get((user_id, work_date))
+                if attendance is not None:
+                    entry_time = min(
+                        filter(None, (entry_time, attendance.entry_time)),
+                    )
+                    exit_time = max(
+                        filter(None, (exit_time, attendance.exit_time)), default=None
+                    )
+                elif entry_time is None:
+                    # Salida sin entrada registrada: no se puede crear la jornada
+                    self.stats["orphan_exits"] += 1
+                    continue
+
+                if exit_time is not None and exit_time <= entry_time:
+                    exit_time = None
+
+                if attendance is None:
+                    to_create.append(
+                        Attendance(
+                            user_id=user_id,
+                            work_date=work_date,
+                            entry_time=entry_time,
+                            exit_time=exit_time,
+                        )
+                    )
+                elif (attendance.entry_time, attendance.exit_time) != (
+                    entry_time,
+                    exit_time,
+                ):
+                    attendance.entry_time = entry_time
+                    attendance.exit_time = exit_time
+                    to_update.append(attendance)
+                else:
+                    self.stats["unchanged"] += 1
+                    continue
+
+                self.affected_dates.add(work_date)
+                self.affected_users.add(user_id)
+                if work_date == today:
+                    self.affected_today_users.add(user_id)
+
+            Attendance.objects.bulk_create(to_create, batch_size=1000)
+            for model in models:
+                model.objects.bulk_update(
+                    [
+                        attendance
+                        for attendance in to_update
+                        if type(attendance) is model
+                    ],
+                    ["entry_time", "exit_time"],
+                    batch_size=1000,
+                )
+
+        self.stats["created"] += len(to_create)
+        self.stats["updated"] += len(to_update)
+        self.stats["batches"] += 1
+        logger.info(
+            "Lote de marcaciones importado: %s nuevas, %s actualizadas",
+            len(to_create),
+            len(to_update),
+            extra={"action": "import_punches"},
+        )
+
+    def finalize(self):
+        """
+        Escribe el último lote y actualiza los datos derivados (resumen diario,
+        fragmentos del dashboard, reportes de periodos cerrados, versión de los
+        usuarios afectados, caché de estado y eventos en vivo de los usuarios
+        con jornadas de hoy)
+        """
+        from app.services.dashboard_service import DashboardService
+        from app.services.report_service import ReportService
+        from app.services.summary_service import SummaryService
+
+        self.flush()
+        for work_date in sorted(self.affected_dates):
+            SummaryService.rebuild(work_date)
+        ReportService.invalidate_dates(self.affected_dates)
+        DashboardService.invalidate_dates(self.affected_dates)
+        for user_id in self.affected_today_users:
+            AttendanceService.invalidate_today_snapshot(user_id)
+            AttendanceService.notify_change(user_id)
+        # Jornadas de días anteriores: cambia el historial (ETag) del usuario
+        for user_id in self.affected_users - self.affected_today_users:
+            AttendanceService.bump_user_version(user_id)
+
+    def import_file(self, file_obj, delimiter=","):
+        """
+        Importa un archivo CSV abierto en modo texto
+        Returns: dict con estadísticas de la importación
+        """
+        started = perf_counter()
+        reader = csv.reader(file_obj, delimiter=delimiter)
+
+        header = [column.strip().lower() for column in next(reader, [])]
+        if "timestamp" not in header:
+            raise PunchImportError("El archivo debe tener una columna 'timestamp'")
+        if "email" in header:
+            user_field = "email"
+        elif "user_id" in header:
+            user_field = "user_id"
+        else:
+            raise PunchImportError(
+                "El archivo debe tener una columna 'email' o 'user_id'"
+            )
+
+        user_index = header.index(user_field)
+        timestamp_index = header.index("timestamp")
+        type_index = header.index("type") if "type" in header else None
+        self.load_users(user_field)
+
+        for row in reader:
+            if not row:
+                continue
+            self.stats["rows"] += 1
+            try:
+                user_key = row[user_index].strip().lower()
+                timestamp, work_date = self.parse_timestamp(row[timestamp_index])
+                punch_type = (
+                    row[type_index].strip().lower() if type_index is not None else ""
+                )
+            except (IndexError, ValueError):
+                self.stats["invalid"] += 1
+                continue
+
+            user_id = self.user_ids.get(user_key)
+            if user_id is None:
+                self.stats["unknown_users"] += 1
+                continue
+
+            self.add_punch(user_id, timestamp, work_date, punch_type)
+
+        self.finalize()
+
+        elapsed = perf_counter() - started
+        self.stats["seconds"] = round(elapsed, 3)
+        self.stats["rows_per_second"] = round(self.stats["rows"] / max(elapsed, 1e-9))
+        return self.stats
@@ -0,0 +1,149 @@
+"""
+Zona horaria local y formato en español compartidos por los servicios.
+
+La zona se resuelve una sola vez por nombre (zoneinfo) y los nombres de días
+y meses están precalculados, así el formato de cada fila del historial no
+llama a strftime ni construye diccionarios.
+"""
+
+from datetime import datetime, time, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+UTC = dt_timezone.utc
+
+# Índice: date.weekday() (0 = lunes)
+DAY_NAMES = ("Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo")
+
+# Índice: mes - 1
+MONTH_NAMES = (
+    "enero",
+    "febrero",
+    "marzo",
+    "abril",
+    "mayo",
+    "junio",
+    "julio",
+    "agosto",
+    "septiembre",
+    "octubre",
+    "noviembre",
+    "diciembre",
+)
+
+# Último segundo del día local (el rango de un día es inclusivo)
+END_OF_DAY = time(23, 59, 59)
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    return ZoneInfo(name)
+
+
+def get_local_timezone():
+    """
+    Zona horaria de settings.TIME_ZONE (se busca por nombre para respetar
+    override_settings en las pruebas)
+    """
+    return get_zone(settings.TIME_ZONE)
+
+
+def local_now():
+    """
+    Fecha y hora actual en la zona local
+    """
+    return timezone.now().astimezone(get_local_timezone())
+
+
+def to_local(value, zone=None):
+    """
+    Convierte una fecha/hora a la zona local; las fechas sin zona se asumen UTC
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.astimezone(zone or get_local_timezone())
+
+
+def local_to_utc(local_date, local_time, zone=None):
+    """
+    Instante UTC de una fecha y hora locales
+    """
+    return datetime.combine(
+        local_date, local_time, tzinfo=zone or get_local_timezone()
+    ).astimezone(UTC)
+
+
+def local_day_range(local_date, zone=None):
+    """
+    Rango UTC (inicio, fin) que corresponde a un día local
+    """
+    zone = zone or get_local_timezone()
+    return (
+        local_to_utc(local_date, time.min, zone),
+        local_to_utc(local_date, END_OF_DAY, zone),
+    )
+
+
+def format_time(value):
+    """
+    Formato "%I:%M %p" (por ejemplo "07:05 AM") de una hora ya en zona local
+    """
+    hour = value.hour
+    return f"{hour % 12 or 12:02d}:{value.minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def format_local_time(value):
+    """
+    Convierte a zona local y formatea como "%I:%M %p"
+    """
+    if value is None:
+        return None
+    return format_time(to_local(value))
+
+
+def serialize_history_rows(rows, local_today=None, now=None):
+    """
+    Serializa filas (entry_time, exit_time) en UTC al formato del historial
+    La zona, la fecha local actual y la hora actual se obtienen una sola vez
+    para todas las filas
+    """
+    zone = get_local_timezone()
+    now = now or timezone.now()
+    local_today = local_today or now.astimezone(zone).date()
+
+    history = []
+    append = history.append
+    for entry_time, exit_time in rows:
+        entry_local = entry_time.astimezone(zone)
+        entry_date = entry_local.date()
+
+        if exit_time is not None:
+            hours_worked = (exit_time - entry_time).total_seconds() / 3600
+            exit_display = format_time(exit_time.astimezone(zone))
+            status = "completed"
+        elif entry_date == local_today:
+            # Jornada del día en curso: horas hasta ahora
+            hours_worked = (now - entry_time).total_seconds() / 3600
+            exit_display = None
+            status = "in_progress"
+        else:
+            hours_worked = 0
+            exit_display = None
+            status = "incomplete"
+
+        append(
+            {
+                "date": entry_date.isoformat(),
+                "day_name": DAY_NAMES[entry_date.weekday()],
+                "day_number": entry_date.day,
+                "month_name": MONTH_NAMES[entry_date.month - 1],
+                "entry_time": format_time(entry_local),
+                "exit_time": exit_display,
+                "hours_worked": round(hours_worked, 2),
+                "status": status,
+            }
+        )
+    return history
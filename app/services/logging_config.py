@@ -0,0 +1,72 @@
+import itertools
+import logging
+
+# Campos estructurados que los servicios agregan con `extra=` y que el
+# formateador agrega al final de cada línea como clave=valor
+STRUCTURED_FIELDS = ("user_id", "action", "status", "success", "duration_ms")
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar solo una fracción de los registros de log de rutas muy
+    frecuentes (por ejemplo, el sondeo de estado cada 30 segundos).
+    Los registros WARNING o superiores siempre pasan.
+    """
+
+    def __init__(self, sample_rate=1.0, name=""):
+        super().__init__(name)
+        sample_rate = float(sample_rate)
+        # Se usa un contador (1 de cada N) en lugar de azar para que el
+        # muestreo sea barato y predecible
+        self.every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self.counter = itertools.count()
+
+    def sample(self, levelno=logging.INFO):
+        """
+        Decide si un registro de este nivel debe emitirse
+        """
+        if levelno >= logging.WARNING:
+            return True
+        if not self.every:
+            return False
+        return next(self.counter) % self.every == 0
+
+    def filter(self, record):
+        # Los registros ya muestreados con should_log() no se vuelven a muestrear
+        if getattr(record, "sampled", False):
+            return True
+        return self.sample(record.levelno)
+
+
+def should_log(logger, level=logging.INFO):
+    """
+    Evalúa el nivel y el muestreo del logger ANTES de crear el LogRecord, que
+    es la parte costosa (incluye inspeccionar la pila para obtener el origen).
+    Los registros emitidos después de esta verificación deben incluir
+    extra={"sampled": True} para que SamplingFilter no los vuelva a muestrear.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    for log_filter in logger.filters:
+        if isinstance(log_filter, SamplingFilter):
+            return log_filter.sample(level)
+    return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formateador que agrega los campos estructurados presentes en el registro
+    como pares clave=valor, por ejemplo:
+    INFO app.services.attendance_service Acción procesada action=entry user_id=3 duration_ms=4.2
+    """
+
+    def format(self, record):
+        message = super().format(record)
+        fields = [
+            f"{field}={getattr(record, field)}"
+            for field in STRUCTURED_FIELDS
+            if hasattr(record, field)
+        ]
+        if fields:
+            message = f"{message} {' '.join(fields)}"
+        return message
@@ -45,16 +45,19 @@ class LoginService:
             validation_result = LoginService.validate_user(email, password)
             if validation_result["success"]:
                 user = validation_result["user"]
+                # La sesión guarda solo lo que necesita get_current_user; la
+                # presencia de user_id indica que el usuario está autenticado
                 request.session["user_id"] = user.id
                 request.session["user_name"] = user.name
                 request.session["user_email"] = user.email
-                request.session["is_logged_in"] = True
                 if user.email.endswith("@admin.com"):
                     return redirect("dashboard")
                 else:
                     return redirect("control_asistencia")
             else:
-                return JsonResponse({"success": False, "message": validation_result["message"]})
+                return JsonResponse(
+                    {"success": False, "message": validation_result["message"]}
+                )
         return JsonResponse({"success": False, "message": "Método no permitido"})
 
     @staticmethod
@@ -63,7 +66,25 @@ class LoginService:
         Verifica si el usuario está autenticado
         Returns: bool
         """
-        return request.session.get("is_logged_in", False)
+        return request.session.get("user_id") is not None
+
+    @staticmethod
+    def is_admin_user(request):
+        """
+        Verifica si el usuario actual es administrador (correo @admin.com)
+        Returns: bool
+        """
+        return LoginService.is_user_authenticated(
+            request
+        ) and LoginService.is_admin_email(request.session.get("user_email"))
+
+    @staticmethod
+    def is_admin_email(email):
+        """
+        Los administradores se identifican por el dominio del correo
+        Returns: bool
+        """
+        return (email or "").endswith("@admin.com")
 
     @staticmethod
     def get_current_user(request):
@@ -79,6 +100,21 @@ class LoginService:
             }
         return {}
 
+    @staticmethod
+    async def aget_current_user(request):
+        """
+        Versión asíncrona de get_current_user para vistas async
+        Returns: dict con información del usuario o vacío
+        """
+        user_id = await request.session.aget("user_id")
+        if user_id is None:
+            return {}
+        return {
+            "id": user_id,
+            "name": await request.session.aget("user_name"),
+            "email": await request.session.aget("user_email"),
+        }
+
     @staticmethod
     def logout_user(request):
         """
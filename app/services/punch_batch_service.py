@@ -0,0 +1,323 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from time import perf_counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from app.models import Attendance, PunchReceipt
+from app.services import localization
+from app.services.attendance_service import AttendanceService
+from app.services.schedule_service import ScheduleService
+
+logger = logging.getLogger(__name__)
+
+
+class PunchBatchService:
+    """
+    Marcaciones enviadas por lotes desde kioscos con conexión intermitente
+
+    El kiosco guarda las marcaciones mientras no tiene conexión y las envía
+    juntas, cada una con la hora de su reloj y una clave de idempotencia.
+    El lote se aplica en una sola transacción y con consultas por conjunto:
+    una lectura de los comprobantes ya registrados, una de las jornadas de
+    los días afectados, las escrituras en bloque y un UPDATE del resumen por
+    día. Cada marcación recibe su propio resultado; un reenvío del mismo lote
+    devuelve los resultados guardados sin volver a aplicarlas.
+    """
+
+    MAX_BATCH_SIZE = 200
+    ACTIONS = ("entry", "exit")
+
+    @staticmethod
+    def get_window(now=None):
+        """
+        Rango (desde, hasta) en UTC de las horas de marcación aceptadas
+        """
+        now = now or timezone.now()
+        return (
+            now - timedelta(hours=settings.ATTENDANCE_OFFLINE_MAX_HOURS),
+            now + timedelta(seconds=settings.ATTENDANCE_CLOCK_SKEW_SECONDS),
+        )
+
+    @staticmethod
+    def build_error(key, message):
+        return {
+            "key": key,
+            "success": False,
+            "message": message,
+            "notification_type": "error",
+        }
+
+    @staticmethod
+    def parse_punch(item):
+        """
+        Valida el formato de una marcación del lote
+        Returns: (clave, acción, hora UTC). Lanza ValueError con el mensaje
+        para el kiosco
+        """
+        if not isinstance(item, dict):
+            raise ValueError("Marcación no válida")
+        key = item.get("key")
+        if not isinstance(key, str) or not 0 < len(key) <= 64:
+            raise ValueError("Falta la clave de la marcación")
+        action = item.get("action")
+        if action not in PunchBatchService.ACTIONS:
+            raise ValueError("Acción no válida")
+        try:
+            punched_at = datetime.fromisoformat(str(item.get("timestamp")))
+        except ValueError:
+            raise ValueError("Hora de marcación no válida")
+        if punched_at.tzinfo is None:
+            punched_at = punched_at.replace(tzinfo=localization.get_local_timezone())
+        return key, action, punched_at.astimezone(localization.UTC)
+
+    @staticmethod
+    def apply_punch(shifts, user_id, action, punched_at, window):
+        """
+        Aplica una marcación sobre las jornadas en memoria (fecha local ->
+        Attendance) con las mismas reglas que register_entry/register_exit
+        Returns: resultado de la marcación
+        """
+        if not window[0] <= punched_at <= window[1]:
+            return PunchBatchService.build_error(
+                None, "La hora de la marcación está fuera del rango permitido"
+            )
+
+        local_time = localization.to_local(punched_at)
+        work_date = local_time.date()
+        attendance = shifts.get(work_date)
+
+        if action == "entry":
+            if attendance is not None and attendance.exit_time is None:
+                return PunchBatchService.build_error(
+                    None, "Ya tienes una jornada activa. Marca tu salida primero."
+                )
+            if attendance is not None:
+                return PunchBatchService.build_error(
+                    None, "Ya has completado tu jornada para ese día"
+                )
+            attendance = shifts[work_date] = Attendance(
+                user_id=user_id, work_date=work_date, entry_time=punched_at
+            )
+            time_str = AttendanceService.format_time_local(punched_at)
+            message = f"Entrada registrada a las {time_str}"
+        else:
+            if attendance is None:
+                return PunchBatchService.build_error(
+                    None, "Primero debes registrar tu entrada"
+                )
+            if attendance.exit_time is not None:
+                return PunchBatchService.build_error(
+                    None, "Ya has registrado tu salida para ese día"
+                )
+            if punched_at <= attendance.entry_time:
+                return PunchBatchService.build_error(
+                    None, "La salida no puede ser anterior a la entrada"
+                )
+            attendance.exit_time = punched_at
+            time_str = AttendanceService.format_time_local(punched_at)
+            message = f"Salida registrada a las {time_str}"
+
+        result = {
+            "success": True,
+            "message": message,
+            "date": work_date.isoformat(),
+            "notification_type": "success",
+        }
+        is_outside, schedule_info = ScheduleService.is_outside_schedule(
+            action, punched_at, user_id
+        )
+        if is_outside:
+            result["outside_schedule"] = True
+            result["schedule_message"] = (
+                f"⚠️ Registro fuera de horario. {schedule_info}"
+            )
+            result["notification_type"] = "warning"
+        return result
+
+    @staticmethod
+    def apply_batch(user_id, punches, now=None):
+        """
+        Aplica en una transacción las marcaciones ya validadas (clave ->
+        (acción, hora UTC)) que no tienen comprobante
+        Returns: (resultados por clave, jornadas modificadas por fecha local)
+        """
+        from app.services.summary_service import SummaryService
+
+        window = PunchBatchService.get_window(now)
+        with transaction.atomic():
+            receipts = {
+                receipt.key: receipt.result
+                for receipt in PunchReceipt.objects.filter(
+                    user_id=user_id, key__in=list(punches)
+                ).only("key", "result")
+            }
+            for result in receipts.values():
+                result["replayed"] = True
+            pending = sorted(
+                (
+                    (punched_at, key, action)
+                    for key, (action, punched_at) in punches.items()
+                    if key not in receipts
+                ),
+            )
+            if not pending:
+                return receipts, {}
+
+            work_dates = {
+                localization.to_local(punched_at).date() for punched_at, _, _ in pending
+            }
+            # Bloquea las jornadas del usuario en esos días: una marcación en
+            # línea simultánea espera a que se confirme el lote
+            shifts = {
+                attendance.work_date: attendance
+                for attendance in Attendance.objects.select_for_update()
+                .filter(user_id=user_id, work_date__in=work_dates)
+                .only("id", "user_id", "work_date", "entry_time", "exit_time")
+            }
+            existing_exits = {
+                work_date: attendance.exit_time
+                for work_date, attendance in shifts.items()
+            }
+
+            results = {}
+            for punched_at, key, action in pending:
+                result = PunchBatchService.apply_punch(
+                    shifts, user_id, action, punched_at, window
+                )
+                result["key"] = key
+                results[key] = (action, punched_at, result)
+
+            to_create = [
+                attendance for attendance in shifts.values() if attendance.pk is None
+            ]
+            to_update = [
+                attendance
+                for work_date, attendance in shifts.items()
+                if attendance.pk is not None
+                and attendance.exit_time != existing_exits[work_date]
+            ]
+            Attendance.objects.bulk_create(to_create)
+            Attendance.objects.bulk_update(to_update, ["exit_time"])
+
+            # Incrementos del resumen diario agrupados por fecha
+            increments = defaultdict(lambda: defaultdict(float))
+            late_flags = ScheduleService.classify_late(
+                (user_id, attendance.entry_time) for attendance in to_create
+            )
+            for attendance, is_late in zip(to_create, late_flags):
+                changes = increments[attendance.work_date]
+                changes["total"] += 1
+                changes["open_shifts"] += 1
+                changes["late_arrivals" if is_late else "on_time"] += 1
+            for attendance in to_create + to_update:
+                if attendance.exit_time is not None:
+                    changes = increments[attendance.work_date]
+                    changes["open_shifts"] -= 1
+                    changes["total_hours"] += (
+                        attendance.exit_time - attendance.entry_time
+                    ).total_seconds() / 3600
+            for work_date, changes in sorted(increments.items()):
+                SummaryService.apply_changes(
+                    work_date,
+                    **{
+                        field: value if field == "total_hours" else int(value)
+                        for field, value in changes.items()
+                    },
+                )
+
+            # Ids de las jornadas (bulk_create los asigna en PostgreSQL/SQLite;
+            # en MySQL se leen de nuevo)
+            if any(attendance.pk is None for attendance in to_create):
+                created_ids = dict(
+                    Attendance.objects.filter(
+                        user_id=user_id,
+                        work_date__in=[
+                            attendance.work_date for attendance in to_create
+                        ],
+                    ).values_list("work_date", "id")
+                )
+                for attendance in to_create:
+                    attendance.pk = created_ids[attendance.work_date]
+            for _, _, result in results.values():
+                if result["success"]:
+                    work_date = date.fromisoformat(result["date"])
+                    result["attendance_id"] = shifts[work_date].pk
+
+            PunchReceipt.objects.bulk_create(
+                PunchReceipt(
+                    user_id=user_id,
+                    key=key,
+                    action=action,
+                    punched_at=punched_at,
+                    result=result,
+                )
+                for key, (action, punched_at, result) in results.items()
+            )
+            PunchReceipt.objects.filter(
+                user_id=user_id, created_at__lt=window[0] - timedelta(days=1)
+            ).delete()
+
+        results = {key: result for key, (_, _, result) in results.items()}
+        changed = {work_date: shifts[work_date] for work_date in increments}
+        return {**receipts, **results}, changed
+
+    @staticmethod
+    def process_batch(user_id, items):
+        """
+        Procesa un lote de marcaciones de un usuario
+        Returns: lista de resultados en el orden del lote (clave, success,
+        message y, si se aplicó, date y attendance_id; replayed si la clave
+        ya se había procesado)
+        """
+        from app.services.report_service import ReportService
+
+        started = perf_counter()
+        parsed = []
+        punches = {}
+        for item in items:
+            try:
+                key, action, punched_at = PunchBatchService.parse_punch(item)
+            except ValueError as e:
+                key = item.get("key") if isinstance(item, dict) else None
+                parsed.append(PunchBatchService.build_error(key, str(e)))
+                continue
+            # Una clave repetida dentro del lote es la misma marcación
+            punches.setdefault(key, (action, punched_at))
+            parsed.append(key)
+
+        if punches:
+            # Un lote concurrente del mismo usuario (o una marcación en línea)
+            # puede crear la jornada o el comprobante primero: se reintenta
+            # una vez con los datos ya confirmados
+            try:
+                results, changed = PunchBatchService.apply_batch(user_id, punches)
+            except IntegrityError:
+                results, changed = PunchBatchService.apply_batch(user_id, punches)
+        else:
+            results, changed = {}, {}
+
+        if changed:
+            ReportService.invalidate_dates(changed)
+            today_shift = changed.get(AttendanceService.get_local_time().date())
+            if today_shift is not None:
+                # Mismo camino que una marcación en línea: estado del día en
+                # caché y aviso a los clientes conectados
+                AttendanceService.set_today_snapshot(user_id, today_shift)
+                AttendanceService.notify_change(user_id)
+            else:
+                AttendanceService.bump_user_version(user_id)
+
+        logger.info(
+            "Lote de marcaciones procesado: %s recibidas, %s días modificados",
+            len(items),
+            len(changed),
+            extra={
+                "user_id": user_id,
+                "action": "punch_batch",
+                "duration_ms": round((perf_counter() - started) * 1000, 3),
+            },
+        )
+        return [item if isinstance(item, dict) else results[item] for item in parsed]
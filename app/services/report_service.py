@@ -0,0 +1,276 @@
+from contextlib import nullcontext
+from datetime import date, timedelta
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import (
+    Case,
+    Count,
+    DateField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.signals import post_delete, post_save
+from app.models import ArchivedAttendance, Attendance
+from app.routers import primary_reads
+from app.services import caching, localization
+from app.services.schedule_service import ScheduleService
+
+
+class ReportService:
+    """
+    Reportes semanales y mensuales de asistencia: totales por día y por
+    empleado (horas, puntualidad y jornadas incompletas) calculados con dos
+    consultas agrupadas sobre el rango del periodo.
+
+    Un periodo cerrado (terminó antes de hoy) ya no cambia, así que su reporte
+    se guarda en caché sin vencimiento (acotado con caching.persistent_timeout
+    si la caché es del proceso); solo el periodo en curso se recalcula en cada
+    visita. La clave incluye la versión de las reglas de horario, y las
+    correcciones de jornadas pasadas (importación, admin) borran los periodos
+    afectados con invalidate_dates
+    """
+
+    PERIODS = ("week", "month")
+    # reports_view acepta fechas desde EARLIEST_DATE hasta hoy; fuera de ese
+    # rango muestra el periodo actual
+    EARLIEST_DATE = date(1970, 1, 1)
+    DAY_FIELDS = ("total", "late_arrivals", "incomplete", "time_worked")
+
+    @staticmethod
+    def get_period_range(period, local_date):
+        """
+        Fechas locales (inicio, fin) de la semana (lunes a domingo) o del mes
+        que contiene `local_date`
+        """
+        if period == "week":
+            start = local_date - timedelta(days=local_date.weekday())
+            return start, start + timedelta(days=6)
+        start = local_date.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month - timedelta(days=1)
+
+    @staticmethod
+    def get_adjacent_period(period, local_date, step):
+        """
+        Fecha de inicio del periodo anterior (step=-1) o siguiente (step=1)
+        """
+        start, end = ReportService.get_period_range(period, local_date)
+        if step < 0:
+            return ReportService.get_period_range(period, start - timedelta(days=1))[0]
+        return end + timedelta(days=1)
+
+    @staticmethod
+    def get_cache_key(period, start):
+        version = ScheduleService.get_schedule().version
+        return f"report:{period}:{start.isoformat()}:{version}"
+
+    @staticmethod
+    def get_report(period, local_date):
+        """
+        Reporte del periodo que contiene `local_date`; los periodos cerrados
+        se leen de la caché
+        """
+        start, end = ReportService.get_period_range(period, local_date)
+        closed = end < localization.local_now().date()
+        if closed:
+            key = ReportService.get_cache_key(period, start)
+            report = cache.get(key)
+            if report is not None:
+                return report
+
+        # Un reporte cerrado se guarda en caché: se calcula en el primario para
+        # no guardar datos atrasados de la réplica
+        with primary_reads() if closed else nullcontext():
+            report = ReportService.build_report(period, start, end)
+        report["closed"] = closed
+        if closed:
+            cache.set(key, report, caching.persistent_timeout())
+        return report
+
+    @staticmethod
+    def aggregate(model, days, today_start):
+        """
+        Dos consultas agrupadas sobre `model` para los días locales `days`:
+        por día (CASE con el rango UTC de cada día, sin conversiones de zona en
+        la base de datos) y por empleado. La llegada tarde usa el umbral de las
+        reglas de horario de cada día
+        """
+        day_ranges = [(day, localization.local_day_range(day)) for day in days]
+        late = reduce(
+            or_,
+            (
+                Q(entry_time__range=day_range)
+                & ScheduleService.late_arrival_filter(day)
+                for day, day_range in day_ranges
+            ),
+        )
+        metrics = {
+            "total": Count("id"),
+            "late_arrivals": Count("id", filter=late),
+            # Sin salida y de un día anterior a hoy (la de hoy sigue en curso)
+            "incomplete": Count(
+                "id", filter=Q(exit_time__isnull=True, entry_time__lt=today_start)
+            ),
+            "time_worked": Sum(
+                ExpressionWrapper(
+                    F("exit_time") - F("entry_time"), output_field=DurationField()
+                ),
+                filter=Q(exit_time__isnull=False),
+            ),
+        }
+        rows = model.objects.filter(
+            entry_time__range=(day_ranges[0][1][0], day_ranges[-1][1][1])
+        )
+
+        per_day = (
+            rows.annotate(
+                day=Case(
+                    *(
+                        When(entry_time__range=day_range, then=Value(day))
+                        for day, day_range in day_ranges
+                    ),
+                    output_field=DateField(),
+                )
+            )
+            .values("day")
+            .annotate(employees=Count("user_id", distinct=True), **metrics)
+            .order_by()
+        )
+        per_employee = (
+            rows.values("user_id", "user__name").annotate(**metrics).order_by()
+        )
+        return list(per_day), list(per_employee)
+
+    @staticmethod
+    def merge_rows(rows, key):
+        """
+        Suma las filas de ambas tablas (activa y archivo) con la misma clave
+        """
+        merged = {}
+        for row in rows:
+            current = merged.get(row[key])
+            if current is None:
+                merged[row[key]] = dict(row)
+                continue
+            for field in ReportService.DAY_FIELDS + ("employees",):
+                # time_worked es None si ninguna jornada tiene salida
+                if row.get(field) is None:
+                    continue
+                if current[field] is None:
+                    current[field] = row[field]
+                else:
+                    current[field] += row[field]
+        return merged
+
+    @staticmethod
+    def finalize_row(row):
+        time_worked = row.pop("time_worked") or timedelta(0)
+        row["total_hours"] = round(time_worked.total_seconds() / 3600, 2)
+        row["on_time"] = row["total"] - row["late_arrivals"]
+        row["on_time_rate"] = round(row["on_time"] / max(row["total"], 1) * 100, 1)
+        return row
+
+    @staticmethod
+    def build_report(period, start, end):
+        """
+        Calcula el reporte de un periodo (fechas locales inclusivas)
+        Returns: dict con period, start, end, days, employees y totals
+        """
+        from app.services.archive_service import ArchiveService
+
+        days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+        today_start = localization.local_day_range(localization.local_now().date())[0]
+        per_day, per_employee = ReportService.aggregate(Attendance, days, today_start)
+        if ArchiveService.reaches_archive(localization.local_day_range(start)[0]):
+            archived_days, archived_employees = ReportService.aggregate(
+                ArchivedAttendance, days, today_start
+            )
+            per_day += archived_days
+            per_employee += archived_employees
+
+        by_day = ReportService.merge_rows(per_day, "day")
+        empty_day = {field: 0 for field in ReportService.DAY_FIELDS}
+        day_rows = [
+            ReportService.finalize_row(
+                {**empty_day, "employees": 0, **by_day.get(day, {}), "day": day}
+            )
+            for day in days
+        ]
+        employee_rows = sorted(
+            (
+                ReportService.finalize_row(
+                    {
+                        "user_id": row["user_id"],
+                        "name": row["user__name"],
+                        "days": row["total"],
+                        **{field: row[field] for field in ReportService.DAY_FIELDS},
+                    }
+                )
+                for row in ReportService.merge_rows(per_employee, "user_id").values()
+            ),
+            key=lambda row: (row["name"], row["user_id"]),
+        )
+
+        totals = {
+            field: sum(row[field] for row in day_rows)
+            for field in ("total", "on_time", "late_arrivals", "incomplete")
+        }
+        totals["total_hours"] = round(sum(row["total_hours"] for row in day_rows), 2)
+        totals["on_time_rate"] = round(
+            totals["on_time"] / max(totals["total"], 1) * 100, 1
+        )
+        totals["employees"] = len(employee_rows)
+        return {
+            "period": period,
+            "start": start,
+            "end": end,
+            "days": day_rows,
+            "employees": employee_rows,
+            "totals": totals,
+        }
+
+    @staticmethod
+    def invalidate_dates(dates):
+        """
+        Descarta los reportes en caché de las semanas y meses que contienen
+        las fechas locales indicadas (solo los cerrados están en caché)
+        """
+        today = localization.local_now().date()
+        keys = set()
+        for local_date in dates:
+            for period in ReportService.PERIODS:
+                start, end = ReportService.get_period_range(period, local_date)
+                if end < today:
+                    keys.add(ReportService.get_cache_key(period, start))
+        if keys:
+            cache.delete_many(keys)
+
+    @staticmethod
+    def on_attendance_changed(sender, instance, **kwargs):
+        # Correcciones desde el admin u otros save(); las marcaciones del día
+        # caen en periodos abiertos y no tocan la caché
+        if caching.in_batch_invalidation():
+            return
+        ReportService.invalidate_dates(
+            [localization.to_local(instance.entry_time).date()]
+        )
+
+    @staticmethod
+    def connect_signals():
+        post_save.connect(
+            ReportService.on_attendance_changed,
+            sender=Attendance,
+            dispatch_uid="report_attendance_saved",
+        )
+        post_delete.connect(
+            ReportService.on_attendance_changed,
+            sender=Attendance,
+            dispatch_uid="report_attendance_deleted",
+        )
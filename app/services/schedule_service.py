@@ -0,0 +1,304 @@
+"""
+Reglas de horario compiladas.
+
+Los turnos (Shift) y sus reglas por departamento y día de la semana
+(ScheduleRule) se compilan en un diccionario {(departamento, día): ventana}
+con la precedencia ya resuelta y los límites en segundos del día local. Así
+la validación de una marcación es una búsqueda en el diccionario y el
+dashboard clasifica miles de entradas sin consultas por fila.
+
+La compilación se guarda en memoria del proceso. Guardar o borrar un turno,
+una regla o un departamento (o cambiar el departamento de un usuario
+afectado) descarta la compilación del proceso actual y cambia una versión en
+la caché compartida, que los demás procesos revisan cada
+VERSION_CHECK_INTERVAL segundos. Si la caché no es compartida entre procesos
+(LocMem) los demás recompilan al vencer SCHEDULE_MAX_AGE.
+"""
+
+from collections import defaultdict, namedtuple
+from time import monotonic
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+
+from app.models import Department, ScheduleRule, Shift, User
+from app.services import localization
+
+# Ventana de un turno: horas locales (para mensajes y consultas) y límites
+# precalculados en segundos desde la medianoche local
+ScheduleWindow = namedtuple(
+    "ScheduleWindow",
+    [
+        "entry_time",
+        "exit_time",
+        "late_after",
+        "entry_start",
+        "entry_end",
+        "exit_start",
+        "exit_end",
+        "late_after_seconds",
+    ],
+)
+
+
+def seconds_of_day(value):
+    # Con los microsegundos: las consultas comparan la hora completa
+    # (late_arrival_filter) y ambas clasificaciones deben coincidir en el límite
+    return (
+        value.hour * 3600
+        + value.minute * 60
+        + value.second
+        + value.microsecond / 1_000_000
+    )
+
+
+class CompiledSchedule:
+    """
+    Reglas de horario resueltas para todos los departamentos con reglas
+    propias y para el resto (departamento None), los siete días
+    """
+
+    def __init__(self, windows, user_departments, version):
+        self.windows = windows
+        # Solo usuarios de departamentos con reglas propias
+        self.user_departments = user_departments
+        self.rule_departments = frozenset(
+            department for department, _ in windows if department
+        )
+        self.version = version
+        self.compiled_at = self.checked_at = monotonic()
+
+    def window_for(self, user_id, weekday):
+        window = self.windows.get((self.user_departments.get(user_id), weekday))
+        return window or self.windows[(None, weekday)]
+
+
+class ScheduleService:
+    """
+    Horario aplicable a cada usuario y día, a partir de las reglas compiladas
+    """
+
+    VERSION_CACHE_KEY = "schedule:version"
+    # Segundos máximos que un proceso usa una compilación sin recompilar
+    SCHEDULE_MAX_AGE = 60
+    # Segundos entre lecturas de la versión en la caché compartida
+    VERSION_CHECK_INTERVAL = 5
+    # Margen antes de la entrada y después de la salida que no genera aviso
+    EARLY_ENTRY_SECONDS = 60 * 60
+    LATE_EXIT_SECONDS = 2 * 60 * 60
+
+    _compiled = None
+
+    @staticmethod
+    def compile_window(shift):
+        entry = seconds_of_day(shift.entry_time)
+        exit_ = seconds_of_day(shift.exit_time)
+        tolerance = shift.tolerance_minutes * 60
+        return ScheduleWindow(
+            entry_time=shift.entry_time,
+            exit_time=shift.exit_time,
+            late_after=shift.late_after,
+            entry_start=max(0, entry - ScheduleService.EARLY_ENTRY_SECONDS),
+            entry_end=entry + tolerance,
+            exit_start=max(0, exit_ - tolerance),
+            exit_end=exit_ + ScheduleService.LATE_EXIT_SECONDS,
+            late_after_seconds=seconds_of_day(shift.late_after),
+        )
+
+    @staticmethod
+    def compile(version):
+        """
+        Lee las reglas y resuelve la precedencia para cada (departamento, día):
+        departamento y día > departamento > día > regla general > turno
+        estándar (valores por defecto de Shift)
+        """
+        rules = {
+            (rule.department_id, rule.weekday): ScheduleService.compile_window(
+                rule.shift
+            )
+            for rule in ScheduleRule.objects.select_related("shift")
+        }
+        default = ScheduleService.compile_window(Shift())
+        departments = {department for department, _ in rules if department}
+
+        windows = {}
+        for department in (None, *departments):
+            for weekday in range(7):
+                windows[(department, weekday)] = (
+                    rules.get((department, weekday))
+                    or rules.get((department, None))
+                    or rules.get((None, weekday))
+                    or rules.get((None, None))
+                    or default
+                )
+
+        user_departments = {}
+        if departments:
+            user_departments = dict(
+                User.objects.filter(department_id__in=departments).values_list(
+                    "id", "department_id"
+                )
+            )
+        return CompiledSchedule(windows, user_departments, version)
+
+    @staticmethod
+    def get_schedule():
+        """
+        Compilación vigente; recompila si cambió la versión o venció
+        """
+        compiled = ScheduleService._compiled
+        now = monotonic()
+        if (
+            compiled is not None
+            and now - compiled.checked_at < ScheduleService.VERSION_CHECK_INTERVAL
+        ):
+            return compiled
+
+        version = cache.get(ScheduleService.VERSION_CACHE_KEY)
+        if version is None:
+            # Caché vaciada o primer uso: se publica la versión de este proceso
+            cache.add(
+                ScheduleService.VERSION_CACHE_KEY,
+                compiled.version if compiled else uuid4().hex,
+                None,
+            )
+            version = cache.get(ScheduleService.VERSION_CACHE_KEY)
+
+        if (
+            compiled is None
+            or compiled.version != version
+            or now - compiled.compiled_at > ScheduleService.SCHEDULE_MAX_AGE
+        ):
+            compiled = ScheduleService.compile(version)
+            ScheduleService._compiled = compiled
+        compiled.checked_at = now
+        return compiled
+
+    @staticmethod
+    def invalidate():
+        ScheduleService._compiled = None
+        cache.set(ScheduleService.VERSION_CACHE_KEY, uuid4().hex, None)
+
+    @staticmethod
+    def window_for(user_id, local_date):
+        return ScheduleService.get_schedule().window_for(user_id, local_date.weekday())
+
+    @staticmethod
+    def is_outside_schedule(entry_type, current_time, user_id=None):
+        """
+        Verifica si una marcación (UTC) está fuera de la ventana del turno
+        del usuario para ese día
+        Returns: (fuera_de_horario, mensaje)
+        """
+        local_time = localization.to_local(current_time)
+        window = ScheduleService.window_for(user_id, local_time)
+        seconds = seconds_of_day(local_time)
+
+        if entry_type == "entry":
+            if seconds < window.entry_start or seconds > window.entry_end:
+                return (
+                    True,
+                    f"Horario estándar de entrada: {localization.format_time(window.entry_time)}",
+                )
+        elif entry_type == "exit":
+            if seconds < window.exit_start or seconds > window.exit_end:
+                return (
+                    True,
+                    f"Horario estándar de salida: {localization.format_time(window.exit_time)}",
+                )
+
+        return False, ""
+
+    @staticmethod
+    def is_late(user_id, entry_time):
+        """
+        Indica si una hora de entrada (UTC) es llegada tarde para el usuario
+        """
+        return ScheduleService.classify_late([(user_id, entry_time)])[0]
+
+    @staticmethod
+    def classify_late(entries):
+        """
+        Clasificación en bloque: recibe pares (user_id, entry_time UTC) y
+        devuelve una lista de booleanos (llegada tarde) en el mismo orden.
+        Usa una sola compilación para todas las filas
+        """
+        schedule = ScheduleService.get_schedule()
+        zone = localization.get_local_timezone()
+        results = []
+        for user_id, entry_time in entries:
+            local_time = entry_time.astimezone(zone)
+            window = schedule.window_for(user_id, local_time.weekday())
+            results.append(seconds_of_day(local_time) > window.late_after_seconds)
+        return results
+
+    @staticmethod
+    def late_arrival_filter(local_date):
+        """
+        Condición de llegada tarde para consultas de Attendance de un día
+        local. Los umbrales se convierten a instantes UTC; si todos los
+        departamentos comparten el umbral no hace falta unir con User
+        """
+        schedule = ScheduleService.get_schedule()
+        weekday = local_date.weekday()
+        general = schedule.windows[(None, weekday)].late_after
+
+        thresholds = defaultdict(list)
+        for department in schedule.rule_departments:
+            late_after = schedule.windows[(department, weekday)].late_after
+            if late_after != general:
+                thresholds[late_after].append(department)
+
+        late = Q(entry_time__gt=localization.local_to_utc(local_date, general))
+        if not thresholds:
+            return late
+
+        overridden = [
+            dept for departments in thresholds.values() for dept in departments
+        ]
+        condition = ~Q(user__department_id__in=overridden) & late
+        for late_after, departments in thresholds.items():
+            condition |= Q(
+                user__department_id__in=departments,
+                entry_time__gt=localization.local_to_utc(local_date, late_after),
+            )
+        return condition
+
+    @staticmethod
+    def on_rules_changed(sender, **kwargs):
+        ScheduleService.invalidate()
+
+    @staticmethod
+    def on_user_saved(sender, instance, **kwargs):
+        # Solo importa si cambia el departamento con reglas propias del usuario
+        compiled = ScheduleService._compiled
+        department = instance.department_id
+        if compiled is None:
+            if department is not None:
+                ScheduleService.invalidate()
+            return
+        if department not in compiled.rule_departments:
+            department = None
+        if compiled.user_departments.get(instance.id) != department:
+            ScheduleService.invalidate()
+
+    @staticmethod
+    def connect_signals():
+        for model in (Shift, ScheduleRule, Department):
+            post_save.connect(
+                ScheduleService.on_rules_changed,
+                sender=model,
+                dispatch_uid=f"schedule_save_{model.__name__}",
+            )
+            post_delete.connect(
+                ScheduleService.on_rules_changed,
+                sender=model,
+                dispatch_uid=f"schedule_delete_{model.__name__}",
+            )
+        post_save.connect(
+            ScheduleService.on_user_saved,
+            sender=User,
+            dispatch_uid="schedule_user_saved",
+        )
@@ -0,0 +1,155 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from app.models import DailyAttendanceSummary
+from app.routers import primary_reads
+from app.services.attendance_service import AttendanceService
+from app.services.dashboard_service import DashboardService
+from app.services.schedule_service import ScheduleService
+
+
+class SummaryService:
+    """
+    Mantiene la tabla DailyAttendanceSummary (un registro por día local) para
+    que el dashboard lea una sola fila en lugar de recalcular desde Attendance
+    """
+
+    SUMMARY_FIELDS = (
+        "total",
+        "on_time",
+        "late_arrivals",
+        "open_shifts",
+        "total_hours",
+    )
+
+    @staticmethod
+    def is_late_arrival(entry_time, user_id=None):
+        """
+        Indica si una hora de entrada (UTC) es llegada tarde según el turno
+        del usuario
+        """
+        return ScheduleService.is_late(user_id, entry_time)
+
+    @staticmethod
+    def apply_changes(local_date, **increments):
+        """
+        Aplica incrementos al resumen de un día con un UPDATE atómico (F()).
+        Si el día aún no tiene resumen, lo crea desde Attendance. Los
+        fragmentos del dashboard de ese día se invalidan al confirmar
+        Debe llamarse dentro de la misma transacción que el registro de asistencia
+        """
+        if not SummaryService.increment(local_date, increments):
+            try:
+                # El resumen se calcula con los datos ya escritos en esta transacción
+                with transaction.atomic():
+                    DailyAttendanceSummary.objects.create(
+                        date=local_date, **SummaryService.compute(local_date)
+                    )
+            except IntegrityError:
+                # Otro proceso creó el resumen al mismo tiempo con sus propios
+                # datos (sin los de esta transacción): sumar los incrementos
+                SummaryService.increment(local_date, increments)
+        DashboardService.invalidate_dates([local_date])
+
+    @staticmethod
+    def increment(local_date, increments):
+        """
+        Returns: True si el día tenía resumen y se actualizó
+        """
+        return bool(
+            DailyAttendanceSummary.objects.filter(date=local_date).update(
+                updated_at=timezone.now(),
+                **{field: F(field) + value for field, value in increments.items()},
+            )
+        )
+
+    @staticmethod
+    def record_entry(local_date, entry_time, user_id=None):
+        """
+        Suma una entrada al resumen del día
+        """
+        is_late = SummaryService.is_late_arrival(entry_time, user_id)
+        SummaryService.apply_changes(
+            local_date,
+            total=1,
+            open_shifts=1,
+            late_arrivals=1 if is_late else 0,
+            on_time=0 if is_late else 1,
+        )
+
+    @staticmethod
+    def record_exit(local_date, hours_worked):
+        """
+        Cierra una jornada en el resumen del día
+        """
+        SummaryService.apply_changes(
+            local_date, open_shifts=-1, total_hours=hours_worked
+        )
+
+    @staticmethod
+    def compute(local_date):
+        """
+        Valores del resumen de un día calculados desde los registros
+        """
+        # Se guarda en el primario: se calcula con datos del primario
+        with primary_reads():
+            stats = AttendanceService.get_daily_statistics(local_date)
+        return {field: stats[field] for field in SummaryService.SUMMARY_FIELDS}
+
+    @staticmethod
+    def rebuild(local_date):
+        """
+        Recalcula el resumen de un día desde los registros de Attendance
+        Returns: DailyAttendanceSummary actualizado
+        """
+        try:
+            with transaction.atomic():
+                return SummaryService.write(local_date)
+        except IntegrityError:
+            # Otro proceso creó el resumen mientras se calculaba: los valores
+            # calculados pueden no incluir sus datos. Esa fila ya está
+            # confirmada, así que se bloquea y se recalcula
+            with transaction.atomic():
+                return SummaryService.write(local_date)
+
+    @staticmethod
+    def write(local_date):
+        """
+        Bloquea el resumen del día (si existe) antes de calcularlo: los
+        incrementos concurrentes esperan y se suman sobre el valor nuevo
+        """
+        summary = (
+            DailyAttendanceSummary.objects.select_for_update()
+            .filter(date=local_date)
+            .first()
+        )
+        values = SummaryService.compute(local_date)
+        if summary is None:
+            return DailyAttendanceSummary.objects.create(date=local_date, **values)
+        for field, value in values.items():
+            setattr(summary, field, value)
+        summary.save()
+        return summary
+
+    @staticmethod
+    def get_summary(local_date):
+        """
+        Obtiene las estadísticas de un día leyendo una sola fila del resumen.
+        Si el día pasado no tiene resumen (datos anteriores a la tabla), se
+        reconstruye una vez y se guarda; los días futuros devuelven ceros
+        """
+        summary = DailyAttendanceSummary.objects.filter(date=local_date).first()
+        if summary is None:
+            if local_date > AttendanceService.get_local_time().date():
+                summary = DailyAttendanceSummary(date=local_date)
+            else:
+                summary = SummaryService.rebuild(local_date)
+
+        result = {
+            field: getattr(summary, field) for field in SummaryService.SUMMARY_FIELDS
+        }
+        result["total_hours"] = round(result["total_hours"], 2)
+        result["attendance_percentage"] = (
+            summary.on_time / max(summary.total, 1)
+        ) * 100
+        return result
@@ -0,0 +1,1279 @@
+// Valores del servidor: atributos data-* de la etiqueta <script>
+const attendanceConfig = document.currentScript.dataset;
+
+// Función para confirmar logout con SweetAlert
+function confirmLogout() {
+  Swal.fire({
+    title: '¿Cerrar sesión?',
+    text: logoutWarningText(),
+    icon: getPunchQueue().length ? 'warning' : 'question',
+    showCancelButton: true,
+    confirmButtonColor: '#dc2626',
+    cancelButtonColor: '#6b7280',
+    confirmButtonText: 'Sí, cerrar sesión',
+    cancelButtonText: 'Cancelar',
+    reverseButtons: true
+  }).then((result) => {
+    if (result.isConfirmed) {
+      // Mostrar loading
+      Swal.fire({
+        title: 'Cerrando sesión...',
+        text: 'Por favor espera',
+        icon: 'info',
+        allowOutsideClick: false,
+        showConfirmButton: false,
+        willOpen: () => {
+          Swal.showLoading();
+        }
+      });
+
+      // Enviar formulario
+      document.getElementById('logoutForm').submit();
+    }
+  });
+}
+
+// Aviso al cerrar sesión con marcaciones sin enviar: quedan guardadas en
+// este equipo y se envían cuando el mismo usuario vuelva a iniciar sesión
+function logoutWarningText() {
+  const pending = getPunchQueue().length;
+  if (!pending) {
+    return '¿Estás seguro de que deseas cerrar sesión?';
+  }
+  return `Tienes ${pending} marcación(es) sin enviar. Se enviarán cuando vuelvas a iniciar sesión en este equipo con conexión. ¿Cerrar sesión?`;
+}
+
+// State management con datos del backend
+let attendanceStatus = JSON.parse(document.getElementById('attendance-status-data').textContent);
+let attendanceHistory = JSON.parse(document.getElementById('attendance-history-data').textContent);
+
+// MEJORADO: Sistema robusto de gestión de estado con localStorage
+let currentState;
+
+// NUEVO: Sistema de cookies como respaldo
+function setCookie(name, value, hours = 24) {
+  const date = new Date();
+  date.setTime(date.getTime() + (hours * 60 * 60 * 1000));
+  const expires = "expires=" + date.toUTCString();
+  document.cookie = name + "=" + value + ";" + expires + ";path=/";
+  console.log('🍪 Cookie establecida:', name, '=', value);
+}
+
+function getCookie(name) {
+  const nameEQ = name + "=";
+  const ca = document.cookie.split(';');
+  for(let i = 0; i < ca.length; i++) {
+    let c = ca[i];
+    while (c.charAt(0) === ' ') c = c.substring(1, c.length);
+    if (c.indexOf(nameEQ) === 0) {
+      const value = c.substring(nameEQ.length, c.length);
+      console.log('🍪 Cookie obtenida:', name, '=', value);
+      return value;
+    }
+  }
+  console.log('🍪 Cookie no encontrada:', name);
+  return null;
+}
+
+function deleteCookie(name) {
+  document.cookie = name + "=; expires=Thu, 01 Jan 1970 00:00:00 UTC; path=/;";
+  console.log('🍪 Cookie eliminada:', name);
+}
+
+// Función para guardar estado en cookies (además de localStorage)
+function saveStateToCookies(state, data) {
+  const today = new Date().toDateString();
+  setCookie('attendance_state', state, 12); // 12 horas
+  setCookie('attendance_date', today, 12);
+  if (data.entry_time) {
+    setCookie('attendance_entry_time', data.entry_time, 12);
+  }
+  if (data.attendance_id) {
+    setCookie('attendance_id', data.attendance_id, 12);
+  }
+}
+
+// Función para recuperar estado de cookies
+function getStateFromCookies() {
+  const state = getCookie('attendance_state');
+  const date = getCookie('attendance_date');
+  const today = new Date().toDateString();
+
+  if (state && date === today) {
+    return {
+      state: state,
+      entry_time: getCookie('attendance_entry_time'),
+      attendance_id: getCookie('attendance_id'),
+      date: date
+    };
+  }
+
+  // Si es otro día, limpiar cookies
+  if (date && date !== today) {
+    deleteCookie('attendance_state');
+    deleteCookie('attendance_date');
+    deleteCookie('attendance_entry_time');
+    deleteCookie('attendance_id');
+  }
+
+  return null;
+}
+
+// Función para guardar estado (localStorage + cookies)
+function saveStateToLocalStorage(state, data) {
+  const stateData = {
+    state: state,
+    data: data,
+    timestamp: new Date().getTime(),
+    date: new Date().toDateString() // Para validar que es del mismo día
+  };
+  localStorage.setItem('attendanceState', JSON.stringify(stateData));
+  console.log('💾 Estado guardado en localStorage:', stateData);
+
+  // También guardar en cookies como respaldo
+  saveStateToCookies(state, data);
+}
+
+// Función para recuperar estado (localStorage + cookies)
+function getStateFromLocalStorage() {
+  // Intentar primero localStorage
+  try {
+    const saved = localStorage.getItem('attendanceState');
+    if (saved) {
+      const stateData = JSON.parse(saved);
+      const today = new Date().toDateString();
+
+      // Verificar que sea del mismo día
+      if (stateData.date === today) {
+        console.log('📱 Estado recuperado de localStorage:', stateData);
+        return stateData;
+      } else {
+        console.log('📱 Estado de localStorage es de otro día, limpiando...');
+        localStorage.removeItem('attendanceState');
+      }
+    }
+  } catch (e) {
+    console.log('📱 Error al recuperar estado de localStorage:', e);
+    localStorage.removeItem('attendanceState');
+  }
+
+  // Si localStorage falla, intentar cookies
+  const cookieState = getStateFromCookies();
+  if (cookieState) {
+    console.log('🍪 Estado recuperado de cookies:', cookieState);
+    return {
+      state: cookieState.state,
+      data: {
+        entry_time: cookieState.entry_time,
+        attendance_id: cookieState.attendance_id
+      },
+      date: cookieState.date
+    };
+  }
+
+  return null;
+}
+
+// Función para determinar el estado correcto (MEJORADA)
+function determineCorrectState() {
+  console.log('🔄 === DETERMINANDO ESTADO CORRECTO ===');
+  console.log('Backend state:', attendanceStatus);
+
+  const savedState = getStateFromLocalStorage();
+  console.log('LocalStorage/Cookies state:', savedState);
+
+  // PRIORIDAD 1: Si el backend tiene datos válidos, SIEMPRE usarlos
+  if (attendanceStatus && attendanceStatus.status && attendanceStatus.status !== 'out') {
+    console.log('✅ Backend tiene estado VÁLIDO:', attendanceStatus.status);
+    currentState = attendanceStatus.status;
+    saveStateToLocalStorage(currentState, attendanceStatus);
+    console.log('💾 Estado del backend guardado en localStorage y cookies');
+    return;
+  }
+
+  // PRIORIDAD 2: Si el backend dice 'out' pero localStorage/cookies dicen que hay jornada activa
+  if (savedState && savedState.state === 'in' && attendanceStatus.status === 'out') {
+    console.log('⚠️ CONFLICTO DETECTADO: Respaldo dice IN pero Backend dice OUT');
+    console.log('⚠️ Esto puede ser un problema de zona horaria en el backend');
+    console.log('🔄 Usando estado del respaldo y forzando verificación...');
+
+    // Usar estado del respaldo
+    currentState = savedState.state;
+    attendanceStatus = { 
+      ...attendanceStatus, 
+      ...savedState.data, 
+      status: savedState.state,
+      message: `Jornada iniciada a las ${savedState.data.entry_time || 'hora desconocida'}`
+    };
+
+    // Verificar con servidor después de un momento
+    setTimeout(() => {
+      console.log('🔄 Verificando estado con servidor...');
+      forceSyncWithServer();
+    }, 3000);
+
+    return;
+  }
+
+  // PRIORIDAD 3: Por defecto, usar estado del backend
+  currentState = attendanceStatus?.status || 'out';
+  console.log('📋 Usando estado del backend por defecto:', currentState);
+
+  if (currentState !== 'out') {
+    saveStateToLocalStorage(currentState, attendanceStatus);
+  }
+}
+
+// Función para forzar sincronización con servidor
+function forceSyncWithServer() {
+  console.log('🔄 Forzando sincronización con servidor...');
+  fetch(attendanceConfig.statusUrl, {
+    method: 'GET',
+    headers: {
+      'X-Requested-With': 'XMLHttpRequest',
+    }
+  })
+  .then(response => response.json())
+  .then(data => {
+    console.log('🔄 Respuesta de sincronización:', data);
+    if (data.success) {
+      attendanceStatus = data.status;
+      currentState = attendanceStatus.status;
+      console.log('✅ Estado sincronizado:', currentState);
+
+      // Guardar en localStorage
+      if (currentState !== 'out') {
+        saveStateToLocalStorage(currentState, attendanceStatus);
+      } else {
+        localStorage.removeItem('attendanceState');
+      }
+
+      // Actualizar UI
+      updateUI();
+      updateTodaySummary();
+    }
+  })
+  .catch(error => {
+    console.error('❌ Error en sincronización:', error);
+  });
+}
+
+// INICIALIZACIÓN: Determinar estado correcto
+determineCorrectState();
+
+// Debug inicial expandido
+console.log('=== INICIALIZACIÓN DEL SISTEMA ===');
+console.log('Datos completos del backend:', attendanceStatus);
+console.log('Estado inicial determinado:', currentState);
+console.log('¿Puede registrar entrada?:', attendanceStatus?.can_register_entry);
+console.log('¿Puede registrar salida?:', attendanceStatus?.can_register_exit);
+
+// Variables para paginación y filtros
+let allRecords = [];
+let filteredRecords = [];
+let currentPage = 1;
+let recordsPerPage = 10;
+let showAllRecords = false;
+// Cursor de la siguiente página del historial en el servidor (null si no hay más)
+let historyNextCursor = attendanceHistory.next_cursor || null;
+let loadingMoreHistory = false;
+
+// Stream de eventos del servidor (SSE); null si el navegador no lo soporta
+let statusStream = null;
+// true mientras el stream está abierto; antes del evento 'open' (o si el
+// servidor no lo soporta, por ejemplo con WSGI) se sigue sondeando
+let statusStreamOpen = false;
+// Momento en que se recibió el último estado, para avanzar el tiempo trabajado localmente
+let statusReceivedAt = Date.now();
+// ETag de la última respuesta de estado/historial (If-None-Match en el siguiente pedido)
+let statusEtag = null;
+let historyEtag = null;
+
+// Marcaciones guardadas sin conexión (localStorage), pendientes de envío.
+// La cola es de cada usuario: en un kiosco compartido solo se envían las
+// marcaciones de quien tiene la sesión abierta, las demás esperan a su dueño
+const PUNCH_QUEUE_KEY = `attendancePunchQueue:${attendanceConfig.userId}`;
+const PUNCH_BATCH_SIZE = 50;
+let flushingPunches = false;
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function () {
+  updateDateTime();
+  setInterval(updateDateTime, 1000);
+  updatePendingPunches();
+  flushPunchQueue();
+  window.addEventListener('online', flushPunchQueue);
+  setInterval(flushPunchQueue, 30000);
+  connectStatusStream();
+  initializeFromBackend();
+  updateHistoryDisplay();
+
+  // CORREGIDO: Solo sincronizar si hay duda sobre el estado
+  // No llamar automáticamente si el backend ya dio un estado válido
+  setTimeout(() => {
+    if (currentState === 'in' && (!attendanceStatus.entry_time || attendanceStatus.hours_worked === undefined)) {
+      console.log('⚠️ Estado IN pero datos incompletos, sincronizando...');
+      updateStatusFromServer();
+    }
+  }, 1000);
+});
+
+// Detectar cuando el usuario vuelve a la pestaña para sincronizar
+document.addEventListener('visibilitychange', function() {
+  if (!document.hidden && currentState === 'in') {
+    if (statusStreamOpen) {
+      // El stream mantiene el estado al día; solo refrescar el reloj local
+      tickWorkedTime();
+      return;
+    }
+    // Usuario regresó a la pestaña y tiene jornada activa, sincronizar
+    console.log('👁️ Usuario regresó, sincronizando estado...');
+    updateStatusFromServer();
+  }
+});
+
+// Initialize from backend data
+function initializeFromBackend() {
+  // CORREGIDO: Sincronizar currentState con los datos del backend
+  if (attendanceStatus && attendanceStatus.status) {
+    currentState = attendanceStatus.status;
+    console.log('Estado sincronizado desde backend:', currentState);
+  }
+
+  updateUI();
+  updateTodaySummary(); // Actualizar el resumen del día
+
+  if (attendanceStatus.status === 'in') {
+    // Si está en progreso, iniciar actualización periódica desde el servidor
+    startServerTimer();
+  } else if (attendanceStatus.status === 'completed') {
+    // Si ya completó, mostrar las horas finales
+    updateTodaySummary();
+  }
+
+  console.log('Inicialización completada. Estado final:', currentState);
+}
+
+// Update date and time
+function updateDateTime() {
+  const now = new Date();
+  const dateOptions = { weekday: 'long', year: 'numeric', month: 'long', day: 'numeric' };
+  document.getElementById('currentDate').textContent = now.toLocaleDateString('es-ES', dateOptions);
+  document.getElementById('currentTime').textContent = now.toLocaleTimeString('es-ES');
+}
+
+// Toggle attendance - Nueva implementación con backend
+function toggleAttendance() {
+  const actionButton = document.getElementById('actionButton');
+  const buttonText = document.getElementById('buttonText');
+
+  console.log('=== INICIO DE ACCIÓN DE ASISTENCIA ===');
+  console.log('Estado actual antes de acción:', currentState);
+  console.log('Datos de asistencia completos:', attendanceStatus);
+  console.log('¿Puede registrar entrada?:', attendanceStatus?.can_register_entry);
+  console.log('¿Puede registrar salida?:', attendanceStatus?.can_register_exit);
+
+  // Determinar la acción basada en el estado actual
+  let action;
+  if (currentState === 'out') {
+    action = 'entry';
+    console.log('Estado OUT detectado → Acción: ENTRADA');
+  } else if (currentState === 'in') {
+    action = 'exit';
+    console.log('Estado IN detectado → Acción: SALIDA');
+  } else {
+    console.error('Estado no válido detectado:', currentState);
+    console.error('Datos de attendanceStatus:', attendanceStatus);
+    return;
+  }
+
+  console.log('Acción final determinada:', action);
+
+  // Sin conexión (o con marcaciones pendientes, para respetar el orden) la
+  // marcación se guarda en el navegador y se envía por lotes
+  if (!navigator.onLine || getPunchQueue().length) {
+    queuePunch(action);
+    flushPunchQueue();
+    return;
+  }
+
+  // Deshabilitar botón y mostrar loading
+  actionButton.disabled = true;
+  buttonText.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i>Procesando...';
+
+  // Crear FormData para enviar
+  const formData = new FormData();
+  formData.append('action', action);
+  formData.append('csrfmiddlewaretoken', attendanceConfig.csrfToken);
+
+  console.log('Enviando al backend - Acción:', action);
+
+  // Enviar petición al backend
+  fetch(attendanceConfig.markUrl, {
+    method: 'POST',
+    body: formData,
+    headers: {
+      'X-Requested-With': 'XMLHttpRequest',
+    }
+  })
+  .then(response => response.json())
+  .then(data => {
+    console.log('=== RESPUESTA DEL BACKEND ===');
+    console.log('Respuesta completa del servidor:', data);
+
+    if (data.success) {
+      console.log('✅ Acción exitosa en el backend');
+
+      // Actualizar estado local
+      if (action === 'entry') {
+        console.log('Actualizando estado local después de ENTRADA');
+        currentState = 'in';
+        attendanceStatus.entry_time = data.entry_time;
+        attendanceStatus.status = 'in';
+        attendanceStatus.message = `Jornada iniciada a las ${data.entry_time}`;  // CORREGIDO: Actualizar mensaje
+        attendanceStatus.hours_worked = 0; // Inicializar
+        attendanceStatus.can_register_entry = false;
+        attendanceStatus.can_register_exit = true;
+
+        // NUEVO: Guardar estado en localStorage Y cookies
+        saveStateToLocalStorage(currentState, attendanceStatus);
+
+        startServerTimer(); // Iniciar actualizaciones desde servidor
+        console.log('Nuevo estado después de entrada:', currentState);
+      } else if (action === 'exit') {
+        console.log('Actualizando estado local después de SALIDA');
+        currentState = 'completed'; // CORREGIDO: debe ser 'completed', no 'out'
+        attendanceStatus.exit_time = data.exit_time;
+        attendanceStatus.hours_worked = data.hours_worked;
+        attendanceStatus.status = 'completed';
+        attendanceStatus.message = `Jornada completada (${data.hours_worked} horas)`;  // CORREGIDO: Actualizar mensaje
+        attendanceStatus.can_register_entry = false;
+        attendanceStatus.can_register_exit = false;
+
+        // NUEVO: Guardar estado en localStorage Y cookies
+        saveStateToLocalStorage(currentState, attendanceStatus);
+
+        // Detener timer del servidor
+        if (window.timerInterval) {
+          clearInterval(window.timerInterval);
+        }
+        console.log('Nuevo estado después de salida:', currentState);
+      }
+
+      console.log('Estado final actualizado:', currentState);
+      console.log('AttendanceStatus actualizado:', attendanceStatus);
+
+      // FORZAR actualización inmediata del botón
+      console.log('🔄 Forzando actualización inmediata de UI...');
+      updateUI();
+      updateTodaySummary(); // Actualizar el resumen con los nuevos datos
+
+      // Verificar que el botón se actualizó correctamente
+      setTimeout(() => {
+        console.log('🔍 Verificando estado después de UI update:');
+        console.log('CurrentState:', currentState);
+        console.log('AttendanceStatus:', attendanceStatus);
+      }, 100);
+
+      // Mostrar notificación apropiada
+      showBackendNotification(data);
+
+      // Refrescar historial desde el servidor
+      refreshHistoryFromServer();
+
+    } else {
+      console.error('❌ Error en el backend:', data.message);
+      // Mostrar error
+      Swal.fire({
+        icon: 'error',
+        title: 'Error',
+        text: data.message,
+        confirmButtonColor: '#dc2626'
+      });
+    }
+  })
+  .catch(error => {
+    // Sin respuesta del servidor: guardar la marcación para enviarla después.
+    // Si el servidor alcanzó a registrarla, el lote la rechaza y el estado
+    // se corrige con la respuesta
+    console.error('❌ Error de conexión:', error);
+    queuePunch(action);
+  })
+  .finally(() => {
+    // Restaurar botón
+    actionButton.disabled = false;
+    updateButtonText(); // IMPORTANTE: Actualizar texto del botón
+
+    console.log('=== FIN DE ACCIÓN ===');
+    console.log('Estado final después de la acción:', currentState);
+    console.log('=====================================');
+  });
+}    // Show backend notification with SweetAlert
+function showBackendNotification(data) {
+  let icon = 'success';
+  let title = '¡Registro exitoso!';
+  let confirmButtonColor = '#059669';
+
+  if (data.notification_type === 'warning') {
+    icon = 'warning';
+    title = 'Registro fuera de horario';
+    confirmButtonColor = '#d97706';
+  } else if (data.notification_type === 'error') {
+    icon = 'error';
+    title = 'Error en registro';
+    confirmButtonColor = '#dc2626';
+  }
+
+  let message = data.message;
+  if (data.outside_schedule && data.schedule_message) {
+    message += '\\n\\n' + data.schedule_message;
+  }
+
+  // Agregar información adicional si es salida
+  if (data.hours_worked) {
+    message += `\\n\\nHoras trabajadas: ${data.hours_worked} horas`;
+  }
+
+  Swal.fire({
+    icon: icon,
+    title: title,
+    text: message,
+    confirmButtonColor: confirmButtonColor,
+    confirmButtonText: 'Entendido'
+  });
+}
+
+// Update UI based on current state
+function updateUI() {
+  console.log('🎨 === ACTUALIZANDO UI ===');
+  console.log('Estado para UI:', currentState);
+  console.log('AttendanceStatus:', attendanceStatus);
+
+  const statusIcon = document.getElementById('statusIcon');
+  const statusText = document.getElementById('statusText');
+  const statusTime = document.getElementById('statusTime');
+
+  if (currentState === 'in') {
+    console.log('🟢 Configurando UI para estado IN (jornada en curso)');
+    statusIcon.className = 'inline-flex items-center justify-center w-24 h-24 rounded-full bg-green-100 mb-4 transition-all duration-300 pulse-animation';
+    statusIcon.innerHTML = '<i class="fas fa-user-check text-4xl text-green-600"></i>';
+    statusText.textContent = 'Jornada en curso';
+    if (attendanceStatus.entry_time) {
+      statusTime.textContent = `Entrada: ${attendanceStatus.entry_time}`;
+    }
+  } else if (currentState === 'completed') {
+    console.log('🔵 Configurando UI para estado COMPLETED');
+    statusIcon.className = 'inline-flex items-center justify-center w-24 h-24 rounded-full bg-blue-100 mb-4 transition-all duration-300';
+    statusIcon.innerHTML = '<i class="fas fa-check-circle text-4xl text-blue-600"></i>';
+    statusText.textContent = attendanceStatus.message || 'Jornada completada';
+    if (attendanceStatus.hours_worked) {
+      statusTime.textContent = `Horas trabajadas: ${attendanceStatus.hours_worked}`;
+    }
+  } else {
+    console.log('⚪ Configurando UI para estado OUT (sin jornada)');
+    statusIcon.className = 'inline-flex items-center justify-center w-24 h-24 rounded-full bg-gray-100 mb-4 transition-all duration-300';
+    statusIcon.innerHTML = '<i class="fas fa-user-clock text-4xl text-gray-400"></i>';
+    statusText.textContent = attendanceStatus.message || 'No has iniciado tu jornada';
+    statusTime.textContent = '';
+  }
+
+  console.log('🎨 Llamando updateButtonText()...');
+  updateButtonText();
+  console.log('🎨 === FIN ACTUALIZACIÓN UI ===');
+}
+
+// Update button text and state
+function updateButtonText() {
+  const actionButton = document.getElementById('actionButton');
+  const buttonText = document.getElementById('buttonText');
+
+  console.log('=== ACTUALIZANDO BOTÓN ===');
+  console.log('Estado actual para botón:', currentState);
+
+  if (currentState === 'in') {
+    actionButton.className = 'px-8 py-4 bg-red-600 text-white font-semibold rounded-lg hover:bg-red-700 transform hover:scale-105 transition-all duration-200 shadow-lg';
+    actionButton.innerHTML = '<i class="fas fa-sign-out-alt mr-2"></i><span id="buttonText">Marcar Salida</span>';
+    actionButton.disabled = false;
+    console.log('✅ Botón configurado para SALIDA');
+  } else if (currentState === 'completed') {
+    actionButton.className = 'px-8 py-4 bg-gray-400 text-white font-semibold rounded-lg cursor-not-allowed';
+    actionButton.innerHTML = '<i class="fas fa-check mr-2"></i><span id="buttonText">Jornada Completada</span>';
+    actionButton.disabled = true;
+    console.log('✅ Botón configurado para COMPLETADO');
+  } else {
+    actionButton.className = 'px-8 py-4 bg-blue-600 text-white font-semibold rounded-lg hover:bg-blue-700 transform hover:scale-105 transition-all duration-200 shadow-lg';
+    actionButton.innerHTML = '<i class="fas fa-sign-in-alt mr-2"></i><span id="buttonText">Marcar Entrada</span>';
+    actionButton.disabled = false;
+    console.log('✅ Botón configurado para ENTRADA');
+  }
+  console.log('========================');
+}
+
+// Conectarse al stream de eventos: el servidor envía el estado solo cuando cambia
+function connectStatusStream() {
+  if (!window.EventSource) {
+    return;
+  }
+  statusStream = new EventSource(attendanceConfig.eventsUrl);
+  statusStream.addEventListener('open', function () {
+    statusStreamOpen = true;
+    if (currentState === 'in') {
+      startServerTimer();
+    }
+  });
+  statusStream.addEventListener('status', function (event) {
+    applyServerStatus(JSON.parse(event.data));
+  });
+  // EventSource se reconecta solo; mientras tanto (o si el servidor lo cierra
+  // con 204) el sondeo queda como respaldo
+  statusStream.addEventListener('error', function () {
+    const wasOpen = statusStreamOpen;
+    statusStreamOpen = false;
+    if (statusStream.readyState === EventSource.CLOSED) {
+      statusStream = null;
+    }
+    // Volver al sondeo solo al perder un stream abierto o al cerrarse; los
+    // reintentos fallidos de conexión no reinician el temporizador
+    if ((wasOpen || !statusStream) && currentState === 'in') {
+      startServerTimer();
+    }
+  });
+}
+
+// Aplicar un estado recibido del servidor (stream o API)
+function applyServerStatus(status) {
+  attendanceStatus = status;
+  currentState = attendanceStatus.status;
+  statusReceivedAt = Date.now();
+
+  updateTodaySummary();
+  updateStatusDisplay();
+  updateUI();
+
+  if (currentState === 'in') {
+    startServerTimer();
+  } else if (window.timerInterval) {
+    clearInterval(window.timerInterval);
+    window.timerInterval = null;
+  }
+}
+
+// Avanzar el tiempo trabajado desde el último estado recibido, sin pedirlo al servidor
+function tickWorkedTime() {
+  if (attendanceStatus.status !== 'in') {
+    return;
+  }
+  const hoursWorked = (attendanceStatus.hours_worked || 0) + (Date.now() - statusReceivedAt) / 3600000;
+  const hours = Math.floor(hoursWorked);
+  const minutes = Math.floor((hoursWorked - hours) * 60);
+  attendanceStatus.hours_worked_display = `${hours}h ${minutes}m`;
+  updateTodaySummary();
+  updateStatusDisplay();
+}
+
+// Iniciar timer que obtiene datos desde el servidor
+function startServerTimer() {
+  // Limpiar timer anterior si existe
+  if (window.timerInterval) {
+    clearInterval(window.timerInterval);
+  }
+
+  // Con el stream conectado los cambios llegan solos: solo avanzar el reloj local
+  if (statusStreamOpen) {
+    window.timerInterval = setInterval(tickWorkedTime, 30000);
+    return;
+  }
+
+  // Actualizar inmediatamente
+  updateStatusFromServer();
+
+  // Configurar actualización cada 30 segundos desde el servidor
+  window.timerInterval = setInterval(updateStatusFromServer, 30000);
+}
+
+// Obtener estado actual desde el servidor
+function updateStatusFromServer() {
+  const headers = { 'X-Requested-With': 'XMLHttpRequest' };
+  if (statusEtag) {
+    headers['If-None-Match'] = statusEtag;
+  }
+  fetch(attendanceConfig.statusUrl, {
+    method: 'GET',
+    headers: headers
+  })
+  .then(response => {
+    // 304: el estado no cambió desde el último sondeo; solo avanza el reloj local
+    if (response.status === 304) {
+      return null;
+    }
+    statusEtag = response.headers.get('ETag');
+    return response.json();
+  })
+  .then(data => {
+    if (data === null) {
+      tickWorkedTime();
+      return;
+    }
+    if (data.success) {
+      // Actualizar datos de estado y UI completa (incluye los botones)
+      attendanceStatus = data.status;
+      currentState = attendanceStatus.status;
+      statusReceivedAt = Date.now();
+
+      console.log('Estado actualizado desde servidor:', currentState); // Debug
+
+      updateTodaySummary();
+      updateStatusDisplay();
+      updateUI();
+    } else {
+      console.log('Error al obtener estado:', data.message);
+    }
+  })
+  .catch(error => {
+    console.log('Error al conectar con servidor:', error);
+  });
+}
+
+// Nueva función para actualizar solo el display de estado (sin cambiar botones)
+function updateStatusDisplay() {
+  const statusText = document.getElementById('statusText');
+  const statusTime = document.getElementById('statusTime');
+
+  if (statusText && attendanceStatus.message) {
+    statusText.textContent = attendanceStatus.message;
+  }
+
+  if (statusTime) {
+    if (attendanceStatus.status === 'in' && attendanceStatus.hours_worked_display) {
+      statusTime.textContent = `Tiempo trabajado: ${attendanceStatus.hours_worked_display}`;
+    } else if (attendanceStatus.status === 'completed' && attendanceStatus.hours_worked) {
+      statusTime.textContent = `Horas trabajadas: ${attendanceStatus.hours_worked}`;
+    }
+  }
+}
+
+// Update today's summary - Usa datos del servidor en tiempo real
+function updateTodaySummary() {
+  // Actualizar entrada
+  if (attendanceStatus.entry_time) {
+    const todayEntryElement = document.getElementById('todayEntry');
+    if (todayEntryElement) {
+      todayEntryElement.textContent = attendanceStatus.entry_time;
+    }
+  }
+
+  // Actualizar salida
+  if (attendanceStatus.exit_time) {
+    const todayExitElement = document.getElementById('todayExit');
+    if (todayExitElement) {
+      todayExitElement.textContent = attendanceStatus.exit_time;
+    }
+  } else {
+    // Si no hay salida, mostrar --:--
+    const todayExitElement = document.getElementById('todayExit');
+    if (todayExitElement) {
+      todayExitElement.textContent = '--:--';
+    }
+  }
+
+  // Actualizar horas trabajadas usando SIEMPRE datos del servidor
+  const hoursWorkedElement = document.getElementById('hoursWorked');
+  if (hoursWorkedElement) {
+    if (attendanceStatus.hours_worked_display) {
+      // Si hay display formateado, usarlo
+      hoursWorkedElement.textContent = attendanceStatus.hours_worked_display;
+    } else if (attendanceStatus.hours_worked) {
+      // Si solo hay número, formatear
+      const hours = Math.floor(attendanceStatus.hours_worked);
+      const minutes = Math.round((attendanceStatus.hours_worked - hours) * 60);
+      hoursWorkedElement.textContent = `${hours}h ${minutes}m`;
+    } else {
+      // Sin datos
+      hoursWorkedElement.textContent = '0h 0m';
+    }
+  }
+}
+
+// Update history display - Versión mejorada con paginación y filtros
+function updateHistoryDisplay() {
+  const historyList = document.getElementById('historyList');
+  const emptyHistory = document.getElementById('emptyHistory');
+  const totalRecordsElement = document.getElementById('totalRecords');
+
+  if (!historyList || !emptyHistory) return;
+
+  // Inicializar datos si no existen
+  if (allRecords.length === 0 && attendanceHistory.success) {
+    allRecords = attendanceHistory.history || [];
+    filteredRecords = [...allRecords];
+
+    // Configurar event listeners para filtros
+    setupFilterListeners();
+  }
+
+  // Mostrar total de registros
+  if (totalRecordsElement) {
+    totalRecordsElement.textContent = historyNextCursor
+      ? `${filteredRecords.length} registro(s) cargados`
+      : `${filteredRecords.length} registro(s) total`;
+  }
+
+  if (filteredRecords.length === 0) {
+    historyList.innerHTML = '';
+    emptyHistory.innerHTML = '<p class="text-gray-500 text-center">No hay registros que coincidan con los filtros</p>';
+    emptyHistory.style.display = 'block';
+    document.getElementById('paginationContainer').innerHTML = renderLoadMoreButton();
+    return;
+  }
+
+  emptyHistory.style.display = 'none';
+
+  // Calcular registros a mostrar
+  let recordsToShow;
+  if (showAllRecords) {
+    recordsToShow = filteredRecords;
+  } else {
+    const startIndex = (currentPage - 1) * recordsPerPage;
+    const endIndex = startIndex + recordsPerPage;
+    recordsToShow = filteredRecords.slice(startIndex, endIndex);
+  }
+
+  // Generar HTML para cada registro
+  historyList.innerHTML = recordsToShow.map((record, index) => {
+    const entryTime = record.entry_time || '--:--';
+    const exitTime = record.exit_time || '--:--';
+    const hoursWorked = record.hours_worked > 0 ? 
+      `${Math.floor(record.hours_worked)}h ${Math.round((record.hours_worked - Math.floor(record.hours_worked)) * 60)}m` : '--';
+
+    // Determinar icono y color según estado
+    let statusIcon = 'fas fa-calendar-day text-gray-600';
+    let statusColor = 'bg-gray-50 hover:bg-gray-100';
+    let statusText = 'Registro';
+
+    if (record.status === 'completed') {
+      statusIcon = 'fas fa-check-circle text-green-600';
+      statusColor = 'bg-green-50 hover:bg-green-100';
+      statusText = 'Completo';
+    } else if (record.status === 'in_progress') {
+      statusIcon = 'fas fa-clock text-blue-600';
+      statusColor = 'bg-blue-50 hover:bg-blue-100';
+      statusText = 'En curso';
+    } else if (record.status === 'incomplete') {
+      statusIcon = 'fas fa-exclamation-triangle text-yellow-600';
+      statusColor = 'bg-yellow-50 hover:bg-yellow-100';
+      statusText = 'Sin salida';
+    }
+
+    return `
+      <div class="flex items-center justify-between p-4 ${statusColor} rounded-lg transition-all duration-300 slide-in history-card border border-gray-200">
+        <div class="flex items-center space-x-4">
+          <div class="bg-white p-3 rounded-lg shadow-sm border">
+            <i class="${statusIcon}"></i>
+          </div>
+          <div>
+            <div class="flex items-center space-x-3">
+              <p class="font-medium text-gray-900">${record.day_name} ${record.day_number} de ${record.month_name}</p>
+              <span class="status-badge ${getStatusBadgeClass(record.status)}">${statusText}</span>
+            </div>
+            <div class="flex items-center space-x-4 text-sm text-gray-600 mt-2">
+              <span class="flex items-center">
+                <i class="fas fa-sign-in-alt text-green-600 mr-1"></i> 
+                <strong>Entrada:</strong> ${entryTime}
+              </span>
+              <span class="flex items-center">
+                <i class="fas fa-sign-out-alt text-red-600 mr-1"></i> 
+                <strong>Salida:</strong> ${exitTime}
+              </span>
+            </div>
+            <p class="text-xs text-gray-500 mt-1">${record.date}</p>
+          </div>
+        </div>
+        <div class="text-right">
+          <p class="text-sm text-gray-600">Horas trabajadas</p>
+          <p class="font-bold text-lg text-gray-900 timer">${hoursWorked}</p>
+          ${record.status === 'in_progress' ? '<p class="text-xs text-blue-600 mt-1">Actualizando...</p>' : ''}
+        </div>
+      </div>
+    `;
+  }).join('');
+
+  // Actualizar paginación
+  if (!showAllRecords) {
+    updatePagination();
+  } else {
+    document.getElementById('paginationContainer').innerHTML = renderLoadMoreButton();
+  }
+}
+
+// Función auxiliar para obtener clases CSS del badge de estado
+function getStatusBadgeClass(status) {
+  switch(status) {
+    case 'completed':
+      return 'bg-green-100 text-green-800';
+    case 'in_progress':
+      return 'bg-blue-100 text-blue-800';
+    case 'incomplete':
+      return 'bg-yellow-100 text-yellow-800';
+    default:
+      return 'bg-gray-100 text-gray-800';
+  }
+}
+
+// Configurar listeners para filtros
+function setupFilterListeners() {
+  const searchInput = document.getElementById('searchHistory');
+  const statusFilter = document.getElementById('statusFilter');
+
+  if (searchInput) {
+    searchInput.addEventListener('input', applyFilters);
+  }
+
+  if (statusFilter) {
+    statusFilter.addEventListener('change', applyFilters);
+  }
+}
+
+// Aplicar filtros
+function applyFilters(resetPage = true) {
+  const searchTerm = document.getElementById('searchHistory')?.value.toLowerCase() || '';
+  const statusFilter = document.getElementById('statusFilter')?.value || '';
+
+  filteredRecords = allRecords.filter(record => {
+    // Filtro de búsqueda por fecha
+    const matchesSearch = !searchTerm || 
+      record.date.toLowerCase().includes(searchTerm) ||
+      `${record.day_name} ${record.day_number} de ${record.month_name}`.toLowerCase().includes(searchTerm);
+
+    // Filtro de estado
+    const matchesStatus = !statusFilter || record.status === statusFilter;
+
+    return matchesSearch && matchesStatus;
+  });
+
+  if (resetPage !== false) {
+    currentPage = 1; // Resetear página al filtrar
+  }
+  updateHistoryDisplay();
+}
+
+// Alternar vista completa/paginada
+function toggleHistoryView() {
+  showAllRecords = !showAllRecords;
+  const toggleBtn = document.getElementById('toggleViewBtn');
+
+  if (showAllRecords) {
+    toggleBtn.textContent = 'Ver paginado';
+    toggleBtn.className = 'text-sm bg-gray-100 text-gray-800 px-3 py-1 rounded-full hover:bg-gray-200 transition-colors';
+  } else {
+    toggleBtn.textContent = 'Ver todos';
+    toggleBtn.className = 'text-sm bg-blue-100 text-blue-800 px-3 py-1 rounded-full hover:bg-blue-200 transition-colors';
+  }
+
+  currentPage = 1;
+  updateHistoryDisplay();
+}
+
+// Actualizar paginación
+function updatePagination() {
+  const paginationContainer = document.getElementById('paginationContainer');
+  if (!paginationContainer || showAllRecords) return;
+
+  const totalPages = Math.ceil(filteredRecords.length / recordsPerPage);
+
+  if (totalPages <= 1) {
+    paginationContainer.innerHTML = renderLoadMoreButton();
+    return;
+  }
+
+  let paginationHTML = '';
+
+  // Botón anterior
+  if (currentPage > 1) {
+    paginationHTML += `
+      <button onclick="changePage(${currentPage - 1})" 
+        class="px-3 py-2 text-sm bg-white border border-gray-300 rounded-lg hover:bg-gray-50 transition-colors">
+        <i class="fas fa-chevron-left"></i>
+      </button>
+    `;
+  }
+
+  // Números de página
+  const startPage = Math.max(1, currentPage - 2);
+  const endPage = Math.min(totalPages, currentPage + 2);
+
+  for (let i = startPage; i <= endPage; i++) {
+    const isActive = i === currentPage;
+    paginationHTML += `
+      <button onclick="changePage(${i})" 
+        class="px-3 py-2 text-sm border rounded-lg transition-colors ${
+          isActive 
+            ? 'bg-blue-600 text-white border-blue-600' 
+            : 'bg-white border-gray-300 hover:bg-gray-50'
+        }">
+        ${i}
+      </button>
+    `;
+  }
+
+  // Botón siguiente
+  if (currentPage < totalPages) {
+    paginationHTML += `
+      <button onclick="changePage(${currentPage + 1})" 
+        class="px-3 py-2 text-sm bg-white border border-gray-300 rounded-lg hover:bg-gray-50 transition-colors">
+        <i class="fas fa-chevron-right"></i>
+      </button>
+    `;
+  }
+
+  paginationContainer.innerHTML = `
+    <div class="flex items-center space-x-1">
+      ${paginationHTML}
+    </div>
+    <div class="text-sm text-gray-600 ml-4">
+      Página ${currentPage} de ${totalPages} (${filteredRecords.length} registros)
+    </div>
+    ${currentPage === totalPages ? renderLoadMoreButton() : ''}
+  `;
+}
+
+// Botón para pedir la siguiente página del historial al servidor
+function renderLoadMoreButton() {
+  if (!historyNextCursor) return '';
+  return `
+    <button onclick="loadMoreHistory()" id="loadMoreBtn" ${loadingMoreHistory ? 'disabled' : ''}
+      class="ml-4 px-3 py-2 text-sm bg-blue-100 text-blue-800 rounded-lg hover:bg-blue-200 transition-colors">
+      ${loadingMoreHistory
+        ? '<i class="fas fa-spinner fa-spin mr-1"></i>Cargando...'
+        : '<i class="fas fa-chevron-down mr-1"></i>Cargar más registros'}
+    </button>
+  `;
+}
+
+// Cargar la siguiente página del historial usando el cursor del servidor
+function loadMoreHistory() {
+  if (!historyNextCursor || loadingMoreHistory) return;
+  loadingMoreHistory = true;
+  updateHistoryDisplay();
+
+  const url = attendanceConfig.historyUrl + '?cursor=' + encodeURIComponent(historyNextCursor);
+  fetch(url, {
+    method: 'GET',
+    headers: {
+      'X-Requested-With': 'XMLHttpRequest',
+    }
+  })
+  .then(response => response.json())
+  .then(data => {
+    if (data.success) {
+      allRecords = allRecords.concat(data.history || []);
+      historyNextCursor = data.next_cursor || null;
+    } else {
+      console.log('Error al cargar más registros:', data.message);
+    }
+  })
+  .catch(error => {
+    console.log('Error al cargar más registros:', error);
+  })
+  .finally(() => {
+    loadingMoreHistory = false;
+    applyFilters(false); // Mantener la página actual
+  });
+}
+
+// Cambiar página
+function changePage(page) {
+  currentPage = page;
+  updateHistoryDisplay();
+}
+
+// Refrescar historial desde el servidor
+function refreshHistoryFromServer() {
+  const refreshBtn = document.getElementById('refreshBtn');
+  const originalContent = refreshBtn.innerHTML;
+
+  // Mostrar indicador de carga
+  refreshBtn.innerHTML = '<i class="fas fa-spinner fa-spin mr-1"></i>Actualizando...';
+  refreshBtn.disabled = true;
+  refreshBtn.className = 'text-sm bg-gray-100 text-gray-600 px-3 py-1 rounded-full cursor-not-allowed flex items-center';
+
+  // Usar el nuevo endpoint específico para historial
+  const headers = { 'X-Requested-With': 'XMLHttpRequest' };
+  if (historyEtag) {
+    headers['If-None-Match'] = historyEtag;
+  }
+  fetch(attendanceConfig.historyUrl, {
+    method: 'GET',
+    headers: headers
+  })
+  .then(response => {
+    // 304: el historial no cambió, se conservan los registros cargados
+    if (response.status === 304) {
+      return { success: true, notModified: true };
+    }
+    historyEtag = response.headers.get('ETag');
+    return response.json();
+  })
+  .then(data => {
+    if (data.notModified) {
+      refreshBtn.innerHTML = '<i class="fas fa-check mr-1"></i>Actualizado';
+      refreshBtn.className = 'text-sm bg-green-100 text-green-800 px-3 py-1 rounded-full flex items-center';
+    } else if (data.success) {
+      // Actualizar datos del historial
+      attendanceHistory = data;
+      allRecords = attendanceHistory.history || [];
+      historyNextCursor = data.next_cursor || null;
+      filteredRecords = [...allRecords];
+      applyFilters(); // Reaplicar filtros actuales y actualizar display
+
+      // Mostrar mensaje de éxito temporal
+      refreshBtn.innerHTML = '<i class="fas fa-check mr-1"></i>Actualizado';
+      refreshBtn.className = 'text-sm bg-green-100 text-green-800 px-3 py-1 rounded-full flex items-center';
+    } else {
+      console.log('Error al obtener historial:', data.message);
+      updateHistoryDisplay(); // Fallback con datos actuales
+
+      // Mostrar mensaje de error
+      refreshBtn.innerHTML = '<i class="fas fa-exclamation-triangle mr-1"></i>Error';
+      refreshBtn.className = 'text-sm bg-red-100 text-red-800 px-3 py-1 rounded-full flex items-center';
+    }
+  })
+  .catch(error => {
+    console.log('Error al refrescar historial:', error);
+    updateHistoryDisplay(); // Fallback con datos actuales
+
+    // Mostrar mensaje de error
+    refreshBtn.innerHTML = '<i class="fas fa-exclamation-triangle mr-1"></i>Error';
+    refreshBtn.className = 'text-sm bg-red-100 text-red-800 px-3 py-1 rounded-full flex items-center';
+  })
+  .finally(() => {
+    // Restaurar botón después de 2 segundos
+    setTimeout(() => {
+      refreshBtn.innerHTML = originalContent;
+      refreshBtn.disabled = false;
+      refreshBtn.className = 'text-sm bg-green-100 text-green-800 px-3 py-1 rounded-full hover:bg-green-200 transition-colors flex items-center';
+    }, 2000);
+  });
+}
+
+function getPunchQueue() {
+  try {
+    return JSON.parse(localStorage.getItem(PUNCH_QUEUE_KEY)) || [];
+  } catch (e) {
+    return [];
+  }
+}
+
+function savePunchQueue(queue) {
+  localStorage.setItem(PUNCH_QUEUE_KEY, JSON.stringify(queue));
+  updatePendingPunches();
+}
+
+// Mostrar cuántas marcaciones esperan conexión
+function updatePendingPunches() {
+  const pending = getPunchQueue().length;
+  const indicator = document.getElementById('pendingPunches');
+  if (!indicator) {
+    return;
+  }
+  indicator.classList.toggle('hidden', pending === 0);
+  document.getElementById('pendingPunchesCount').textContent = pending;
+}
+
+// Guardar una marcación con la hora del kiosco y una clave de idempotencia:
+// si el lote se reenvía, el servidor no la registra dos veces
+function queuePunch(action) {
+  const key = window.crypto && crypto.randomUUID
+    ? crypto.randomUUID()
+    : Date.now().toString(36) + Math.random().toString(36).slice(2);
+  const now = new Date();
+  const queue = getPunchQueue();
+  queue.push({ key: key, action: action, timestamp: now.toISOString() });
+  savePunchQueue(queue);
+
+  // Estado local hasta que el servidor confirme el lote
+  const timeStr = now.toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' });
+  if (action === 'entry') {
+    currentState = 'in';
+    attendanceStatus.status = 'in';
+    attendanceStatus.entry_time = timeStr;
+    attendanceStatus.message = `Jornada iniciada a las ${timeStr}`;
+    attendanceStatus.hours_worked = 0;
+    attendanceStatus.can_register_entry = false;
+    attendanceStatus.can_register_exit = true;
+  } else {
+    currentState = 'completed';
+    attendanceStatus.status = 'completed';
+    attendanceStatus.exit_time = timeStr;
+    attendanceStatus.message = 'Jornada completada';
+    attendanceStatus.can_register_entry = false;
+    attendanceStatus.can_register_exit = false;
+  }
+  statusReceivedAt = Date.now();
+  saveStateToLocalStorage(currentState, attendanceStatus);
+  updateUI();
+  updateTodaySummary();
+
+  Swal.fire({
+    icon: 'info',
+    title: 'Marcación guardada',
+    text: `Sin conexión: la ${action === 'entry' ? 'entrada' : 'salida'} de las ${timeStr} se enviará al recuperar la conexión.`,
+    confirmButtonColor: '#2563eb',
+    confirmButtonText: 'Entendido'
+  });
+}
+
+// Enviar las marcaciones pendientes en lotes de PUNCH_BATCH_SIZE
+function flushPunchQueue() {
+  const batch = getPunchQueue().slice(0, PUNCH_BATCH_SIZE);
+  if (flushingPunches || !batch.length || !navigator.onLine) {
+    return;
+  }
+  flushingPunches = true;
+  let sent = false;
+
+  fetch(attendanceConfig.batchUrl, {
+    method: 'POST',
+    body: JSON.stringify({ user_id: Number(attendanceConfig.userId), punches: batch }),
+    headers: {
+      'Content-Type': 'application/json',
+      'X-CSRFToken': attendanceConfig.csrfToken,
+      'X-Requested-With': 'XMLHttpRequest',
+    }
+  })
+  .then(response => response.json())
+  .then(data => {
+    if (!data.success) {
+      console.log('Error al enviar marcaciones pendientes:', data.message);
+      return;
+    }
+    // Cada marcación tiene su resultado; las aplicadas y las rechazadas salen de la cola
+    const processed = new Set(data.results.map(result => result.key));
+    savePunchQueue(getPunchQueue().filter(punch => !processed.has(punch.key)));
+    sent = true;
+
+    applyServerStatus(data.status);
+    saveStateToLocalStorage(currentState, attendanceStatus);
+    refreshHistoryFromServer();
+
+    const rejected = data.results.filter(result => !result.success);
+    if (rejected.length) {
+      Swal.fire({
+        icon: 'warning',
+        title: 'Marcaciones no registradas',
+        text: rejected.map(result => result.message).join('\n'),
+        confirmButtonColor: '#d97706',
+        confirmButtonText: 'Entendido'
+      });
+    }
+  })
+  .catch(error => {
+    console.log('Sin conexión, las marcaciones siguen pendientes:', error);
+  })
+  .finally(() => {
+    flushingPunches = false;
+    // Quedan más lotes: seguir mientras el servidor responda
+    if (sent && getPunchQueue().length) {
+      flushPunchQueue();
+    }
+  });
+}
@@ -0,0 +1,562 @@
+// Valores del servidor: atributos data-* de la etiqueta <script>
+const attendanceConfig = document.currentScript.dataset;
+
+// State management
+let currentState = 'out'; // 'in' or 'out'
+let currentEntryTime = null;
+let attendanceHistory = JSON.parse(localStorage.getItem('attendanceHistory')) || [];
+let currentView = 'dashboard';
+let charts = {}; // Store chart instances
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function () {
+    updateDateTime();
+    setInterval(updateDateTime, 1000);
+    connectDashboardStream();
+    initAttendanceTable();
+    checkTodayStatus();
+    updateHistoryDisplay();
+    initializeCharts();
+
+    // Handle date filter from URL parameters
+    const urlParams = new URLSearchParams(window.location.search);
+    const dateParam = urlParams.get('date');
+    if (dateParam) {
+        document.getElementById('filterDate').value = dateParam;
+    } else {
+    // Set today's date as default using local timezone
+    const today = new Date();
+    const year = today.getFullYear();
+    const month = String(today.getMonth() + 1).padStart(2, '0');
+    const day = String(today.getDate()).padStart(2, '0');
+    const dateString = `${year}-${month}-${day}`;
+    document.getElementById('filterDate').value = dateString;
+    }
+
+    // Handle window resize
+    window.addEventListener('resize', function () {
+        Object.values(charts).forEach(chart => {
+            if (chart && typeof chart.resize === 'function') {
+                chart.resize();
+            }
+        });
+    });
+});
+
+// Update date and time
+function updateDateTime() {
+    const now = new Date();
+    const dateOptions = { weekday: 'long', year: 'numeric', month: 'long', day: 'numeric' };
+    document.getElementById('currentDate').textContent = now.toLocaleDateString('es-ES', dateOptions);
+}
+
+// Contadores en vivo (SSE): el servidor los envía cuando se registra una entrada/salida
+function connectDashboardStream() {
+    // Solo aplica a la vista del día actual, las fechas pasadas no cambian
+    if (!window.EventSource || attendanceConfig.filtered === 'true') {
+        return;
+    }
+    const stream = new EventSource(attendanceConfig.eventsUrl);
+    stream.addEventListener('dashboard', function (event) {
+        const counters = JSON.parse(event.data);
+        document.getElementById('lateArrivalsCount').textContent = counters.late_arrivals;
+        document.getElementById('attendancePercentage').textContent = `${counters.attendance_percentage}%`;
+        document.getElementById('attendancePercentage').nextElementSibling.textContent =
+            `${counters.total} entradas, ${counters.open_shifts} en curso`;
+    });
+}
+
+// Show view
+function showView(view) {
+    currentView = view;
+    const dashboardView = document.getElementById('dashboardView');
+    const attendanceView = document.getElementById('attendanceView');
+    const dashboardLink = document.getElementById('dashboardLink');
+    const attendanceLink = document.getElementById('attendanceLink');
+
+    if (view === 'dashboard') {
+        dashboardView.classList.remove('hidden');
+        attendanceView.classList.add('hidden');
+        dashboardLink.classList.add('active');
+        attendanceLink.classList.remove('active');
+    } else {
+        dashboardView.classList.add('hidden');
+        attendanceView.classList.remove('hidden');
+        dashboardLink.classList.remove('active');
+        attendanceLink.classList.add('active');
+    }
+}
+
+// Check today's status
+function checkTodayStatus() {
+    const today = new Date().toDateString();
+    const todayRecord = attendanceHistory.find(record =>
+        new Date(record.date).toDateString() === today
+    );
+
+    if (todayRecord && todayRecord.entry && !todayRecord.exit) {
+        currentState = 'in';
+        currentEntryTime = new Date(todayRecord.entry);
+        updateUI();
+        startTimer();
+    } else if (todayRecord && todayRecord.entry && todayRecord.exit) {
+        updateTodaySummary(todayRecord);
+    }
+}
+
+// Toggle attendance
+function toggleAttendance() {
+    const now = new Date();
+    const today = now.toDateString();
+    let todayRecord = attendanceHistory.find(record =>
+        new Date(record.date).toDateString() === today
+    );
+
+    if (currentState === 'out') {
+        // Mark entry
+        currentState = 'in';
+        currentEntryTime = now;
+
+        if (!todayRecord) {
+            todayRecord = {
+                date: today,
+                entry: now.toISOString(),
+                exit: null,
+                totalHours: 0
+            };
+            attendanceHistory.unshift(todayRecord);
+        } else {
+            todayRecord.entry = now.toISOString();
+        }
+
+        showNotification('Entrada registrada', 'success');
+        startTimer();
+    } else {
+        // Mark exit
+        currentState = 'out';
+        const exitTime = now;
+
+        if (todayRecord) {
+            todayRecord.exit = exitTime.toISOString();
+            const hours = (exitTime - currentEntryTime) / (1000 * 60 * 60);
+            todayRecord.totalHours = hours;
+        }
+
+        showNotification('Salida registrada', 'info');
+        clearInterval(window.timerInterval);
+    }
+
+    localStorage.setItem('attendanceHistory', JSON.stringify(attendanceHistory));
+    updateUI();
+    updateHistoryDisplay();
+    updateTodaySummary(todayRecord);
+}
+
+// Update UI based on state
+function updateUI() {
+    const statusIcon = document.getElementById('statusIcon');
+    const statusText = document.getElementById('statusText');
+    const statusTime = document.getElementById('statusTime');
+    const actionButton = document.getElementById('actionButton');
+    const buttonText = document.getElementById('buttonText');
+
+    if (currentState === 'in') {
+        statusIcon.className = 'inline-flex items-center justify-center w-24 h-24 rounded-full bg-green-100 mb-4 transition-all duration-300 pulse-animation';
+        statusIcon.innerHTML = '<i class="fas fa-user-check text-4xl text-green-600"></i>';
+        statusText.textContent = 'Jornada en curso';
+        statusTime.textContent = `Entrada: ${currentEntryTime.toLocaleTimeString('es-ES')}`;
+        actionButton.className = 'px-8 py-4 bg-red-600 text-white font-semibold rounded-lg hover:bg-red-700 transform hover:scale-105 transition-all duration-200 shadow-lg';
+        buttonText.textContent = 'Marcar Salida';
+        actionButton.innerHTML = '<i class="fas fa-sign-out-alt mr-2"></i><span id="buttonText">Marcar Salida</span>';
+    } else {
+        statusIcon.className = 'inline-flex items-center justify-center w-24 h-24 rounded-full bg-gray-100 mb-4 transition-all duration-300';
+        statusIcon.innerHTML = '<i class="fas fa-user-clock text-4xl text-gray-400"></i>';
+        statusText.textContent = 'No has iniciado tu jornada';
+        statusTime.textContent = '';
+        actionButton.className = 'px-8 py-4 bg-blue-600 text-white font-semibold rounded-lg hover:bg-blue-700 transform hover:scale-105 transition-all duration-200 shadow-lg';
+        buttonText.textContent = 'Marcar Entrada';
+        actionButton.innerHTML = '<i class="fas fa-sign-in-alt mr-2"></i><span id="buttonText">Marcar Entrada</span>';
+    }
+}
+
+// Start timer
+function startTimer() {
+    window.timerInterval = setInterval(() => {
+        if (currentEntryTime) {
+            const now = new Date();
+            const diff = now - currentEntryTime;
+            const hours = Math.floor(diff / (1000 * 60 * 60));
+            const minutes = Math.floor((diff % (1000 * 60 * 60)) / (1000 * 60));
+            document.getElementById('hoursWorked').textContent = `${hours}h ${minutes}m`;
+        }
+    }, 1000);
+}
+
+// Update today's summary
+function updateTodaySummary(record) {
+    if (record && record.entry) {
+        document.getElementById('todayEntry').textContent = new Date(record.entry).toLocaleTimeString('es-ES', { hour: '2-digit', minute: '2-digit' });
+    }
+    if (record && record.exit) {
+        document.getElementById('todayExit').textContent = new Date(record.exit).toLocaleTimeString('es-ES', { hour: '2-digit', minute: '2-digit' });
+        const hours = Math.floor(record.totalHours);
+        const minutes = Math.round((record.totalHours - hours) * 60);
+        document.getElementById('hoursWorked').textContent = `${hours}h ${minutes}m`;
+    }
+}
+
+// Update history display
+function updateHistoryDisplay() {
+    const historyList = document.getElementById('historyList');
+    const emptyHistory = document.getElementById('emptyHistory');
+
+    if (attendanceHistory.length === 0) {
+        historyList.innerHTML = '';
+        emptyHistory.style.display = 'block';
+        return;
+    }
+
+    emptyHistory.style.display = 'none';
+    historyList.innerHTML = attendanceHistory.slice(0, 7).map(record => {
+        const date = new Date(record.date);
+        const entry = record.entry ? new Date(record.entry).toLocaleTimeString('es-ES', { hour: '2-digit', minute: '2-digit' }) : '--:--';
+        const exit = record.exit ? new Date(record.exit).toLocaleTimeString('es-ES', { hour: '2-digit', minute: '2-digit' }) : '--:--';
+        const totalHours = record.totalHours ? `${Math.floor(record.totalHours)}h ${Math.round((record.totalHours - Math.floor(record.totalHours)) * 60)}m` : '--';
+
+        return `
+            <div class="flex items-center justify-between p-4 bg-gray-50 rounded-lg hover:bg-gray-100 transition-colors slide-in">
+                <div class="flex items-center space-x-4">
+                    <div class="bg-white p-3 rounded-lg shadow-sm">
+                        <i class="fas fa-calendar-day text-gray-600"></i>
+                    </div>
+                    <div>
+                        <p class="font-medium text-gray-900">${date.toLocaleDateString('es-ES', { weekday: 'long', day: 'numeric', month: 'long' })}</p>
+                        <div class="flex items-center space-x-4 text-sm text-gray-600 mt-1">
+                            <span><i class="fas fa-sign-in-alt text-green-600 mr-1"></i> ${entry}</span>
+                            <span><i class="fas fa-sign-out-alt text-red-600 mr-1"></i> ${exit}</span>
+                        </div>
+                    </div>
+                </div>
+                <div class="text-right">
+                    <p class="text-sm text-gray-600">Total</p>
+                    <p class="font-semibold text-gray-900">${totalHours}</p>
+                </div>
+            </div>
+        `;
+    }).join('');
+}
+
+// Show notification
+function showNotification(message, type) {
+    const notification = document.getElementById('notification');
+    const notificationIcon = document.getElementById('notificationIcon');
+    const notificationText = document.getElementById('notificationText');
+    const notificationTime = document.getElementById('notificationTime');
+
+    const icons = {
+        success: '<i class="fas fa-check-circle text-green-600 text-xl"></i>',
+        info: '<i class="fas fa-info-circle text-blue-600 text-xl"></i>',
+        error: '<i class="fas fa-exclamation-circle text-red-600 text-xl"></i>'
+    };
+
+    notificationIcon.innerHTML = icons[type] || icons.info;
+    notificationText.textContent = message;
+    notificationTime.textContent = new Date().toLocaleTimeString('es-ES');
+
+    notification.classList.remove('translate-x-full');
+
+    setTimeout(() => {
+        notification.classList.add('translate-x-full');
+    }, 3000);
+}
+
+// Initialize charts
+function initializeCharts() {
+    // Attendance Chart
+    const attendanceCtx = document.getElementById('attendanceChart').getContext('2d');
+    charts.attendance = new Chart(attendanceCtx, {
+        type: 'bar',
+        data: {
+            labels: ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom'],
+            datasets: [{
+                label: 'Asistencia',
+                data: [18, 20, 19, 17, 20, 8, 5],
+                backgroundColor: 'rgba(37, 99, 235, 0.6)',
+                borderColor: 'rgba(37, 99, 235, 1)',
+                borderWidth: 1,
+                borderRadius: 4,
+                maxBarThickness: 50
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            interaction: {
+                intersect: false,
+            },
+            plugins: {
+                legend: {
+                    display: false
+                }
+            },
+            scales: {
+                x: {
+                    grid: {
+                        display: false
+                    },
+                    ticks: {
+                        font: {
+                            size: window.innerWidth < 768 ? 10 : 12
+                        }
+                    }
+                },
+                y: {
+                    beginAtZero: true,
+                    grid: {
+                        color: 'rgba(0, 0, 0, 0.05)'
+                    },
+                    ticks: {
+                        precision: 0,
+                        font: {
+                            size: window.innerWidth < 768 ? 10 : 12
+                        }
+                    }
+                }
+            },
+            elements: {
+                bar: {
+                    borderSkipped: false,
+                }
+            }
+        }
+    });
+
+    // Late Arrivals Chart
+    const lateArrivalsCtx = document.getElementById('lateArrivalsChart').getContext('2d');
+    charts.lateArrivals = new Chart(lateArrivalsCtx, {
+        type: 'doughnut',
+        data: {
+            labels: ['Juan P.', 'María G.', 'Carlos L.', 'Ana M.', 'Otros'],
+            datasets: [{
+                data: [3, 2, 4, 1, 2],
+                backgroundColor: [
+                    'rgba(239, 68, 68, 0.8)',
+                    'rgba(245, 158, 11, 0.8)',
+                    'rgba(16, 185, 129, 0.8)',
+                    'rgba(37, 99, 235, 0.8)',
+                    'rgba(139, 92, 246, 0.8)'
+                ],
+                borderColor: [
+                    'rgba(239, 68, 68, 1)',
+                    'rgba(245, 158, 11, 1)',
+                    'rgba(16, 185, 129, 1)',
+                    'rgba(37, 99, 235, 1)',
+                    'rgba(139, 92, 246, 1)'
+                ],
+                borderWidth: 2,
+                hoverOffset: 4
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    position: 'bottom',
+                    labels: {
+                        padding: 20,
+                        font: {
+                            size: window.innerWidth < 768 ? 10 : 12
+                        },
+                        generateLabels: function (chart) {
+                            const original = Chart.defaults.plugins.legend.labels.generateLabels;
+                            const labels = original.call(this, chart);
+
+                            labels.forEach((label, i) => {
+                                const value = chart.data.datasets[0].data[i];
+                                label.text = `${label.text}: ${value}`;
+                            });
+
+                            return labels;
+                        }
+                    }
+                },
+                tooltip: {
+                    callbacks: {
+                        label: function (context) {
+                            const label = context.label || '';
+                            const value = context.parsed;
+                            const total = context.dataset.data.reduce((a, b) => a + b, 0);
+                            const percentage = Math.round((value / total) * 100);
+                            return `${label}: ${value} (${percentage}%)`;
+                        }
+                    }
+                }
+            }
+        }
+    });
+}
+
+// Daily filter functions
+function filterByToday() {
+    const today = new Date();
+    const year = today.getFullYear();
+    const month = String(today.getMonth() + 1).padStart(2, '0');
+    const day = String(today.getDate()).padStart(2, '0');
+    const dateString = `${year}-${month}-${day}`;
+    document.getElementById('filterDate').value = dateString;
+    applyDateFilter();
+}
+
+function applyDateFilter() {
+    const selectedDate = document.getElementById('filterDate').value;
+    if (!selectedDate) {
+        showNotification('Por favor selecciona una fecha', 'error');
+        return;
+    }
+
+    // Ensure the date is in YYYY-MM-DD format before sending
+    const dateParts = selectedDate.split('-');
+    if (dateParts.length === 3) {
+        const year = dateParts[0];
+        const month = dateParts[1];
+        const day = dateParts[2];
+        const formattedDate = `${year}-${month}-${day}`;
+
+        // Reload the page with the selected date filter
+        const url = new URL(window.location);
+        url.searchParams.set('date', formattedDate);
+        window.location.href = url.toString();
+    }
+}
+
+function clearDateFilter() {
+    // Remove date parameter and reload
+    const url = new URL(window.location);
+    url.searchParams.delete('date');
+    window.location.href = url.toString();
+}
+
+// Tabla de registros: la primera página viene en el HTML; las siguientes (y
+// los cambios de orden o filtro) se piden a la API por cursor
+let tableCursor = null;
+let tableLoading = false;
+
+const STATUS_BADGES = {
+    late: '<span class="px-2 inline-flex text-xs leading-5 font-semibold rounded-full bg-red-100 text-red-800">Tardanza</span>',
+    on_time: '<span class="px-2 inline-flex text-xs leading-5 font-semibold rounded-full bg-green-100 text-green-800">A tiempo</span>',
+    in_progress: '<span class="px-2 inline-flex text-xs leading-5 font-semibold rounded-full bg-yellow-100 text-yellow-800">En curso</span>'
+};
+
+function initAttendanceTable() {
+    const tableBody = document.getElementById('attendanceTableBody');
+    tableCursor = tableBody.dataset.nextCursor || null;
+    updateTableFooter();
+}
+
+function updateTableFooter() {
+    const rows = document.querySelectorAll('#attendanceTableBody tr[data-row]').length;
+    document.getElementById('attendanceShown').textContent = rows;
+    document.getElementById('loadMoreAttendances').classList.toggle('hidden', !tableCursor);
+}
+
+function renderAttendanceRow(row) {
+    const tr = document.createElement('tr');
+    tr.className = 'hover:bg-gray-50';
+    tr.dataset.row = row.id;
+    tr.innerHTML = `
+        <td class="px-3 lg:px-6 py-4 whitespace-nowrap">
+            <div class="flex items-center">
+                <div class="flex-shrink-0 h-8 w-8 lg:h-10 lg:w-10">
+                    <div class="h-8 w-8 lg:h-10 lg:w-10 rounded-full bg-blue-100 flex items-center justify-center">
+                        <span class="text-blue-800 font-medium text-xs lg:text-sm" data-field="initial"></span>
+                    </div>
+                </div>
+                <div class="ml-2 lg:ml-4">
+                    <div class="text-sm font-medium text-gray-900" data-field="name"></div>
+                </div>
+            </div>
+        </td>
+        <td class="px-3 lg:px-6 py-4 whitespace-nowrap text-sm text-gray-500 hidden sm:table-cell">${row.date}</td>
+        <td class="px-3 lg:px-6 py-4 whitespace-nowrap">
+            <div class="text-sm text-gray-900">${row.entry_time}</div>
+        </td>
+        <td class="px-3 lg:px-6 py-4 whitespace-nowrap text-sm text-gray-500">
+            ${row.exit_time || '<span class="text-yellow-600">En curso</span>'}
+        </td>
+        <td class="px-3 lg:px-6 py-4 whitespace-nowrap text-sm text-gray-500 hidden md:table-cell">${row.duration || '--'}</td>
+        <td class="px-3 lg:px-6 py-4 whitespace-nowrap">${STATUS_BADGES[row.status === 'in_progress' ? 'in_progress' : (row.late ? 'late' : 'on_time')]}</td>`;
+    // El nombre viene del usuario: como texto, no como HTML
+    tr.querySelector('[data-field="initial"]').textContent = row.name.charAt(0);
+    tr.querySelector('[data-field="name"]').textContent = row.name;
+    return tr;
+}
+
+function fetchAttendancePage(cursor) {
+    const params = new URLSearchParams({
+        date: attendanceConfig.date,
+        sort: document.getElementById('tableSort').value,
+        status: document.getElementById('tableStatus').value,
+        late: document.getElementById('tableLate').value
+    });
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+    tableLoading = true;
+    return fetch(`${attendanceConfig.attendancesUrl}?${params}`, {
+        headers: { 'Accept': 'application/json' },
+        credentials: 'same-origin'
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.message);
+            }
+            return data;
+        })
+        .finally(() => {
+            tableLoading = false;
+        });
+}
+
+function appendAttendanceRows(rows) {
+    const tableBody = document.getElementById('attendanceTableBody');
+    const fragment = document.createDocumentFragment();
+    rows.forEach(row => fragment.appendChild(renderAttendanceRow(row)));
+    tableBody.appendChild(fragment);
+}
+
+function loadMoreAttendances() {
+    if (tableLoading || !tableCursor) {
+        return;
+    }
+    fetchAttendancePage(tableCursor)
+        .then(data => {
+            appendAttendanceRows(data.rows);
+            tableCursor = data.next_cursor;
+            updateTableFooter();
+        })
+        .catch(error => showNotification(`Error al cargar registros: ${error.message}`, 'error'));
+}
+
+function reloadAttendanceTable() {
+    fetchAttendancePage(null)
+        .then(data => {
+            const tableBody = document.getElementById('attendanceTableBody');
+            tableBody.innerHTML = '';
+            if (data.rows.length) {
+                appendAttendanceRows(data.rows);
+            } else {
+                tableBody.innerHTML = `
+                    <tr>
+                        <td colspan="6" class="px-6 py-4 text-center text-gray-500">
+                            <i class="fas fa-calendar-times text-2xl mb-2"></i>
+                            <p>No hay registros de asistencia disponibles</p>
+                        </td>
+                    </tr>`;
+            }
+            tableCursor = data.next_cursor;
+            updateTableFooter();
+        })
+        .catch(error => showNotification(`Error al cargar registros: ${error.message}`, 'error'));
+}
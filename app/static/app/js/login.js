@@ -0,0 +1,92 @@
+// Valores del servidor: atributos data-* de la etiqueta <script>
+const attendanceConfig = document.currentScript.dataset;
+
+// Toggle password visibility
+function togglePassword() {
+  const passwordInput = document.getElementById('password');
+  const passwordToggle = document.getElementById('passwordToggle');
+
+  if (passwordInput.type === 'password') {
+    passwordInput.type = 'text';
+    passwordToggle.classList.remove('fa-eye');
+    passwordToggle.classList.add('fa-eye-slash');
+  } else {
+    passwordInput.type = 'password';
+    passwordToggle.classList.remove('fa-eye-slash');
+    passwordToggle.classList.add('fa-eye');
+  }
+}
+
+// Handle login form submission
+function handleLogin(event) {
+  event.preventDefault();
+
+  const form = document.getElementById('loginForm');
+  const formData = new FormData(form);
+  const errorMessage = document.getElementById('errorMessage');
+  const successMessage = document.getElementById('successMessage');
+  const submitButton = form.querySelector('button[type="submit"]');
+
+  // Hide previous messages
+  errorMessage.classList.add('hidden');
+  successMessage.classList.add('hidden');
+
+  // Disable button and show loading state
+  submitButton.disabled = true;
+  submitButton.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i>Iniciando sesión...';
+
+  // Send form data to Django backend
+  fetch(attendanceConfig.loginUrl, {
+    method: 'POST',
+    body: formData,
+    headers: {
+      'X-Requested-With': 'XMLHttpRequest',
+    }
+  })
+  .then(response => {
+    if (response.redirected) {
+      // Si hay redirección, ir a la nueva página
+      window.location.href = response.url;
+      return;
+    }
+    return response.json();
+  })
+  .then(data => {
+    if (data && !data.success) {
+      // Show error with SweetAlert
+      Swal.fire({
+        icon: 'error',
+        title: 'Error de acceso',
+        text: data.message,
+        confirmButtonColor: '#dc2626',
+        confirmButtonText: 'Intentar de nuevo'
+      });
+      submitButton.disabled = false;
+      submitButton.innerHTML = '<i class="fas fa-sign-in-alt mr-2"></i>Iniciar Sesión';
+    }
+  })
+  .catch(error => {
+    console.error('Error:', error);
+    // Show error with SweetAlert
+    Swal.fire({
+      icon: 'error',
+      title: 'Error de conexión',
+      text: 'No se pudo conectar con el servidor. Inténtalo de nuevo.',
+      confirmButtonColor: '#dc2626',
+      confirmButtonText: 'Intentar de nuevo'
+    });
+    submitButton.disabled = false;
+    submitButton.innerHTML = '<i class="fas fa-sign-in-alt mr-2"></i>Iniciar Sesión';
+  });
+}
+
+// Add input focus effects
+document.querySelectorAll('input').forEach(input => {
+  input.addEventListener('focus', function () {
+    this.parentElement.classList.add('scale-[1.02]');
+  });
+
+  input.addEventListener('blur', function () {
+    this.parentElement.classList.remove('scale-[1.02]');
+  });
+});
@@ -1,3 +1,2957 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import logging
+import os
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.signals import request_finished, request_started
+from django.db import (
+    IntegrityError,
+    close_old_connections,
+    connection,
+    connections,
+    transaction,
+)
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app.models import (
+    ArchivedAttendance,
+    Attendance,
+    DailyAttendanceSummary,
+    Department,
+    PunchReceipt,
+    ScheduleRule,
+    Shift,
+    User,
+)
+from app.routers import (
+    PIN_COOKIE,
+    REPLICA_ALIAS,
+    ReplicaRouter,
+    primary_reads,
+    replica_reads,
+)
+from app.services.archive_service import ArchiveService
+from app.services.attendance_service import AttendanceService
+from app.services.dashboard_service import DashboardService
+from app.services.summary_service import SummaryService
+from app.services.export_service import ExportService
+from app.services.event_service import EventService
+from app.services import caching, localization
+from app.services.import_service import ImportService, PunchImportError
+from app.services.punch_batch_service import PunchBatchService
+from app.services.report_service import ReportService
+from app.services.schedule_service import ScheduleService
+from app.services.logging_config import (
+    SamplingFilter,
+    StructuredFormatter,
+    should_log,
+)
+
+
+class AttendanceQueryPlanTests(TestCase):
+    """
+    Verifica que las consultas del camino crítico usen el índice compuesto
+    (user, -entry_time) y no recorran todo el historial del usuario
+    """
+
+    INDEX_NAME = "attendance_user_entry_idx"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="Ana", email="ana@example.com")
+        other = User.objects.create(name="Luis", email="luis@example.com")
+        now = timezone.now()
+        Attendance.objects.bulk_create(
+            Attendance(
+                user=user,
+                entry_time=now - timedelta(days=day),
+                exit_time=now - timedelta(days=day) + timedelta(hours=8),
+            )
+            for user in (cls.user, other)
+            for day in range(1, 60)
+        )
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {self.INDEX_NAME}", plan)
+        self.assertNotIn("SCAN app_attendance", plan)
+        # El orden debe salir del índice, sin ordenar en una tabla temporal
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    @skipUnless(connection.vendor == "sqlite", "Plan de consulta específico de SQLite")
+    def test_today_attendance_uses_composite_index(self):
+        queryset = AttendanceService.get_today_attendance_queryset(self.user.id)
+        self.assertUsesIndex(queryset)
+
+    @skipUnless(connection.vendor == "sqlite", "Plan de consulta específico de SQLite")
+    def test_history_uses_composite_index(self):
+        queryset = Attendance.objects.filter(user_id=self.user.id).order_by(
+            "-entry_time"
+        )
+        self.assertUsesIndex(queryset)
+
+    @skipUnless(connection.vendor == "sqlite", "Plan de consulta específico de SQLite")
+    def test_history_range_uses_composite_index(self):
+        start, _ = AttendanceService.get_local_day_range(
+            AttendanceService.get_local_time().date() - timedelta(days=6)
+        )
+        _, end = AttendanceService.get_local_day_range(
+            AttendanceService.get_local_time().date()
+        )
+        queryset = Attendance.objects.filter(
+            user_id=self.user.id, entry_time__range=(start, end)
+        ).order_by("-entry_time")
+        self.assertUsesIndex(queryset)
+
+    def test_today_attendance_returns_latest_entry_of_local_day(self):
+        today_start, _ = AttendanceService.get_local_day_range(
+            AttendanceService.get_local_time().date()
+        )
+        first = Attendance.objects.create(
+            user=self.user, entry_time=today_start + timedelta(minutes=1)
+        )
+        self.assertEqual(
+            AttendanceService.get_user_today_attendance(self.user.id), first
+        )
+
+    def test_history_with_days_limits_to_local_range(self):
+        result = AttendanceService.get_attendance_history(self.user.id, days=7)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["total_records"], 6)
+        dates = [row["date"] for row in result["history"]]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+
+class AttendanceHistoryPaginationTests(TestCase):
+    """
+    Paginación por cursor del historial de asistencia
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            name="Ana", email="ana@example.com", password="secreto"
+        )
+        base = timezone.now() - timedelta(days=200)
+        # Dos registros por día con la misma hora de entrada para probar el desempate por id
+        Attendance.objects.bulk_create(
+            Attendance(user=cls.user, entry_time=base + timedelta(days=day // 2))
+            for day in range(45)
+        )
+
+    def login(self):
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session["user_name"] = self.user.name
+        session["user_email"] = self.user.email
+        session["is_logged_in"] = True
+        session.save()
+
+    def collect_pages(self, limit):
+        dates, cursor, pages = [], None, 0
+        while True:
+            page = AttendanceService.get_attendance_history_page(
+                self.user.id, cursor=cursor, limit=limit
+            )
+            self.assertTrue(page["success"])
+            self.assertLessEqual(len(page["history"]), limit)
+            dates.extend(row["date"] for row in page["history"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if not cursor:
+                self.assertFalse(page["has_more"])
+                return dates, pages
+
+    def test_pages_cover_every_record_once(self):
+        dates, pages = self.collect_pages(limit=10)
+        self.assertEqual(len(dates), 45)
+        self.assertEqual(pages, 5)
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_page_size_is_capped(self):
+        Attendance.objects.bulk_create(
+            Attendance(user=self.user, entry_time=timezone.now() - timedelta(hours=n))
+            for n in range(1, 120)
+        )
+        page = AttendanceService.get_attendance_history_page(self.user.id, limit=1000)
+        self.assertEqual(len(page["history"]), AttendanceService.HISTORY_MAX_PAGE_SIZE)
+        self.assertIsNotNone(page["next_cursor"])
+
+    def test_invalid_cursor_is_rejected(self):
+        page = AttendanceService.get_attendance_history_page(
+            self.user.id, cursor="no-es-un-cursor"
+        )
+        self.assertFalse(page["success"])
+        self.assertEqual(page["history"], [])
+
+    def test_api_returns_next_cursor(self):
+        self.login()
+        response = self.client.get("/api/attendance-history/", {"limit": 30})
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(len(data["history"]), 30)
+        self.assertIsNotNone(data["next_cursor"])
+
+        response = self.client.get(
+            "/api/attendance-history/", {"cursor": data["next_cursor"], "limit": 30}
+        )
+        data = response.json()
+        self.assertEqual(len(data["history"]), 15)
+        self.assertIsNone(data["next_cursor"])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class CurrentStatusCacheTests(TestCase):
+    """
+    Caché del estado del día: las consultas de estado no deben tocar la base
+    de datos mientras no haya una nueva entrada o salida
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="Ana", email="ana@example.com")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeated_polls_hit_cache(self):
+        with self.assertNumQueries(1):
+            first = AttendanceService.get_current_status(self.user.id)
+        with self.assertNumQueries(0):
+            second = AttendanceService.get_current_status(self.user.id)
+        self.assertEqual(first["status"], "out")
+        self.assertEqual(first, second)
+
+    def test_entry_updates_cached_status(self):
+        AttendanceService.get_current_status(self.user.id)
+        result = AttendanceService.register_entry(self.user.id)
+        self.assertTrue(result["success"])
+
+        with self.assertNumQueries(0):
+            status = AttendanceService.get_current_status(self.user.id)
+        self.assertEqual(status["status"], "in")
+        self.assertEqual(status["attendance_id"], result["attendance_id"])
+        self.assertTrue(status["can_register_exit"])
+
+    def test_in_progress_hours_are_computed_from_cached_entry(self):
+        attendance = Attendance.objects.create(
+            user=self.user, entry_time=timezone.now() - timedelta(minutes=90)
+        )
+        AttendanceService.set_today_snapshot(self.user.id, attendance)
+
+        with self.assertNumQueries(0):
+            status = AttendanceService.get_current_status(self.user.id)
+        self.assertEqual(status["status"], "in")
+        self.assertAlmostEqual(status["hours_worked"], 1.5, places=1)
+        self.assertEqual(status["hours_worked_display"], "1h 30m")
+
+    def test_exit_updates_cached_status(self):
+        AttendanceService.register_entry(self.user.id)
+        AttendanceService.get_current_status(self.user.id)
+        result = AttendanceService.register_exit(self.user.id)
+        self.assertTrue(result["success"])
+
+        with self.assertNumQueries(0):
+            status = AttendanceService.get_current_status(self.user.id)
+        self.assertEqual(status["status"], "completed")
+        self.assertFalse(status["can_register_entry"])
+        self.assertFalse(status["can_register_exit"])
+
+    def test_cached_status_matches_database(self):
+        AttendanceService.register_entry(self.user.id)
+        cached = AttendanceService.get_current_status(self.user.id)
+        AttendanceService.invalidate_today_snapshot(self.user.id)
+        fresh = AttendanceService.get_current_status(self.user.id)
+        cached.pop("hours_worked")
+        fresh.pop("hours_worked")
+        self.assertEqual(cached, fresh)
+
+    def test_cache_miss_does_not_overwrite_a_concurrent_punch(self):
+        read = AttendanceService.get_user_today_attendance
+
+        def punch_during_read(user_id):
+            # La marcación actualiza la caché después de la lectura
+            attendance = read(user_id)
+            AttendanceService.register_entry(user_id)
+            return attendance
+
+        with mock.patch.object(
+            AttendanceService,
+            "get_user_today_attendance",
+            side_effect=punch_during_read,
+        ):
+            stale = AttendanceService.get_today_snapshot(self.user.id)
+        self.assertIsNone(stale["attendance_id"])
+        self.assertEqual(
+            AttendanceService.get_current_status(self.user.id)["status"], "in"
+        )
+
+    def test_failed_punches_resync_the_cached_status(self):
+        AttendanceService.get_current_status(self.user.id)
+        # Jornada registrada por otro proceso: la caché de este sigue en "out"
+        attendance = Attendance.objects.create(
+            user=self.user,
+            work_date=localization.local_now().date(),
+            entry_time=timezone.now() - timedelta(seconds=2),
+            exit_time=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertFalse(AttendanceService.register_entry(self.user.id)["success"])
+        self.assertEqual(
+            AttendanceService.get_current_status(self.user.id)["status"], "completed"
+        )
+
+        attendance.exit_time = None
+        attendance.save()
+        AttendanceService.set_today_snapshot(self.user.id, attendance)
+        Attendance.objects.filter(id=attendance.id).update(exit_time=timezone.now())
+        self.assertFalse(AttendanceService.register_exit(self.user.id)["success"])
+        self.assertEqual(
+            AttendanceService.get_current_status(self.user.id)["status"], "completed"
+        )
+
+
+class AttendanceRegistrationTests(TestCase):
+    """
+    Registro de entrada/salida como transición de estado atómica
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="Ana", email="ana@example.com")
+
+    def setUp(self):
+        cache.clear()
+
+    def capture_statements(self, func, *args):
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args)
+        # Solo cuentan las sentencias sobre la tabla de asistencia; el resumen
+        # diario se prueba por separado
+        statements = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+            and "app_dailyattendancesummary" not in query["sql"]
+        ]
+        return result, statements
+
+    def test_entry_is_a_single_insert(self):
+        SummaryService.rebuild(AttendanceService.get_local_time().date())
+        result, statements = self.capture_statements(
+            AttendanceService.register_entry, self.user.id
+        )
+        self.assertTrue(result["success"])
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("INSERT"))
+
+    def test_exit_is_conditional_update_and_read(self):
+        AttendanceService.register_entry(self.user.id)
+        result, statements = self.capture_statements(
+            AttendanceService.register_exit, self.user.id
+        )
+        self.assertTrue(result["success"])
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[0].startswith("UPDATE"))
+        self.assertIn('"exit_time" IS NULL', statements[0])
+
+    def test_double_entry_is_rejected(self):
+        first = AttendanceService.register_entry(self.user.id)
+        second = AttendanceService.register_entry(self.user.id)
+        self.assertTrue(first["success"])
+        self.assertFalse(second["success"])
+        self.assertEqual(
+            second["message"],
+            "Ya tienes una jornada activa. Marca tu salida primero.",
+        )
+        self.assertEqual(Attendance.objects.filter(user=self.user).count(), 1)
+
+    def test_entry_after_completed_shift_is_rejected(self):
+        AttendanceService.register_entry(self.user.id)
+        AttendanceService.register_exit(self.user.id)
+        result = AttendanceService.register_entry(self.user.id)
+        self.assertFalse(result["success"])
+        self.assertEqual(result["message"], "Ya has completado tu jornada para hoy")
+
+    def test_exit_without_entry_is_rejected(self):
+        result = AttendanceService.register_exit(self.user.id)
+        self.assertFalse(result["success"])
+        self.assertEqual(result["message"], "Primero debes registrar tu entrada")
+
+    def test_double_exit_keeps_first_exit_time(self):
+        AttendanceService.register_entry(self.user.id)
+        AttendanceService.register_exit(self.user.id)
+        exit_time = Attendance.objects.get(user=self.user).exit_time
+        result = AttendanceService.register_exit(self.user.id)
+        self.assertFalse(result["success"])
+        self.assertEqual(result["message"], "Ya has registrado tu salida para hoy")
+        self.assertEqual(Attendance.objects.get(user=self.user).exit_time, exit_time)
+
+    def test_database_enforces_one_shift_per_day(self):
+        today = AttendanceService.get_local_time().date()
+        Attendance.objects.create(
+            user=self.user, entry_time=timezone.now(), work_date=today
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Attendance.objects.create(
+                user=self.user, entry_time=timezone.now(), work_date=today
+            )
+
+
+class ServiceLoggingTests(TestCase):
+    """
+    Logging estructurado y muestreado de los servicios
+    """
+
+    def make_record(self, level=logging.INFO, **extra):
+        record = logging.LogRecord(
+            "app.services.test", level, __file__, 1, "Mensaje %s", ("uno",), None
+        )
+        for key, value in extra.items():
+            setattr(record, key, value)
+        return record
+
+    def test_sampling_filter_keeps_one_of_every_n(self):
+        sampling_filter = SamplingFilter(sample_rate=0.25)
+        kept = [sampling_filter.filter(self.make_record()) for _ in range(100)]
+        self.assertEqual(sum(kept), 25)
+
+    def test_sampling_filter_always_keeps_warnings(self):
+        sampling_filter = SamplingFilter(sample_rate=0)
+        self.assertFalse(sampling_filter.filter(self.make_record()))
+        self.assertTrue(sampling_filter.filter(self.make_record(logging.WARNING)))
+
+    def test_should_log_samples_before_building_record(self):
+        test_logger = logging.getLogger("app.services.tests.sampled")
+        test_logger.setLevel(logging.INFO)
+        sampling_filter = SamplingFilter(sample_rate=0.5)
+        test_logger.addFilter(sampling_filter)
+        try:
+            decisions = [should_log(test_logger) for _ in range(10)]
+            self.assertEqual(sum(decisions), 5)
+            self.assertFalse(should_log(test_logger, logging.DEBUG))
+            # Un registro ya muestreado no se vuelve a filtrar
+            self.assertTrue(sampling_filter.filter(self.make_record(sampled=True)))
+        finally:
+            test_logger.removeFilter(sampling_filter)
+
+    def test_structured_formatter_appends_fields(self):
+        formatter = StructuredFormatter("%(levelname)s %(message)s")
+        line = formatter.format(
+            self.make_record(user_id=7, action="entry", duration_ms=1.5)
+        )
+        self.assertEqual(
+            line, "INFO Mensaje uno user_id=7 action=entry duration_ms=1.5"
+        )
+
+    def test_status_path_does_not_write_to_stdout(self):
+        cache.clear()
+        user = User.objects.create(name="Ana", email="ana@example.com")
+        AttendanceService.register_entry(user.id)
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            AttendanceService.get_current_status(user.id)
+            AttendanceService.get_user_today_attendance(user.id)
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_attendance_action_is_logged_with_structured_fields(self):
+        cache.clear()
+        user = User.objects.create(name="Ana", email="ana@example.com")
+        session = self.client.session
+        session["user_id"] = user.id
+        session["is_logged_in"] = True
+        session.save()
+
+        with self.assertLogs("app.services.attendance_service", "INFO") as logs:
+            self.client.post("/control-asistencia/", {"action": "entry"})
+        record = logs.records[-1]
+        self.assertEqual(record.action, "entry")
+        self.assertEqual(record.user_id, user.id)
+        self.assertTrue(record.success)
+        self.assertGreaterEqual(record.duration_ms, 0)
+
+
+class DashboardStatisticsTests(TestCase):
+    """
+    Estadísticas del dashboard calculadas con una consulta agregada
+    """
+
+    LOCAL_TIMES = [
+        (0, 10, 0),
+        (6, 55, 0),
+        (7, 29, 59),
+        (8, 30, 0),
+        (8, 30, 1),
+        (9, 15, 0),
+        (13, 0, 0),
+        (23, 50, 0),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        import pytz
+        from django.conf import settings
+
+        cls.local_tz = pytz.timezone(settings.TIME_ZONE)
+        cls.day = AttendanceService.get_local_time().date() - timedelta(days=3)
+        users = User.objects.bulk_create(
+            User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+            for n in range(len(cls.LOCAL_TIMES) + 2)
+        )
+        attendances = []
+        for user, (hour, minute, second) in zip(users, cls.LOCAL_TIMES):
+            local_entry = cls.local_tz.localize(
+                timezone.datetime.combine(
+                    cls.day, timezone.datetime.min.time()
+                ).replace(hour=hour, minute=minute, second=second)
+            )
+            attendances.append(Attendance(user=user, entry_time=local_entry))
+        # Registros del día anterior y siguiente que no deben contarse
+        for user, offset in zip(users[-2:], (-1, 1)):
+            local_entry = cls.local_tz.localize(
+                timezone.datetime.combine(
+                    cls.day + timedelta(days=offset), timezone.datetime.min.time()
+                ).replace(hour=9)
+            )
+            attendances.append(Attendance(user=user, entry_time=local_entry))
+        Attendance.objects.bulk_create(attendances)
+
+    def reference_statistics(self, local_date):
+        """
+        Lógica anterior del dashboard (recorrer cada registro en Python),
+        evaluada sobre la hora local
+        """
+        threshold = timezone.datetime.strptime("08:30", "%H:%M").time()
+        total = late = 0
+        for attendance in Attendance.objects.all():
+            local_entry = attendance.entry_time.astimezone(self.local_tz)
+            if local_entry.date() != local_date:
+                continue
+            total += 1
+            if local_entry.time() > threshold:
+                late += 1
+        return total, total - late, late
+
+    def test_statistics_match_python_loop(self):
+        # Reglas de horario compiladas antes de medir (una vez por proceso)
+        ScheduleService.get_schedule()
+        with self.assertNumQueries(1):
+            stats = AttendanceService.get_daily_statistics(self.day)
+        total, on_time, late = self.reference_statistics(self.day)
+        self.assertEqual(stats["total"], total)
+        self.assertEqual(stats["on_time"], on_time)
+        self.assertEqual(stats["late_arrivals"], late)
+        self.assertEqual((total, on_time, late), (8, 4, 4))
+
+    def test_statistics_for_empty_day(self):
+        stats = AttendanceService.get_daily_statistics(self.day - timedelta(days=30))
+        self.assertEqual(stats["total"], 0)
+        self.assertEqual(stats["attendance_percentage"], 0)
+
+    def test_dashboard_uses_aggregated_statistics(self):
+        cache.clear()
+        session = self.client.session
+        session["user_id"] = 0
+        session["user_email"] = "jefe@admin.com"
+        session["is_logged_in"] = True
+        session.save()
+        response = self.client.get("/dashboard/", {"date": self.day.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["daily_stats"]["total"], 8)
+        self.assertEqual(response.context["daily_stats"]["on_time"], 4)
+        self.assertEqual(response.context["daily_stats"]["late_arrivals"], 4)
+        self.assertEqual(response.context["daily_stats"]["attendance_percentage"], 50)
+
+
+class DailySummaryTests(TestCase):
+    """
+    Resumen diario mantenido de forma incremental en entrada/salida
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create(
+            User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+            for n in range(4)
+        )
+        cls.today = AttendanceService.get_local_time().date()
+
+    def setUp(self):
+        cache.clear()
+
+    def assertSummaryMatchesAttendance(self, local_date):
+        summary = DailyAttendanceSummary.objects.get(date=local_date)
+        stats = AttendanceService.get_daily_statistics(local_date)
+        for field in SummaryService.SUMMARY_FIELDS:
+            self.assertAlmostEqual(
+                getattr(summary, field), stats[field], places=2, msg=field
+            )
+
+    def test_punches_update_summary_incrementally(self):
+        for user in self.users:
+            AttendanceService.register_entry(user.id)
+        AttendanceService.register_exit(self.users[0].id)
+        AttendanceService.register_exit(self.users[1].id)
+
+        summary = DailyAttendanceSummary.objects.get(date=self.today)
+        self.assertEqual(summary.total, 4)
+        self.assertEqual(summary.open_shifts, 2)
+        self.assertEqual(summary.on_time + summary.late_arrivals, 4)
+        self.assertSummaryMatchesAttendance(self.today)
+
+    def test_existing_summary_is_updated_in_place(self):
+        AttendanceService.register_entry(self.users[0].id)
+        with CaptureQueriesContext(connection) as ctx:
+            AttendanceService.register_entry(self.users[1].id)
+        summary_statements = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if "app_dailyattendancesummary" in query["sql"]
+        ]
+        self.assertEqual(len(summary_statements), 1)
+        self.assertTrue(summary_statements[0].startswith("UPDATE"))
+
+    def test_failed_punch_does_not_change_summary(self):
+        AttendanceService.register_entry(self.users[0].id)
+        AttendanceService.register_entry(self.users[0].id)
+        AttendanceService.register_exit(self.users[1].id)
+        summary = DailyAttendanceSummary.objects.get(date=self.today)
+        self.assertEqual(summary.total, 1)
+        self.assertEqual(summary.open_shifts, 1)
+
+    def test_get_summary_reads_a_single_row(self):
+        AttendanceService.register_entry(self.users[0].id)
+        with self.assertNumQueries(1):
+            stats = SummaryService.get_summary(self.today)
+        self.assertEqual(stats["total"], 1)
+
+    def test_past_day_without_summary_is_rebuilt_once(self):
+        past = self.today - timedelta(days=10)
+        start, _ = AttendanceService.get_local_day_range(past)
+        Attendance.objects.create(
+            user=self.users[0],
+            entry_time=start + timedelta(hours=7),
+            exit_time=start + timedelta(hours=15, minutes=30),
+        )
+        stats = SummaryService.get_summary(past)
+        self.assertEqual(stats["total"], 1)
+        self.assertEqual(stats["total_hours"], 8.5)
+        with self.assertNumQueries(1):
+            SummaryService.get_summary(past)
+
+    def test_concurrent_first_entries_are_both_counted(self):
+        increment = SummaryService.increment
+
+        def race(local_date, increments):
+            if DailyAttendanceSummary.objects.filter(date=local_date).exists():
+                return increment(local_date, increments)
+            # El UPDATE no encuentra el resumen; antes del INSERT otro proceso
+            # lo crea con su propia entrada
+            DailyAttendanceSummary.objects.create(
+                date=local_date, total=1, on_time=1, open_shifts=1
+            )
+            return False
+
+        with mock.patch.object(SummaryService, "increment", side_effect=race):
+            AttendanceService.register_entry(self.users[1].id)
+        summary = DailyAttendanceSummary.objects.get(date=self.today)
+        self.assertEqual((summary.total, summary.open_shifts), (2, 2))
+        self.assertEqual(summary.on_time + summary.late_arrivals, 2)
+
+    def test_rebuild_recomputes_after_a_concurrent_insert(self):
+        AttendanceService.register_entry(self.users[0].id)
+        DailyAttendanceSummary.objects.all().delete()
+        # Primer intento: valores calculados sin los datos del otro proceso y
+        # conflicto en el INSERT; el segundo intento debe recalcular
+        compute = SummaryService.compute
+        values = [dict(compute(self.today), total=7), compute(self.today)]
+        create = DailyAttendanceSummary.objects.create
+        conflicts = [IntegrityError("UNIQUE constraint failed")]
+
+        def create_once(**kwargs):
+            if conflicts:
+                raise conflicts.pop()
+            return create(**kwargs)
+
+        with mock.patch.object(
+            SummaryService, "compute", side_effect=values
+        ) as patched, mock.patch.object(
+            DailyAttendanceSummary.objects, "create", side_effect=create_once
+        ):
+            SummaryService.rebuild(self.today)
+        self.assertEqual(patched.call_count, 2)
+        self.assertSummaryMatchesAttendance(self.today)
+
+    def test_rebuild_command_recomputes_range(self):
+        start, _ = AttendanceService.get_local_day_range(self.today - timedelta(days=2))
+        for offset, user in enumerate(self.users[:3]):
+            Attendance.objects.create(
+                user=user, entry_time=start + timedelta(days=offset % 2, hours=7)
+            )
+        DailyAttendanceSummary.objects.create(
+            date=self.today - timedelta(days=2), total=99
+        )
+
+        call_command(
+            "rebuild_daily_summary",
+            start=(self.today - timedelta(days=2)).isoformat(),
+            end=(self.today - timedelta(days=1)).isoformat(),
+            stdout=io.StringIO(),
+        )
+        self.assertEqual(
+            DailyAttendanceSummary.objects.get(
+                date=self.today - timedelta(days=2)
+            ).total,
+            2,
+        )
+        self.assertEqual(
+            DailyAttendanceSummary.objects.get(
+                date=self.today - timedelta(days=1)
+            ).total,
+            1,
+        )
+
+
+class AttendanceExportTests(TestCase):
+    """
+    Exportación en streaming de registros de asistencia
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = AttendanceService.get_local_time().date() - timedelta(days=5)
+        start, _ = AttendanceService.get_local_day_range(cls.day)
+        users = User.objects.bulk_create(
+            User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+            for n in range(7)
+        )
+        # Varias entradas con la misma hora para probar el desempate por id
+        Attendance.objects.bulk_create(
+            Attendance(
+                user=user,
+                entry_time=start + timedelta(hours=7 + n // 3),
+                exit_time=start + timedelta(hours=15 + n // 3) if n % 2 else None,
+            )
+            for n, user in enumerate(users)
+        )
+        # Fuera del rango
+        Attendance.objects.create(user=users[0], entry_time=start - timedelta(hours=1))
+
+    def login(self, email):
+        session = self.client.session
+        session["user_id"] = 0
+        session["user_email"] = email
+        session["is_logged_in"] = True
+        session.save()
+
+    def test_chunks_cover_range_once(self):
+        with self.assertNumQueries(3):
+            chunks = list(
+                ExportService.iter_attendance_chunks(self.day, self.day, chunk_size=3)
+            )
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+        ids = [row[0] for chunk in chunks for row in chunk]
+        self.assertEqual(len(set(ids)), 7)
+
+    def test_csv_export_streams_local_times(self):
+        self.login("jefe@admin.com")
+        response = self.client.get(
+            "/dashboard/export/", {"start": self.day.isoformat(), "format": "csv"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        lines = content.strip().splitlines()
+        self.assertEqual(lines[0], ",".join(ExportService.COLUMNS))
+        self.assertEqual(len(lines), 8)
+        first = lines[1].split(",")
+        self.assertEqual(first[4], self.day.isoformat())
+        self.assertTrue(first[5].startswith(f"{self.day.isoformat()}T07:00:00-06:00"))
+
+    def test_ndjson_export(self):
+        self.login("jefe@admin.com")
+        response = self.client.get(
+            "/dashboard/export/",
+            {
+                "start": self.day.isoformat(),
+                "end": self.day.isoformat(),
+                "format": "ndjson",
+            },
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(len(rows), 7)
+        completed = [row for row in rows if row["exit_time"]]
+        self.assertTrue(all(row["hours_worked"] == 8 for row in completed))
+        self.assertTrue(
+            all(row["hours_worked"] is None for row in rows if not row["exit_time"])
+        )
+
+    async def test_asgi_export_is_an_async_stream(self):
+        await sync_to_async(self.login)("jefe@admin.com")
+        self.async_client.cookies = self.client.cookies
+        response = await self.async_client.get(
+            "/dashboard/export/", {"start": self.day.isoformat(), "format": "csv"}
+        )
+        self.assertEqual(response.status_code, 200)
+        # Un iterador asíncrono evita que Django acumule la exportación completa
+        self.assertTrue(response.is_async)
+        content = b"".join([part async for part in response.streaming_content])
+        expected = await sync_to_async(
+            lambda: "".join(ExportService.stream("csv", self.day, self.day))
+        )()
+        self.assertEqual(content.decode(), expected)
+        self.assertEqual(len(expected.strip().splitlines()), 8)
+
+    def test_export_requires_admin(self):
+        self.login("empleado@example.com")
+        response = self.client.get("/dashboard/export/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_range_is_rejected(self):
+        self.login("jefe@admin.com")
+        response = self.client.get(
+            "/dashboard/export/", {"start": "2025-02-10", "end": "2025-02-01"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class PunchImportTests(TestCase):
+    """
+    Importación masiva de marcaciones (comando import_punches)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = AttendanceService.get_local_time().date() - timedelta(days=3)
+        cls.ana = User.objects.create(name="Ana", email="ana@example.com")
+        cls.luis = User.objects.create(name="Luis", email="luis@example.com")
+
+    def local(self, hour, minute=0, day=None):
+        return f"{(day or self.day).isoformat()} {hour:02d}:{minute:02d}:00"
+
+    def run_import(self, content, batch_size=None):
+        with self.assertLogs("app.services.import_service", "INFO"):
+            return ImportService(batch_size=batch_size).import_file(
+                io.StringIO(content)
+            )
+
+    def shift(self, user, day=None):
+        return Attendance.objects.get(user=user, work_date=day or self.day)
+
+    def test_untyped_punches_use_first_and_last_of_day(self):
+        stats = self.run_import(
+            "email,timestamp\n"
+            f"ana@example.com,{self.local(8, 5)}\n"
+            f"ANA@example.com,{self.local(12)}\n"
+            f"ana@example.com,{self.local(16, 30)}\n"
+            f"luis@example.com,{self.local(9)}\n"
+        )
+        self.assertEqual(stats["rows"], 4)
+        self.assertEqual(stats["created"], 2)
+
+        ana = self.shift(self.ana)
+        local_tz = AttendanceService.get_local_time().tzinfo
+        self.assertEqual(ana.entry_time.astimezone(local_tz).hour, 8)
+        self.assertEqual(ana.exit_time.astimezone(local_tz).hour, 16)
+        # Una sola marcación: jornada abierta
+        self.assertIsNone(self.shift(self.luis).exit_time)
+
+    def test_typed_punches_and_orphan_exits(self):
+        stats = self.run_import(
+            "user_id,timestamp,type\n"
+            f"{self.ana.id},{self.local(8)},entry\n"
+            f"{self.ana.id},{self.local(17)},salida\n"
+            f"{self.luis.id},{self.local(17)},out\n"
+        )
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["orphan_exits"], 1)
+        self.assertIsNotNone(self.shift(self.ana).exit_time)
+        self.assertFalse(Attendance.objects.filter(user=self.luis).exists())
+
+    def test_reimport_is_idempotent(self):
+        content = (
+            "email,timestamp\n"
+            f"ana@example.com,{self.local(8)}\n"
+            f"ana@example.com,{self.local(16)}\n"
+        )
+        self.run_import(content)
+        stats = self.run_import(content)
+        self.assertEqual(stats["created"], 0)
+        self.assertEqual(stats["updated"], 0)
+        self.assertEqual(stats["unchanged"], 1)
+        self.assertEqual(Attendance.objects.filter(user=self.ana).count(), 1)
+
+    def test_merges_with_existing_shift(self):
+        start, _ = AttendanceService.get_local_day_range(self.day)
+        Attendance.objects.create(
+            user=self.ana, work_date=self.day, entry_time=start + timedelta(hours=14)
+        )
+        stats = self.run_import(
+            "email,timestamp,type\n"
+            f"ana@example.com,{self.local(8)},entry\n"
+            f"ana@example.com,{self.local(17)},exit\n"
+        )
+        self.assertEqual(stats["updated"], 1)
+        # Se conserva la entrada más temprana (la importada) y se agrega la salida
+        ana = self.shift(self.ana)
+        self.assertEqual(ana.entry_time, start + timedelta(hours=8))
+        self.assertEqual(ana.exit_time, start + timedelta(hours=17))
+
+    def test_small_batches_split_a_shift(self):
+        # Con lotes de una jornada, la entrada y la salida de Ana se escriben en
+        # lotes distintos y deben combinarse con el registro ya guardado
+        next_day = self.day + timedelta(days=1)
+        stats = self.run_import(
+            "email,timestamp\n"
+            f"ana@example.com,{self.local(8)}\n"
+            f"luis@example.com,{self.local(8)}\n"
+            f"ana@example.com,{self.local(16)}\n"
+            f"ana@example.com,{self.local(8, day=next_day)}\n",
+            batch_size=1,
+        )
+        self.assertEqual(stats["batches"], 4)
+        self.assertEqual(stats["created"], 3)
+        self.assertEqual(stats["updated"], 1)
+        self.assertIsNotNone(self.shift(self.ana).exit_time)
+        self.assertEqual(Attendance.objects.count(), 3)
+
+    def test_invalid_rows_and_unknown_users_are_counted(self):
+        stats = self.run_import(
+            "email,timestamp\n"
+            f"ana@example.com,no-es-fecha\n"
+            f"nadie@example.com,{self.local(8)}\n"
+            "ana@example.com\n"
+            "\n"
+            f"ana@example.com,{self.local(8)}\n"
+        )
+        self.assertEqual(stats["rows"], 4)
+        self.assertEqual(stats["invalid"], 2)
+        self.assertEqual(stats["unknown_users"], 1)
+        self.assertEqual(stats["created"], 1)
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(PunchImportError):
+            ImportService().import_file(io.StringIO("correo,hora\n"))
+
+    def test_daily_summary_is_rebuilt(self):
+        self.run_import(
+            "email,timestamp\n"
+            f"ana@example.com,{self.local(8)}\n"
+            f"ana@example.com,{self.local(16)}\n"
+            f"luis@example.com,{self.local(9)}\n"
+        )
+        summary = DailyAttendanceSummary.objects.get(date=self.day)
+        self.assertEqual(summary.total, 2)
+        self.assertEqual(summary.late_arrivals, 1)
+        self.assertEqual(summary.open_shifts, 1)
+        self.assertEqual(summary.total_hours, 8)
+
+    def test_command_reports_throughput(self):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as file_obj:
+            file_obj.write(f"email,timestamp\nana@example.com,{self.local(8)}\n")
+        self.addCleanup(os.remove, file_obj.name)
+
+        output = io.StringIO()
+        with self.assertLogs("app.services.import_service", "INFO"):
+            call_command("import_punches", file_obj.name, stdout=output)
+        self.assertIn("Jornadas creadas: 1", output.getvalue())
+        self.assertIn("filas/s", output.getvalue())
+
+
+class ASGIStreamClient:
+    """
+    Cliente mínimo que habla ASGI directamente con la aplicación de asgi.py,
+    para probar respuestas en streaming (SSE) sin navegador ni servidor
+    """
+
+    def __init__(self, path, session_key=None):
+        self.path = path
+        self.session_key = session_key
+        self.buffer = ""
+        self.finished = False
+
+    async def open(self):
+        from sistema_entrada_salida.asgi import application
+
+        headers = [(b"host", b"testserver")]
+        if self.session_key:
+            headers.append((b"cookie", f"sessionid={self.session_key}".encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        await self.incoming.put({"type": "http.request", "body": b""})
+        self.task = asyncio.create_task(
+            application(scope, self.incoming.get, self.outgoing.put)
+        )
+        start = await asyncio.wait_for(self.outgoing.get(), timeout=5)
+        self.status_code = start["status"]
+        self.headers = {
+            name.decode().lower(): value.decode() for name, value in start["headers"]
+        }
+        return self
+
+    async def read_chunk(self, timeout=5):
+        message = await asyncio.wait_for(self.outgoing.get(), timeout=timeout)
+        self.buffer += message.get("body", b"").decode()
+        if not message.get("more_body", False):
+            self.finished = True
+
+    async def read_frame(self, timeout=5):
+        """
+        Devuelve el siguiente bloque SSE completo (texto hasta la línea en blanco)
+        """
+        while "\n\n" not in self.buffer:
+            if self.finished:
+                return None
+            await self.read_chunk(timeout)
+        frame, self.buffer = self.buffer.split("\n\n", 1)
+        return frame
+
+    async def read_event(self, timeout=5):
+        """
+        Devuelve el siguiente evento como (tipo, datos), omitiendo comentarios
+        y la línea retry
+        """
+        while True:
+            frame = await self.read_frame(timeout)
+            if frame is None:
+                return None
+            fields = dict(
+                line.split(": ", 1)
+                for line in frame.splitlines()
+                if not line.startswith(":")
+            )
+            if "event" in fields:
+                return fields["event"], json.loads(fields["data"])
+
+    async def close(self):
+        await self.incoming.put({"type": "http.disconnect"})
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class AttendanceEventStreamTests(TestCase):
+    """
+    Stream SSE de estado servido por asgi.py
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create(
+            name="Empleado", email="empleado@example.com"
+        )
+        cls.other = User.objects.create(name="Otro", email="otro@example.com")
+        cls.admin = User.objects.create(name="Jefe", email="jefe@admin.com")
+
+    def setUp(self):
+        cache.clear()
+        # Igual que el cliente de pruebas de Django: no cerrar la conexión de la
+        # transacción de la prueba al iniciar/terminar cada petición ASGI
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+
+    def create_session(self, user):
+        session = SessionStore()
+        session["user_id"] = user.id
+        session["user_name"] = user.name
+        session["user_email"] = user.email
+        session["is_logged_in"] = True
+        session.create()
+        return session.session_key
+
+    async def open_stream(self, user=None):
+        session_key = None
+        if user is not None:
+            session_key = await sync_to_async(self.create_session)(user)
+        return await ASGIStreamClient("/api/events/", session_key).open()
+
+    def register_entry(self, user):
+        # El evento se publica al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            return AttendanceService.register_entry(user.id)
+
+    def test_wsgi_request_closes_the_event_source(self):
+        # Con WSGI no hay stream: 204 y la página vuelve al sondeo
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = self.create_session(
+            self.employee
+        )
+        response = self.client.get("/api/events/")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    async def test_requires_authentication(self):
+        client = await self.open_stream()
+        self.assertEqual(client.status_code, 401)
+        await client.close()
+
+    async def test_pushes_status_only_on_change(self):
+        client = await self.open_stream(self.employee)
+        self.assertEqual(client.status_code, 200)
+        self.assertTrue(client.headers["content-type"].startswith("text/event-stream"))
+        event_type, status = await client.read_event()
+        self.assertEqual(event_type, "status")
+        self.assertEqual(status["status"], "out")
+
+        # El registro de otro usuario no genera eventos en este canal
+        await sync_to_async(self.register_entry)(self.other)
+        with self.assertRaises(asyncio.TimeoutError):
+            await client.read_event(timeout=0.2)
+
+        result = await sync_to_async(self.register_entry)(self.employee)
+        self.assertTrue(result["success"])
+        event_type, status = await client.read_event()
+        self.assertEqual(event_type, "status")
+        self.assertEqual(status["status"], "in")
+        self.assertEqual(status["attendance_id"], result["attendance_id"])
+
+        # Un intento fallido (segunda entrada) no cambia nada ni publica
+        await sync_to_async(self.register_entry)(self.employee)
+        with self.assertRaises(asyncio.TimeoutError):
+            await client.read_event(timeout=0.2)
+
+        await client.close()
+        channel = EventService.get_user_channel(self.employee.id)
+        self.assertFalse(EventService.get_broker().has_subscribers(channel))
+
+    async def test_admin_receives_dashboard_counters(self):
+        client = await self.open_stream(self.admin)
+        self.assertEqual((await client.read_event())[0], "status")
+        event_type, counters = await client.read_event()
+        self.assertEqual(event_type, "dashboard")
+        self.assertEqual(counters["total"], 0)
+
+        await sync_to_async(self.register_entry)(self.employee)
+        event_type, counters = await client.read_event()
+        self.assertEqual(event_type, "dashboard")
+        self.assertEqual(counters["total"], 1)
+        self.assertEqual(counters["open_shifts"], 1)
+        await client.close()
+
+    @override_settings(
+        ATTENDANCE_SSE_KEEPALIVE_SECONDS=0.05, ATTENDANCE_SSE_MAX_SECONDS=0.3
+    )
+    async def test_keepalive_and_max_duration(self):
+        client = await self.open_stream(self.employee)
+        self.assertEqual(await client.read_frame(), "retry: 5000")
+        self.assertEqual((await client.read_event())[0], "status")
+        self.assertEqual(await client.read_frame(), ": keepalive")
+
+        # Al cumplirse la duración máxima el servidor cierra el stream
+        while await client.read_frame() is not None:
+            pass
+        self.assertTrue(client.finished)
+        await client.close()
+
+    def test_publish_without_subscribers_does_no_work(self):
+        AttendanceService.register_entry(self.employee.id)
+        with self.assertNumQueries(0):
+            EventService.publish_attendance_change(self.employee.id)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class AsyncReadPathTests(TestCase):
+    """
+    Versiones asíncronas de las lecturas de estado e historial y de sus APIs
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="Ana", email="ana@example.com")
+        base = timezone.now() - timedelta(days=40)
+        Attendance.objects.bulk_create(
+            Attendance(
+                user=cls.user,
+                entry_time=base + timedelta(days=day),
+                exit_time=base + timedelta(days=day, hours=8),
+            )
+            for day in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self):
+        session = SessionStore()
+        session["user_id"] = self.user.id
+        session["user_name"] = self.user.name
+        session["user_email"] = self.user.email
+        session["is_logged_in"] = True
+        session.create()
+        self.async_client.cookies["sessionid"] = session.session_key
+
+    async def test_status_matches_sync_version(self):
+        expected = await sync_to_async(AttendanceService.get_current_status)(
+            self.user.id
+        )
+        await sync_to_async(AttendanceService.register_entry)(self.user.id)
+        status = await AttendanceService.aget_current_status(self.user.id)
+        self.assertEqual(expected["status"], "out")
+        self.assertEqual(status["status"], "in")
+
+        # Con la caché vaciada el estado se reconstruye con el ORM asíncrono
+        await sync_to_async(cache.clear)()
+        rebuilt = await AttendanceService.aget_current_status(self.user.id)
+        self.assertEqual(rebuilt["attendance_id"], status["attendance_id"])
+
+    async def test_history_pages_match_sync_version(self):
+        cursor, async_dates = None, []
+        while True:
+            page = await AttendanceService.aget_attendance_history_page(
+                self.user.id, cursor=cursor, limit=10
+            )
+            async_dates.extend(row["date"] for row in page["history"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(len(async_dates), 25)
+        sync_page = await sync_to_async(AttendanceService.get_attendance_history_page)(
+            self.user.id, limit=100
+        )
+        self.assertEqual(async_dates, [row["date"] for row in sync_page["history"]])
+
+        invalid = await AttendanceService.aget_attendance_history_page(
+            self.user.id, cursor="no-es-un-cursor"
+        )
+        self.assertFalse(invalid["success"])
+        self.assertEqual(invalid["message"], "Cursor inválido")
+
+    async def test_async_api_views(self):
+        response = await self.async_client.get("/api/current-status/")
+        self.assertFalse(response.json()["success"])
+
+        await sync_to_async(self.login)()
+        response = await self.async_client.get("/api/current-status/")
+        self.assertEqual(response.json()["status"]["status"], "out")
+
+        response = await self.async_client.get("/api/attendance-history/", {"limit": 5})
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(len(data["history"]), 5)
+        self.assertTrue(data["has_more"])
+
+
+class LocalizationTests(TestCase):
+    """
+    Capa compartida de zona horaria y formato en español
+    """
+
+    def test_format_time_matches_strftime(self):
+        base = timezone.now().replace(minute=0, second=0, microsecond=0)
+        for minutes in range(0, 24 * 60, 7):
+            value = localization.to_local(base + timedelta(minutes=minutes))
+            self.assertEqual(
+                localization.format_time(value), value.strftime("%I:%M %p")
+            )
+
+    def test_history_rows(self):
+        now = timezone.now()
+        local_today = localization.to_local(now).date()
+        start, _ = localization.local_day_range(local_today)
+        past = start - timedelta(days=3) + timedelta(hours=13, minutes=5)
+        rows = localization.serialize_history_rows(
+            [
+                (start + timedelta(hours=7), None),
+                (past, past + timedelta(hours=4, minutes=30)),
+                (past - timedelta(days=1), None),
+            ],
+            now=now,
+        )
+
+        self.assertEqual(rows[0]["status"], "in_progress")
+        self.assertEqual(rows[0]["entry_time"], "07:00 AM")
+
+        past_local = localization.to_local(past)
+        self.assertEqual(
+            rows[1],
+            {
+                "date": past_local.date().isoformat(),
+                "day_name": localization.DAY_NAMES[past_local.weekday()],
+                "day_number": past_local.day,
+                "month_name": localization.MONTH_NAMES[past_local.month - 1],
+                "entry_time": "01:05 PM",
+                "exit_time": "05:35 PM",
+                "hours_worked": 4.5,
+                "status": "completed",
+            },
+        )
+        self.assertEqual(rows[2]["status"], "incomplete")
+        self.assertEqual(rows[2]["hours_worked"], 0)
+
+    def test_spanish_names(self):
+        monday = timezone.datetime(2025, 8, 4).date()
+        self.assertEqual(localization.DAY_NAMES[monday.weekday()], "Lunes")
+        self.assertEqual(localization.MONTH_NAMES[monday.month - 1], "agosto")
+
+    def test_day_range_follows_time_zone_setting(self):
+        day = timezone.datetime(2025, 8, 4).date()
+        start, end = localization.local_day_range(day)
+        self.assertEqual(start.isoformat(), "2025-08-04T06:00:00+00:00")
+        self.assertEqual(end - start, timedelta(hours=23, minutes=59, seconds=59))
+
+        with override_settings(TIME_ZONE="Europe/Madrid"):
+            start, _ = localization.local_day_range(day)
+            self.assertEqual(start.isoformat(), "2025-08-03T22:00:00+00:00")
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class SessionQueryTests(TestCase):
+    """
+    Consultas por petición de sondeo según el backend de sesiones
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            name="Ana", email="ana@example.com", password="secreto"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self):
+        response = self.client.post(
+            "/", {"email": self.user.email, "password": "secreto"}
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def poll_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/current-status/")
+        self.assertTrue(response.json()["success"])
+        return len(queries)
+
+    def test_session_only_stores_current_user(self):
+        self.login()
+        self.assertEqual(
+            set(self.client.session.keys()), {"user_id", "user_name", "user_email"}
+        )
+
+    # Con una caché compartida el sondeo no lee la jornada del día (ver
+    # AttendanceService.aget_user_version); solo cuenta la sesión
+    @mock.patch("app.services.caching.is_shared", new=lambda alias="default": True)
+    def test_steady_state_poll_does_not_touch_database(self):
+        for engine in (
+            "django.contrib.sessions.backends.cached_db",
+            "django.contrib.sessions.backends.cache",
+            "django.contrib.sessions.backends.signed_cookies",
+        ):
+            with self.subTest(engine=engine), override_settings(SESSION_ENGINE=engine):
+                cache.clear()
+                self.client.cookies.clear()
+                self.login()
+                self.poll_queries()  # Calienta el estado del día en caché
+                self.assertEqual(self.poll_queries(), 0)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.db")
+    @mock.patch("app.services.caching.is_shared", new=lambda alias="default": True)
+    def test_database_sessions_cost_one_query_per_poll(self):
+        self.login()
+        self.poll_queries()
+        self.assertEqual(self.poll_queries(), 1)
+
+    def test_logout_ends_cached_session(self):
+        self.login()
+        self.poll_queries()
+        self.client.post("/logout/")
+        response = self.client.get("/api/current-status/")
+        self.assertFalse(response.json()["success"])
+
+
+class ViewQueryBudgetTests(TestCase):
+    """
+    Máximo de consultas SQL por vista con un volumen de datos realista
+    (cientos de empleados, meses de historial). Un N+1 o una lectura
+    duplicada en cualquier vista hace fallar estas pruebas
+    """
+
+    EMPLOYEES = 200
+    HISTORY_DAYS = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            name="Ana", email="ana@example.com", password="secreto"
+        )
+        cls.admin = User.objects.create(
+            name="Admin", email="jefe@admin.com", password="secreto"
+        )
+        employees = [cls.user] + User.objects.bulk_create(
+            User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+            for n in range(cls.EMPLOYEES - 1)
+        )
+
+        cls.today = localization.local_now().date()
+        cls.past_date = cls.today - timedelta(days=7)
+        records = []
+        for days_ago in range(1, cls.HISTORY_DAYS + 1):
+            day = cls.today - timedelta(days=days_ago)
+            for n, employee in enumerate(employees):
+                entry = localization.local_to_utc(
+                    day, (datetime.min + timedelta(hours=7, minutes=n % 120)).time()
+                )
+                records.append(
+                    Attendance(
+                        user=employee,
+                        work_date=day,
+                        entry_time=entry,
+                        exit_time=entry + timedelta(hours=8),
+                    )
+                )
+        # Hoy: la mayoría ya entró y Ana no, para poder registrar su entrada
+        now = timezone.now()
+        records.extend(
+            Attendance(user=employee, work_date=cls.today, entry_time=now)
+            for employee in employees[1:150]
+        )
+        Attendance.objects.bulk_create(records, batch_size=2000)
+        for day in (cls.today, cls.past_date):
+            SummaryService.rebuild(day)
+
+    def setUp(self):
+        cache.clear()
+        # Las reglas de horario se compilan una vez por proceso, no por petición
+        ScheduleService.get_schedule()
+
+    def login(self, user):
+        response = self.client.post("/", {"email": user.email, "password": "secreto"})
+        self.assertEqual(response.status_code, 302)
+
+    def assertMaxQueries(self, budget, method, path, data=None):
+        """
+        Ejecuta la petición y verifica que no supere el presupuesto de
+        consultas; al fallar muestra el SQL ejecutado
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path, data or {})
+        # Los SAVEPOINT vienen de la transacción que envuelve cada prueba; en
+        # producción esos bloques son BEGIN/COMMIT y no cuentan como consultas
+        executed = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        self.assertLessEqual(
+            len(executed),
+            budget,
+            f"{method.upper()} {path}: {len(executed)} consultas "
+            f"(máximo {budget})\n" + "\n".join(executed),
+        )
+        return response
+
+    def test_login(self):
+        # Usuario + comprobación de la clave de sesión + INSERT de la sesión
+        response = self.assertMaxQueries(
+            3, "post", "/", {"email": self.user.email, "password": "secreto"}
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_control_asistencia_get(self):
+        self.login(self.user)
+        # Jornada de hoy (luego en caché) + una página del historial
+        response = self.assertMaxQueries(2, "get", "/control-asistencia/")
+        self.assertEqual(response.status_code, 200)
+        # Con el estado del día en caché solo queda el historial
+        self.assertMaxQueries(1, "get", "/control-asistencia/")
+
+    def test_control_asistencia_post(self):
+        self.login(self.user)
+        # INSERT de la jornada + UPDATE del resumen
+        response = self.assertMaxQueries(
+            2, "post", "/control-asistencia/", {"action": "entry"}
+        )
+        self.assertTrue(response.json()["success"])
+        # UPDATE condicional + lectura del registro + UPDATE del resumen
+        response = self.assertMaxQueries(
+            3, "post", "/control-asistencia/", {"action": "exit"}
+        )
+        self.assertTrue(response.json()["success"])
+        # Una salida repetida: UPDATE sin efecto + lectura de la jornada para
+        # explicar el motivo
+        response = self.assertMaxQueries(
+            2, "post", "/control-asistencia/", {"action": "exit"}
+        )
+        self.assertFalse(response.json()["success"])
+
+    def test_status_api(self):
+        self.login(self.user)
+        # Caché del proceso: el sello de la jornada del día (una consulta por
+        # índice) también carga el estado del día
+        self.assertMaxQueries(1, "get", "/api/current-status/")
+        response = self.assertMaxQueries(1, "get", "/api/current-status/")
+        self.assertEqual(response.json()["status"]["status"], "out")
+        with mock.patch("app.services.caching.is_shared", return_value=True):
+            response = self.assertMaxQueries(0, "get", "/api/current-status/")
+        self.assertEqual(response.json()["status"]["status"], "out")
+
+    def test_history_api(self):
+        self.login(self.user)
+        # Sello de la jornada del día (caché del proceso) + una página
+        response = self.assertMaxQueries(2, "get", "/api/attendance-history/")
+        data = response.json()
+        self.assertTrue(data["has_more"])
+        with mock.patch("app.services.caching.is_shared", return_value=True):
+            self.assertMaxQueries(
+                1, "get", "/api/attendance-history/", {"cursor": data["next_cursor"]}
+            )
+
+    def test_dashboard_today(self):
+        self.login(self.admin)
+        # Primera página del día (con usuario en el mismo JOIN) + resumen del día
+        response = self.assertMaxQueries(2, "get", "/dashboard/")
+        self.assertEqual(response.context["daily_stats"]["total"], 149)
+
+    def test_dashboard_with_date(self):
+        self.login(self.admin)
+        # Solo la primera página del día filtrado, sin importar cuántos registros
+        response = self.assertMaxQueries(
+            2, "get", "/dashboard/", {"date": self.past_date.isoformat()}
+        )
+        page = response.context["attendance_page"]
+        self.assertEqual(len(page["rows"]), DashboardService.PAGE_SIZE)
+        self.assertTrue(page["has_more"])
+
+    def test_dashboard_attendances_api_page(self):
+        self.login(self.admin)
+        response = self.assertMaxQueries(
+            1,
+            "get",
+            "/api/dashboard/attendances/",
+            {"date": self.past_date.isoformat(), "limit": 150},
+        )
+        data = response.json()
+        self.assertEqual(len(data["rows"]), 150)
+        self.assertMaxQueries(
+            1,
+            "get",
+            "/api/dashboard/attendances/",
+            {"date": self.past_date.isoformat(), "cursor": data["next_cursor"]},
+        )
+
+
+class ReplicaRoutingTests(TestCase):
+    """
+    Router de réplica con dos bases SQLite: la réplica es un archivo aparte
+    sin replicación, así que lo que lee cada vista muestra a qué alias fue
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # El alias se agrega después de preparar la base de prueba: el runner
+        # no crea la réplica, que es un archivo SQLite propio de esta clase
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings[REPLICA_ALIAS] = connections.configure_settings(
+            {
+                "default": connections.settings["default"],
+                REPLICA_ALIAS: {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": os.path.join(cls.replica_dir.name, "replica.sqlite3"),
+                },
+            }
+        )[REPLICA_ALIAS]
+        cls.databases = {"default", REPLICA_ALIAS}
+        call_command("migrate", database=REPLICA_ALIAS, verbosity=0)
+        # La réplica "va atrasada": tiene los usuarios pero ninguna jornada
+        User.objects.using(REPLICA_ALIAS).bulk_create(
+            User(id=user.id, name=user.name, email=user.email)
+            for user in (cls.user, cls.admin)
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA_ALIAS].close()
+        del connections.settings[REPLICA_ALIAS]
+        cls.databases = {"default"}
+        cls.replica_dir.cleanup()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            name="Ana", email="ana@example.com", password="secreto"
+        )
+        cls.admin = User.objects.create(
+            name="Admin", email="jefe@admin.com", password="secreto"
+        )
+        yesterday = localization.local_now() - timedelta(days=1)
+        Attendance.objects.create(
+            user=cls.user,
+            work_date=yesterday.date(),
+            entry_time=yesterday,
+            exit_time=yesterday + timedelta(hours=8),
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Las reglas de horario se compilan una vez por proceso, no por petición
+        ScheduleService.get_schedule()
+
+    def login(self, user):
+        response = self.client.post("/", {"email": user.email, "password": "secreto"})
+        self.assertEqual(response.status_code, 302)
+
+    def history_dates(self):
+        return [
+            row["date"]
+            for row in self.client.get("/api/attendance-history/").json()["history"]
+        ]
+
+    def test_reads_outside_reporting_views_use_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Attendance), "default")
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Attendance), REPLICA_ALIAS)
+            self.assertEqual(Attendance.objects.count(), 0)
+            # Las sesiones no se leen de la réplica
+            self.assertEqual(
+                router.db_for_read(SessionStore.get_model_class()), "default"
+            )
+            with primary_reads():
+                self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_write_moves_following_reads_to_primary(self):
+        with replica_reads():
+            self.assertEqual(Attendance.objects.count(), 0)
+            User.objects.filter(id=self.user.id).update(name="Ana María")
+            self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_history_api_reads_replica(self):
+        self.login(self.user)
+        self.assertEqual(self.history_dates(), [])
+
+    def test_history_after_punch_is_sticky_to_primary(self):
+        self.login(self.user)
+        response = self.client.post("/control-asistencia/", {"action": "entry"})
+        self.assertTrue(response.json()["success"])
+        self.assertEqual(
+            response.cookies[PIN_COOKIE]["max-age"],
+            settings.ATTENDANCE_REPLICA_STICKY_SECONDS,
+        )
+        # Dentro de la ventana el historial incluye la marcación recién hecha
+        self.assertEqual(len(self.history_dates()), 2)
+
+        # Vencida la ventana (el navegador descarta la cookie) vuelve a la réplica
+        del self.client.cookies[PIN_COOKIE]
+        self.assertEqual(self.history_dates(), [])
+
+    def test_cached_dashboard_data_is_read_from_primary(self):
+        # Los fragmentos y los reportes cerrados se guardan en caché: una
+        # lectura atrasada de la réplica quedaría guardada
+        yesterday = (localization.local_now() - timedelta(days=1)).date()
+        DailyAttendanceSummary.objects.using(REPLICA_ALIAS).create(date=yesterday)
+        self.login(self.admin)
+        response = self.client.get("/dashboard/", {"date": yesterday.isoformat()})
+        self.assertEqual(len(response.context["attendance_page"]["rows"]), 1)
+        self.assertEqual(response.context["daily_stats"]["total"], 1)
+
+        last_week = yesterday - timedelta(days=7)
+        Attendance.objects.create(
+            user=self.admin,
+            work_date=last_week,
+            entry_time=localization.local_to_utc(last_week, datetime.min.time()),
+        )
+        with replica_reads():
+            report = ReportService.get_report("week", last_week)
+        self.assertEqual(report["totals"]["total"], 1)
+
+    def test_dashboard_pages_from_replica_have_no_etag(self):
+        yesterday = (localization.local_now() - timedelta(days=1)).date()
+        self.login(self.admin)
+        response = self.client.get(
+            "/api/dashboard/attendances/", {"date": yesterday.isoformat()}
+        )
+        self.assertEqual(response.json()["rows"], [])
+        self.assertNotIn("ETag", response)
+
+    def test_summary_rebuild_reads_and_writes_primary(self):
+        yesterday = (localization.local_now() - timedelta(days=1)).date()
+        with replica_reads():
+            summary = SummaryService.get_summary(yesterday)
+        self.assertEqual(summary["total"], 1)
+        self.assertEqual(DailyAttendanceSummary.objects.get(date=yesterday).total, 1)
+        self.assertFalse(DailyAttendanceSummary.objects.using(REPLICA_ALIAS).exists())
+
+
+class AttendanceArchiveTests(TestCase):
+    """
+    Archivo de jornadas antiguas y lecturas transparentes del historial y la
+    exportación
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="Ana", email="ana@example.com")
+        other = User.objects.create(name="Luis", email="luis@example.com")
+        cls.today = localization.local_now().date()
+        # 12 jornadas antiguas (fuera del horizonte de 365 días) y 8 recientes
+        cls.days_ago = list(range(1, 9)) + list(range(400, 412))
+        records = []
+        for user in (cls.user, other):
+            for days_ago in cls.days_ago:
+                day = cls.today - timedelta(days=days_ago)
+                entry = localization.local_to_utc(day, datetime.min.time()) + timedelta(
+                    hours=7
+                )
+                records.append(
+                    Attendance(
+                        user=user,
+                        work_date=day,
+                        entry_time=entry,
+                        exit_time=entry + timedelta(hours=8),
+                    )
+                )
+        Attendance.objects.bulk_create(records)
+
+    def archive(self, *args):
+        output = io.StringIO()
+        with self.assertLogs("app.services.archive_service", "INFO"):
+            call_command("archive_attendance", *args, stdout=output)
+        return output.getvalue()
+
+    def history_dates(self, limit):
+        cursor, dates = None, []
+        while True:
+            page = AttendanceService.get_attendance_history_page(
+                self.user.id, cursor=cursor, limit=limit
+            )
+            dates.extend(row["date"] for row in page["history"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return dates
+
+    def test_archive_moves_old_records_in_batches(self):
+        ids = set(
+            Attendance.objects.filter(
+                entry_time__lt=ArchiveService.get_cutoff()
+            ).values_list("id", flat=True)
+        )
+        output = self.archive("--batch-size", "5")
+        self.assertIn("Jornadas archivadas: 24 en 5 lote(s)", output)
+        self.assertEqual(Attendance.objects.count(), 16)
+        self.assertEqual(
+            set(ArchivedAttendance.objects.values_list("id", flat=True)), ids
+        )
+        # Volver a ejecutar no encuentra nada que mover
+        self.assertIn("Jornadas archivadas: 0", self.archive())
+
+    def test_archive_deletes_without_per_row_signals(self):
+        with mock.patch.object(
+            DashboardService, "invalidate_dates"
+        ) as invalidate, mock.patch.object(
+            ReportService, "invalidate_dates"
+        ) as invalidate_reports:
+            self.archive("--batch-size", "10")
+        # Una invalidación por lote (24 jornadas en 3 lotes), ninguna por fila
+        self.assertEqual(invalidate.call_count, 3)
+        self.assertEqual(invalidate_reports.call_count, 3)
+        self.assertFalse(
+            Attendance.objects.filter(
+                entry_time__lt=ArchiveService.get_cutoff()
+            ).exists()
+        )
+
+        # Fuera del archivado los receptores siguen invalidando por fila
+        with mock.patch.object(DashboardService, "invalidate_dates") as invalidate:
+            Attendance.objects.first().delete()
+        invalidate.assert_called_once()
+
+    def test_archived_days_keep_their_summary_and_table(self):
+        day = self.today - timedelta(days=400)
+        before = SummaryService.rebuild(day)
+        self.assertEqual(before.total, 2)
+        page = DashboardService.get_attendance_page(day)
+        self.archive()
+
+        after = SummaryService.rebuild(day)
+        self.assertEqual((after.total, after.open_shifts), (2, 0))
+        self.assertEqual(after.total_hours, before.total_hours)
+        DailyAttendanceSummary.objects.all().delete()
+        self.assertEqual(SummaryService.get_summary(day)["total"], 2)
+        self.assertEqual(DashboardService.get_attendance_page(day), page)
+        first = DashboardService.get_attendance_page(day, limit=1)
+        second = DashboardService.get_attendance_page(
+            day, cursor=first["next_cursor"], limit=1
+        )
+        self.assertEqual(first["rows"] + second["rows"], page["rows"])
+
+    def test_reimport_merges_into_archived_days(self):
+        day = self.today - timedelta(days=400)
+        self.archive()
+        archived = ArchivedAttendance.objects.get(user=self.user, work_date=day)
+        earlier = archived.entry_time - timedelta(hours=1)
+        content = (
+            "email,timestamp,type\n"
+            f"{self.user.email},{archived.entry_time.isoformat()},entry\n"
+            f"{self.user.email},{earlier.isoformat()},entry\n"
+            f"{self.user.email},{archived.exit_time.isoformat()},exit\n"
+        )
+        with self.assertLogs("app.services.import_service", "INFO"):
+            stats = ImportService().import_file(io.StringIO(content))
+
+        # La jornada archivada se actualiza; no se crea otra en la tabla caliente
+        self.assertEqual((stats["created"], stats["updated"]), (0, 1))
+        self.assertFalse(Attendance.objects.filter(work_date=day).exists())
+        archived.refresh_from_db()
+        self.assertEqual(archived.entry_time, earlier)
+        self.assertEqual(SummaryService.get_summary(day)["total"], 2)
+        with self.assertLogs("app.services.import_service", "INFO"):
+            stats = ImportService().import_file(io.StringIO(content))
+        self.assertEqual((stats["created"], stats["unchanged"]), (0, 1))
+
+    def test_refuses_to_archive_inside_horizon(self):
+        with self.assertRaises(CommandError):
+            call_command("archive_attendance", "--days", "30")
+        self.assertFalse(ArchivedAttendance.objects.exists())
+
+    def test_history_pages_cross_into_archive(self):
+        expected = self.history_dates(limit=5)
+        self.archive()
+        self.assertEqual(self.history_dates(limit=5), expected)
+        self.assertEqual(len(expected), 20)
+
+        # Las páginas recientes no consultan el archivo
+        with self.assertNumQueries(1):
+            page = AttendanceService.get_attendance_history_page(self.user.id, limit=5)
+        self.assertTrue(page["has_more"])
+
+    async def test_async_history_page_reads_archive(self):
+        await sync_to_async(self.archive)()
+        page = await AttendanceService.aget_attendance_history_page(
+            self.user.id, limit=15
+        )
+        self.assertEqual(len(page["history"]), 15)
+        self.assertEqual(
+            page["history"][-1]["date"],
+            (self.today - timedelta(days=406)).isoformat(),
+        )
+
+    def test_full_history_includes_archive_but_recent_range_does_not_query_it(self):
+        self.archive()
+        result = AttendanceService.get_attendance_history(self.user.id)
+        self.assertEqual(result["total_records"], 20)
+        self.assertEqual(
+            result["history"][-1]["date"],
+            (self.today - timedelta(days=411)).isoformat(),
+        )
+        with self.assertNumQueries(1):
+            result = AttendanceService.get_attendance_history(self.user.id, days=30)
+        self.assertEqual(result["total_records"], 8)
+
+    def test_export_merges_archive_in_order(self):
+        start = self.today - timedelta(days=420)
+        before = [
+            row
+            for chunk in ExportService.iter_attendance_chunks(start, self.today, 7)
+            for row in chunk
+        ]
+        self.archive()
+        # Bloques de cada tabla por separado: 24 archivadas + 16 recientes
+        with self.assertNumQueries(7):
+            chunks = list(ExportService.iter_attendance_chunks(start, self.today, 7))
+        self.assertEqual([len(chunk) for chunk in chunks], [7, 7, 7, 7, 7, 5])
+        self.assertEqual([row for chunk in chunks for row in chunk], before)
+
+
+class ScheduleRuleTests(TestCase):
+    """
+    Reglas de horario por turno, departamento y día de la semana compiladas
+    en ScheduleService
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = localization.local_now().date() - timedelta(days=3)
+        cls.other_day = cls.day + timedelta(days=1)
+        cls.night = Shift.objects.create(
+            name="Noche",
+            entry_time=datetime.strptime("22:00", "%H:%M").time(),
+            exit_time=datetime.strptime("06:00", "%H:%M").time(),
+            tolerance_minutes=15,
+            late_after=datetime.strptime("22:15", "%H:%M").time(),
+        )
+        cls.late_shift = Shift.objects.create(
+            name="Tarde",
+            entry_time=datetime.strptime("10:00", "%H:%M").time(),
+            exit_time=datetime.strptime("19:00", "%H:%M").time(),
+            late_after=datetime.strptime("10:30", "%H:%M").time(),
+        )
+        cls.support = Department.objects.create(name="Soporte")
+        cls.sales = Department.objects.create(name="Ventas")
+        cls.plain = User.objects.create(name="Ana", email="ana@example.com")
+        cls.support_user = User.objects.create(
+            name="Luis", email="luis@example.com", department=cls.support
+        )
+        cls.sales_user = User.objects.create(
+            name="Eva", email="eva@example.com", department=cls.sales
+        )
+
+    def tearDown(self):
+        # La reversión de la transacción de la prueba no emite señales
+        ScheduleService.invalidate()
+
+    def at(self, local_date, value):
+        return localization.local_to_utc(
+            local_date, datetime.strptime(value, "%H:%M:%S").time()
+        )
+
+    def test_default_schedule_keeps_standard_windows(self):
+        check = ScheduleService.is_outside_schedule
+        self.assertEqual(check("entry", self.at(self.day, "07:20:00")), (False, ""))
+        self.assertEqual(check("entry", self.at(self.day, "06:00:00")), (False, ""))
+        self.assertEqual(
+            check("entry", self.at(self.day, "07:30:01")),
+            (True, "Horario estándar de entrada: 07:00 AM"),
+        )
+        # La tolerancia también aplica antes de la salida
+        self.assertFalse(check("exit", self.at(self.day, "15:30:00"))[0])
+        self.assertFalse(check("exit", self.at(self.day, "18:00:00"))[0])
+        self.assertEqual(
+            check("exit", self.at(self.day, "18:00:01")),
+            (True, "Horario estándar de salida: 04:00 PM"),
+        )
+        self.assertFalse(ScheduleService.is_late(None, self.at(self.day, "08:30:00")))
+        self.assertTrue(ScheduleService.is_late(None, self.at(self.day, "08:30:01")))
+
+    def test_late_threshold_matches_sql_at_sub_second_precision(self):
+        on_time = self.at(self.day, "08:30:00")
+        late = on_time + timedelta(milliseconds=500)
+        Attendance.objects.bulk_create(
+            [
+                Attendance(user=self.plain, work_date=self.day, entry_time=on_time),
+                Attendance(user=self.support_user, work_date=self.day, entry_time=late),
+            ]
+        )
+        self.assertEqual(
+            ScheduleService.classify_late(
+                [(self.plain.id, on_time), (self.support_user.id, late)]
+            ),
+            [False, True],
+        )
+        self.assertEqual(
+            list(
+                Attendance.objects.filter(
+                    ScheduleService.late_arrival_filter(self.day)
+                ).values_list("user_id", flat=True)
+            ),
+            [self.support_user.id],
+        )
+        # Las estadísticas del día (rebuild del resumen) cuentan lo mismo
+        self.assertEqual(
+            AttendanceService.get_daily_statistics(self.day)["late_arrivals"], 1
+        )
+
+    def test_most_specific_rule_wins(self):
+        ScheduleRule.objects.create(shift=self.late_shift)
+        ScheduleRule.objects.create(shift=self.night, department=self.support)
+        ScheduleRule.objects.create(
+            shift=self.late_shift,
+            department=self.support,
+            weekday=self.other_day.weekday(),
+        )
+
+        def entry_time(user, local_date):
+            return ScheduleService.window_for(user.id, local_date).entry_time.hour
+
+        self.assertEqual(entry_time(self.plain, self.day), 10)
+        self.assertEqual(entry_time(self.sales_user, self.day), 10)
+        self.assertEqual(entry_time(self.support_user, self.day), 22)
+        self.assertEqual(entry_time(self.support_user, self.other_day), 10)
+
+        # Regla de día sin departamento: más específica que la general
+        ScheduleRule.objects.create(
+            shift=Shift.objects.create(name="Estándar"), weekday=self.day.weekday()
+        )
+        self.assertEqual(entry_time(self.plain, self.day), 7)
+        self.assertEqual(entry_time(self.plain, self.other_day), 10)
+        self.assertEqual(entry_time(self.support_user, self.day), 22)
+
+    def test_scope_is_unique_with_empty_fields(self):
+        ScheduleRule.objects.create(shift=self.late_shift)
+        ScheduleRule.objects.create(shift=self.night, department=self.support)
+        for duplicate in (
+            ScheduleRule(shift=self.night),
+            ScheduleRule(shift=self.late_shift, department=self.support),
+        ):
+            with self.assertRaises(ValidationError):
+                duplicate.full_clean()
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                duplicate.save()
+        # Otro día u otro departamento sí es otro alcance
+        ScheduleRule(shift=self.night, weekday=self.day.weekday()).full_clean()
+        ScheduleRule(shift=self.night, department=self.sales).full_clean()
+
+    def test_changes_recompile_the_schedule(self):
+        ScheduleRule.objects.create(shift=self.night, department=self.support)
+        self.assertEqual(
+            ScheduleService.window_for(self.support_user.id, self.day).entry_time.hour,
+            22,
+        )
+        self.night.entry_time = datetime.strptime("21:00", "%H:%M").time()
+        self.night.save()
+        self.assertEqual(
+            ScheduleService.window_for(self.support_user.id, self.day).entry_time.hour,
+            21,
+        )
+        self.plain.department = self.support
+        self.plain.save()
+        self.assertEqual(
+            ScheduleService.window_for(self.plain.id, self.day).entry_time.hour, 21
+        )
+
+    def test_lookups_do_not_query_once_compiled(self):
+        ScheduleRule.objects.create(shift=self.night, department=self.support)
+        ScheduleService.get_schedule()
+        entries = [
+            (user.id, self.at(self.day, f"{hour:02d}:{minute:02d}:00"))
+            for user in (self.plain, self.support_user, self.sales_user)
+            for hour in range(24)
+            for minute in (0, 15, 31, 45)
+        ]
+        with self.assertNumQueries(0):
+            flags = ScheduleService.classify_late(entries)
+            ScheduleService.is_outside_schedule(
+                "entry", entries[0][1], self.support_user.id
+            )
+        self.assertEqual(
+            flags,
+            [ScheduleService.is_late(user_id, entry) for user_id, entry in entries],
+        )
+        self.assertEqual(len(flags), 288)
+
+    def test_daily_statistics_and_dashboard_use_each_users_shift(self):
+        ScheduleRule.objects.create(shift=self.night, department=self.support)
+        ScheduleRule.objects.create(shift=self.late_shift, department=self.sales)
+        Attendance.objects.bulk_create(
+            [
+                # Estándar (8:30): tarde
+                Attendance(user=self.plain, entry_time=self.at(self.day, "09:00:00")),
+                # Noche (22:15): a tiempo
+                Attendance(
+                    user=self.support_user, entry_time=self.at(self.day, "22:10:00")
+                ),
+                # Tarde (10:30): a tiempo
+                Attendance(
+                    user=self.sales_user, entry_time=self.at(self.day, "09:55:00")
+                ),
+            ]
+        )
+        ScheduleService.get_schedule()
+        with self.assertNumQueries(1):
+            stats = AttendanceService.get_daily_statistics(self.day)
+        self.assertEqual((stats["total"], stats["late_arrivals"]), (3, 1))
+
+        session = self.client.session
+        session["user_id"] = 0
+        session["user_email"] = "jefe@admin.com"
+        session["is_logged_in"] = True
+        session.save()
+        response = self.client.get("/dashboard/", {"date": self.day.isoformat()})
+        flags = {
+            row["user_id"]: row["late"]
+            for row in response.context["attendance_page"]["rows"]
+        }
+        self.assertEqual(
+            flags,
+            {
+                self.plain.id: True,
+                self.support_user.id: False,
+                self.sales_user.id: False,
+            },
+        )
+        self.assertEqual(response.context["daily_stats"]["late_arrivals"], 1)
+
+    def test_summary_counts_late_arrival_with_users_shift(self):
+        cache.clear()
+        always_late = Shift.objects.create(
+            name="Madrugada", late_after=datetime.strptime("00:00", "%H:%M").time()
+        )
+        ScheduleRule.objects.create(shift=always_late, department=self.sales)
+        AttendanceService.register_entry(self.sales_user.id)
+        summary = DailyAttendanceSummary.objects.get(
+            date=localization.local_now().date()
+        )
+        self.assertEqual((summary.total, summary.late_arrivals), (1, 1))
+
+
+class AttendanceReportTests(TestCase):
+    """
+    Reportes semanales y mensuales con consultas agrupadas y caché de
+    periodos cerrados
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = localization.local_now().date()
+        cls.week_start, cls.week_end = ReportService.get_period_range(
+            "week", cls.today - timedelta(days=14)
+        )
+        cls.users = User.objects.bulk_create(
+            User(name=name, email=f"{name.lower()}@example.com")
+            for name in ("Ana", "Beto", "Carla")
+        )
+        # (usuario, día de la semana, entrada, horas trabajadas o None)
+        cls.shifts = [
+            (0, 0, "07:00", 8),
+            (0, 1, "08:45", 7.5),
+            (0, 2, "08:30", None),
+            (1, 0, "09:00", 8),
+            (1, 4, "07:55", 9),
+            (2, 6, "23:30", 0.25),
+        ]
+        records = []
+        for user_index, offset, entry, hours in cls.shifts:
+            day = cls.week_start + timedelta(days=offset)
+            entry_time = localization.local_to_utc(
+                day, datetime.strptime(entry, "%H:%M").time()
+            )
+            records.append(
+                Attendance(
+                    user=cls.users[user_index],
+                    work_date=day,
+                    entry_time=entry_time,
+                    exit_time=(
+                        entry_time + timedelta(hours=hours)
+                        if hours is not None
+                        else None
+                    ),
+                )
+            )
+        # Fuera del periodo: semana siguiente
+        records.append(
+            Attendance(
+                user=cls.users[2],
+                entry_time=localization.local_to_utc(
+                    cls.week_end + timedelta(days=1),
+                    datetime.strptime("07:00", "%H:%M").time(),
+                ),
+            )
+        )
+        Attendance.objects.bulk_create(records)
+
+    def setUp(self):
+        cache.clear()
+        ScheduleService.get_schedule()
+
+    def test_weekly_report_groups_by_day_and_employee(self):
+        with self.assertNumQueries(2):
+            report = ReportService.get_report(
+                "week", self.week_start + timedelta(days=3)
+            )
+
+        self.assertTrue(report["closed"])
+        self.assertEqual(
+            (report["start"], report["end"]), (self.week_start, self.week_end)
+        )
+        self.assertEqual(len(report["days"]), 7)
+        self.assertEqual(
+            [day["total"] for day in report["days"]], [2, 1, 1, 0, 1, 0, 1]
+        )
+        monday = report["days"][0]
+        self.assertEqual(
+            (monday["late_arrivals"], monday["on_time"], monday["employees"]), (1, 1, 2)
+        )
+        self.assertEqual(monday["on_time_rate"], 50.0)
+        self.assertEqual(report["days"][2]["incomplete"], 1)
+
+        ana, beto, carla = report["employees"]
+        self.assertEqual(
+            (ana["name"], ana["days"], ana["total_hours"]), ("Ana", 3, 15.5)
+        )
+        self.assertEqual((ana["late_arrivals"], ana["incomplete"]), (1, 1))
+        self.assertEqual((beto["late_arrivals"], beto["on_time_rate"]), (1, 50.0))
+        self.assertEqual((carla["days"], carla["late_arrivals"]), (1, 1))
+
+        totals = report["totals"]
+        self.assertEqual(
+            (totals["total"], totals["late_arrivals"], totals["incomplete"]), (6, 3, 1)
+        )
+        self.assertEqual(totals["total_hours"], 32.75)
+        self.assertEqual(totals["employees"], 3)
+
+    def test_closed_period_is_cached_and_current_period_recomputed(self):
+        past_month = self.today - timedelta(days=45)
+        ReportService.get_report("month", past_month)
+        ReportService.get_report("week", self.week_start)
+        with self.assertNumQueries(0):
+            ReportService.get_report("week", self.week_end)
+            ReportService.get_report("month", past_month.replace(day=1))
+
+        with self.assertNumQueries(2):
+            current = ReportService.get_report("week", self.today)
+        self.assertFalse(current["closed"])
+        with self.assertNumQueries(2):
+            ReportService.get_report("week", self.today)
+
+    def test_closed_period_expiry_depends_on_a_shared_cache(self):
+        # Una corrección hecha en otro proceso no invalida la caché del proceso:
+        # el reporte cerrado vence; en una caché compartida no vence
+        for shared, timeout in (
+            (False, settings.ATTENDANCE_LOCAL_CACHE_MAX_AGE),
+            (True, None),
+        ):
+            with mock.patch(
+                "app.services.caching.is_shared", return_value=shared
+            ), mock.patch.object(cache, "set") as cache_set:
+                ReportService.get_report("week", self.week_start - timedelta(days=7))
+            self.assertEqual(cache_set.call_args.args[2], timeout)
+
+    def test_corrections_invalidate_closed_periods(self):
+        report = ReportService.get_report("week", self.week_start)
+        self.assertEqual(report["totals"]["incomplete"], 1)
+
+        attendance = Attendance.objects.get(exit_time__isnull=True, user=self.users[0])
+        attendance.exit_time = attendance.entry_time + timedelta(hours=8)
+        attendance.save()
+
+        with self.assertNumQueries(2):
+            report = ReportService.get_report("week", self.week_start)
+        self.assertEqual(report["totals"]["incomplete"], 0)
+
+    def test_report_includes_archived_attendance(self):
+        old_day = self.today - timedelta(days=400)
+        entry_time = localization.local_to_utc(
+            old_day, datetime.strptime("08:00", "%H:%M").time()
+        )
+        Attendance.objects.create(
+            user=self.users[0],
+            work_date=old_day,
+            entry_time=entry_time,
+            exit_time=entry_time + timedelta(hours=8),
+        )
+        before = ReportService.build_report(
+            "month", *ReportService.get_period_range("month", old_day)
+        )
+        ArchiveService.archive()
+        self.assertFalse(Attendance.objects.filter(work_date=old_day).exists())
+
+        after = ReportService.build_report(
+            "month", *ReportService.get_period_range("month", old_day)
+        )
+        self.assertEqual(after["totals"], before["totals"])
+        self.assertEqual(after["totals"]["total_hours"], 8)
+
+    def test_reports_view(self):
+        session = self.client.session
+        session["user_id"] = 0
+        session["user_email"] = "jefe@admin.com"
+        session["is_logged_in"] = True
+        session.save()
+        response = self.client.get(
+            "/dashboard/reports/",
+            {"period": "week", "date": self.week_start.isoformat()},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["report"]["totals"]["total"], 6)
+        self.assertEqual(
+            response.context["previous_date"], self.week_start - timedelta(days=7)
+        )
+        self.assertContains(response, "Carla")
+
+        response = self.client.get("/dashboard/reports/", {"period": "month"})
+        self.assertEqual(response.context["period"], "month")
+        self.assertIsNone(response.context["next_date"])
+
+        # Fechas extremas o futuras: se muestra el periodo actual
+        current = ReportService.get_period_range("month", self.today)[0]
+        for value in ("0001-01-01", "9999-12-31", "1969-12-31"):
+            response = self.client.get(
+                "/dashboard/reports/", {"period": "month", "date": value}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context["report"]["start"], current)
+
+    def test_reports_view_requires_admin(self):
+        session = self.client.session
+        session["user_id"] = self.users[0].id
+        session["user_email"] = self.users[0].email
+        session["is_logged_in"] = True
+        session.save()
+        response = self.client.get("/dashboard/reports/")
+        self.assertEqual(response.status_code, 403)
+
+
+class ConditionalGetTests(TestCase):
+    """
+    ETag / If-None-Match en las APIs de estado e historial
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            name="Ana", email="ana@example.com", password="secreto"
+        )
+        cls.today = localization.local_now().date()
+        Attendance.objects.bulk_create(
+            Attendance(
+                user=cls.user,
+                work_date=day,
+                entry_time=localization.local_to_utc(
+                    day, datetime.strptime("07:00", "%H:%M").time()
+                ),
+                exit_time=localization.local_to_utc(
+                    day, datetime.strptime("15:00", "%H:%M").time()
+                ),
+            )
+            for day in (cls.today - timedelta(days=n) for n in range(1, 6))
+        )
+
+    def setUp(self):
+        cache.clear()
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session["user_email"] = self.user.email
+        session["is_logged_in"] = True
+        session.save()
+
+    def get(self, path, etag=None, **params):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(path, params, headers=headers)
+
+    def test_status_not_modified_until_punch(self):
+        response = self.get("/api/current-status/")
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        # Caché del proceso: una consulta por índice para el sello de la jornada
+        with self.assertNumQueries(1):
+            response = self.get("/api/current-status/", etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+        with mock.patch("app.services.caching.is_shared", return_value=True):
+            shared_etag = self.get("/api/current-status/")["ETag"]
+            with self.assertNumQueries(0):
+                response = self.get("/api/current-status/", shared_etag)
+        self.assertEqual(response.status_code, 304)
+
+        AttendanceService.register_entry(self.user.id)
+        response = self.get("/api/current-status/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"]["status"], "in")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_history_not_modified_without_query(self):
+        response = self.get("/api/attendance-history/")
+        etag = response["ETag"]
+        self.assertEqual(len(response.json()["history"]), 5)
+        # Con el estado del día en caché el 304 no consulta la base de datos
+        AttendanceService.get_today_snapshot(self.user.id)
+        with self.assertNumQueries(1):
+            response = self.get("/api/attendance-history/", etag)
+        self.assertEqual(response.status_code, 304)
+        with mock.patch("app.services.caching.is_shared", return_value=True):
+            shared_etag = self.get("/api/attendance-history/")["ETag"]
+            with self.assertNumQueries(0):
+                response = self.get("/api/attendance-history/", shared_etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.get("/api/attendance-history/", etag, limit=2)
+        self.assertEqual(response.status_code, 200)
+
+    def test_punch_in_another_process_changes_status_etag(self):
+        etag = self.get("/api/current-status/")["ETag"]
+        self.assertEqual(self.get("/api/current-status/", etag).status_code, 304)
+        # Entrada registrada por otro worker: la caché de este proceso no cambia
+        Attendance.objects.create(
+            user=self.user, work_date=self.today, entry_time=timezone.now()
+        )
+        response = self.get("/api/current-status/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"]["status"], "in")
+        self.assertEqual(
+            self.get("/api/current-status/", response["ETag"]).status_code, 304
+        )
+
+    def test_history_etag_without_cached_status_matches(self):
+        etag = self.get("/api/attendance-history/")["ETag"]
+        cache.delete(AttendanceService.get_status_cache_key(self.user.id))
+        response = self.get("/api/attendance-history/", etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_punch_and_import_change_history_etag(self):
+        etag = self.get("/api/attendance-history/")["ETag"]
+        AttendanceService.register_entry(self.user.id)
+        response = self.get("/api/attendance-history/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["history"][0]["status"], "in_progress")
+
+        AttendanceService.register_exit(self.user.id)
+        etag = self.get("/api/attendance-history/")["ETag"]
+        past = self.today - timedelta(days=3)
+        with self.assertLogs("app.services.import_service", "INFO"):
+            ImportService().import_file(
+                io.StringIO(f"email,timestamp\nana@example.com,{past} 18:00:00\n")
+            )
+        self.assertEqual(self.get("/api/attendance-history/", etag).status_code, 200)
+
+    def test_history_etag_with_shift_in_progress_changes_every_minute(self):
+        now = timezone.now()
+        etag = AttendanceService.get_history_etag("v1", None, None, True, now)
+        self.assertEqual(
+            etag,
+            AttendanceService.get_history_etag(
+                "v1", None, None, True, now.replace(second=0, microsecond=0)
+            ),
+        )
+        self.assertNotEqual(
+            etag,
+            AttendanceService.get_history_etag(
+                "v1", None, None, True, now + timedelta(minutes=1)
+            ),
+        )
+        self.assertEqual(
+            AttendanceService.get_history_etag("v1", "c", None, True, now),
+            AttendanceService.get_history_etag(
+                "v1", "c", None, True, now + timedelta(minutes=1)
+            ),
+        )
+
+
+class StaticAssetTests(TestCase):
+    """
+    CSS y JS de las páginas como archivos estáticos con hash y precomprimidos
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            name="Ana", email="ana@admin.com", password="secreto"
+        )
+
+    def setUp(self):
+        cache.clear()
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session["user_email"] = self.user.email
+        session["is_logged_in"] = True
+        session.save()
+
+    def test_pages_load_bundles_instead_of_inline_code(self):
+        for client, path, bundle in (
+            (self.client_class(), "/", "login"),
+            (self.client, "/control-asistencia/", "control_asistencia"),
+            (self.client, "/dashboard/", "dashboard"),
+        ):
+            content = client.get(path).content.decode()
+            self.assertIn(f"/static/app/css/{bundle}.css", content)
+            self.assertIn(f"/static/app/js/{bundle}.js", content)
+            self.assertNotIn("<style>", content)
+            self.assertNotIn("function ", content)
+
+        content = self.client.get("/dashboard/reports/").content.decode()
+        self.assertIn("/static/app/css/dashboard.css", content)
+        self.assertNotIn("<style>", content)
+
+        content = self.client.get("/control-asistencia/").content.decode()
+        self.assertIn('id="attendance-status-data" type="application/json"', content)
+        self.assertIn('data-history-url="/api/attendance-history/"', content)
+
+    def test_collectstatic_hashes_and_precompresses_bundles(self):
+        static_root = self.enterContext(tempfile.TemporaryDirectory())
+        storages = {
+            **settings.STORAGES,
+            "staticfiles": {
+                "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+            },
+        }
+        with override_settings(STATIC_ROOT=static_root, STORAGES=storages):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            with open(os.path.join(static_root, "staticfiles.json")) as manifest:
+                paths = json.load(manifest)["paths"]
+            hashed = paths["app/js/control_asistencia.js"]
+            self.assertRegex(hashed, r"^app/js/control_asistencia\.[0-9a-f]{12}\.js$")
+            for suffix in ("", ".gz", ".br"):
+                self.assertTrue(
+                    os.path.exists(os.path.join(static_root, hashed + suffix))
+                )
+
+            client = self.client_class()
+            client.cookies = self.client.cookies
+            content = client.get("/control-asistencia/").content.decode()
+            self.assertIn(f"/static/{hashed}", content)
+            response = client.get(
+                f"/static/{hashed}", headers={"Accept-Encoding": "gzip, br"}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertIn("immutable", response["Cache-Control"])
+            self.assertIn("max-age=315360000", response["Cache-Control"])
+            response.close()
+
+
+class DashboardFragmentCacheTests(TestCase):
+    """
+    Fragmentos del dashboard (estadísticas y tabla) en caché por fecha
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = localization.local_now().date()
+        cls.past_date = cls.today - timedelta(days=5)
+        cls.users = User.objects.bulk_create(
+            User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+            for n in range(3)
+        )
+        entry = localization.local_to_utc(
+            cls.past_date, datetime.strptime("07:00", "%H:%M").time()
+        )
+        cls.past_attendance = Attendance.objects.create(
+            user=cls.users[0],
+            work_date=cls.past_date,
+            entry_time=entry,
+            exit_time=entry + timedelta(hours=8),
+        )
+
+    def setUp(self):
+        cache.clear()
+        ScheduleService.get_schedule()
+        session = self.client.session
+        session["user_id"] = 0
+        session["user_email"] = "jefe@admin.com"
+        session["is_logged_in"] = True
+        session.save()
+
+    def dashboard_queries(self, **params):
+        """
+        Petición al dashboard; devuelve la respuesta y las consultas que
+        leyeron registros o el resumen del día
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/dashboard/", params)
+        data_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "app_attendance" in query["sql"]
+            or "app_dailyattendancesummary" in query["sql"]
+        ]
+        return response, data_queries
+
+    def test_past_date_is_cached_without_expiry(self):
+        params = {"date": self.past_date.isoformat()}
+        # En la caché del proceso otra invalidación no llega: vencimiento acotado
+        self.assertFalse(caching.is_shared())
+        self.assertEqual(
+            DashboardService.get_fragment_cache(self.past_date)["timeout"],
+            settings.ATTENDANCE_LOCAL_CACHE_MAX_AGE,
+        )
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                }
+            }
+        ):
+            self.assertTrue(caching.is_shared())
+            fragment_cache = DashboardService.get_fragment_cache(self.past_date)
+            self.assertIsNone(fragment_cache["timeout"])
+
+        response, queries = self.dashboard_queries(**params)
+        self.assertTrue(queries)
+        self.assertContains(response, "Empleado 0")
+
+        warm, queries = self.dashboard_queries(**params)
+        self.assertEqual(queries, [])
+        self.assertEqual(warm.content, response.content)
+
+    def test_today_is_invalidated_by_punches(self):
+        self.assertEqual(
+            DashboardService.get_fragment_cache(self.today)["timeout"],
+            DashboardService.TODAY_CACHE_TIMEOUT,
+        )
+        response, _ = self.dashboard_queries()
+        self.assertNotContains(response, "Empleado 1")
+        self.assertEqual(self.dashboard_queries()[1], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceService.register_entry(self.users[1].id)
+        response, queries = self.dashboard_queries()
+        self.assertTrue(queries)
+        self.assertContains(response, "Empleado 1")
+        self.assertContains(response, "1 entradas, 1 en curso")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceService.register_exit(self.users[1].id)
+        response, _ = self.dashboard_queries(date=self.today.isoformat())
+        self.assertContains(response, "1 entradas, 0 en curso")
+
+    def test_corrections_and_rule_changes_invalidate_past_date(self):
+        params = {"date": self.past_date.isoformat()}
+        self.dashboard_queries(**params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.past_attendance.exit_time = None
+            self.past_attendance.save()
+        response, queries = self.dashboard_queries(**params)
+        self.assertTrue(queries)
+        self.assertContains(response, "En curso")
+
+        # Un cambio en las reglas de horario cambia la clave de todas las fechas
+        self.assertEqual(self.dashboard_queries(**params)[1], [])
+        ScheduleService.invalidate()
+        self.assertTrue(self.dashboard_queries(**params)[1])
+
+
+class DashboardTableApiTests(TestCase):
+    """
+    Tabla del dashboard por páginas (/api/dashboard/attendances/)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = localization.local_now().date() - timedelta(days=2)
+        users = User.objects.bulk_create(
+            User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+            for n in range(7)
+        )
+        # Tres entradas a la misma hora (desempate por id), dos tarde y dos
+        # jornadas sin salida
+        times = ["07:00", "07:00", "07:00", "07:45", "08:10", "09:00", "10:30"]
+        records = []
+        for n, (user, local_time) in enumerate(zip(users, times)):
+            entry = localization.local_to_utc(
+                cls.day, datetime.strptime(local_time, "%H:%M").time()
+            )
+            records.append(
+                Attendance(
+                    user=user,
+                    work_date=cls.day,
+                    entry_time=entry,
+                    exit_time=entry + timedelta(hours=8) if n % 3 else None,
+                )
+            )
+        Attendance.objects.bulk_create(records)
+
+    def setUp(self):
+        cache.clear()
+        self.login("jefe@admin.com")
+
+    def login(self, email):
+        session = self.client.session
+        session["user_id"] = 0
+        session["user_email"] = email
+        session["is_logged_in"] = True
+        session.save()
+
+    def get(self, **params):
+        return self.client.get(
+            "/api/dashboard/attendances/", {"date": self.day.isoformat(), **params}
+        )
+
+    def walk(self, **params):
+        """
+        Recorre todas las páginas y devuelve las filas en orden
+        """
+        rows, cursor = [], None
+        while True:
+            data = self.get(limit=2, **params, **({"cursor": cursor} if cursor else {}))
+            data = data.json()
+            rows += data["rows"]
+            cursor = data["next_cursor"]
+            if not data["has_more"]:
+                return rows
+
+    def test_keyset_pages_cover_the_day_in_both_orders(self):
+        rows = self.walk()
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(len({row["id"] for row in rows}), 7)
+        entries = [row["entry_time"] for row in rows]
+        self.assertEqual(entries, sorted(entries, reverse=True))
+
+        ascending = self.walk(sort="entry_time")
+        self.assertEqual(
+            [row["id"] for row in ascending], [row["id"] for row in reversed(rows)]
+        )
+        self.assertEqual(ascending[0]["entry_time"], "07:00")
+
+    def test_status_and_late_filters(self):
+        in_progress = self.walk(status="in_progress")
+        self.assertEqual(len(in_progress), 3)
+        self.assertTrue(all(row["exit_time"] is None for row in in_progress))
+        completed = self.walk(status="completed")
+        self.assertEqual(len(completed), 4)
+        self.assertTrue(all(row["duration"] == "8h 0m" for row in completed))
+
+        late = self.walk(late="late")
+        self.assertEqual({row["entry_time"] for row in late}, {"09:00", "10:30"})
+        self.assertTrue(all(row["late"] for row in late))
+        self.assertEqual(len(self.walk(late="on_time")), 5)
+        self.assertEqual(len(self.walk(late="late", status="completed")), 1)
+
+    def test_not_modified_until_the_day_changes(self):
+        response = self.get(limit=3)
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/api/dashboard/attendances/",
+                {"date": self.day.isoformat(), "limit": 3},
+                headers={"If-None-Match": etag},
+            )
+        self.assertEqual(response.status_code, 304)
+
+        attendance = Attendance.objects.filter(exit_time__isnull=True).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance.exit_time = attendance.entry_time + timedelta(hours=1)
+            attendance.save()
+        response = self.client.get(
+            "/api/dashboard/attendances/",
+            {"date": self.day.isoformat(), "limit": 3},
+            headers={"If-None-Match": etag},
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_errors(self):
+        self.assertEqual(self.get(date="2025-13-01").status_code, 400)
+        response = self.get(cursor="no-es-un-cursor")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["success"])
+
+        self.login("ana@example.com")
+        self.assertEqual(self.get().status_code, 403)
+        self.client.session.flush()
+        self.client.cookies.clear()
+        self.assertEqual(self.get().status_code, 401)
+
+
+class PunchBatchTests(TestCase):
+    """
+    Marcaciones por lotes de kioscos sin conexión (/api/punches/batch/)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="Ana", email="ana@example.com")
+
+    def setUp(self):
+        cache.clear()
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session["user_email"] = self.user.email
+        session["is_logged_in"] = True
+        session.save()
+        self.today = localization.local_now().date()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def punch(self, key, action, local_date, hour, minute=0):
+        timestamp = localization.local_to_utc(
+            local_date, datetime.min.replace(hour=hour, minute=minute).time()
+        )
+        return {"key": key, "action": action, "timestamp": timestamp.isoformat()}
+
+    def post(self, punches):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/punches/batch/",
+                json.dumps({"punches": punches}),
+                content_type="application/json",
+            )
+
+    def test_batch_is_applied_with_set_based_writes(self):
+        now = timezone.now() - timedelta(seconds=1)
+        punches = [
+            # Fuera de orden: se aplican por hora de marcación
+            self.punch("k2", "exit", self.yesterday, 16),
+            self.punch("k1", "entry", self.yesterday, 7),
+            {"key": "k3", "action": "entry", "timestamp": now.isoformat()},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(punches)
+
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(
+            [result["key"] for result in data["results"]], ["k2", "k1", "k3"]
+        )
+        self.assertTrue(all(result["success"] for result in data["results"]))
+        self.assertEqual(data["status"]["status"], "in")
+
+        inserts = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith('INSERT INTO "app_attendance"')
+        ]
+        self.assertEqual(len(inserts), 1)
+
+        closed = Attendance.objects.get(user=self.user, work_date=self.yesterday)
+        self.assertEqual(data["results"][0]["attendance_id"], closed.id)
+        self.assertEqual(closed.exit_time - closed.entry_time, timedelta(hours=9))
+        self.assertIsNone(
+            Attendance.objects.get(user=self.user, work_date=self.today).exit_time
+        )
+        summary = DailyAttendanceSummary.objects.get(date=self.yesterday)
+        self.assertEqual((summary.total, summary.open_shifts), (1, 0))
+        self.assertAlmostEqual(summary.total_hours, 9)
+        self.assertEqual(
+            AttendanceService.get_current_status(self.user.id)["status"], "in"
+        )
+
+    def test_resending_a_batch_returns_the_stored_results(self):
+        punches = [
+            self.punch("a", "entry", self.yesterday, 7),
+            self.punch("b", "exit", self.yesterday, 15, 30),
+        ]
+        first = self.post(punches).json()["results"]
+        summary = DailyAttendanceSummary.objects.get(date=self.yesterday)
+
+        again = self.post(punches + [self.punch("a", "entry", self.yesterday, 7)])
+        results = again.json()["results"]
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result["replayed"] for result in results))
+        self.assertEqual(
+            [result["attendance_id"] for result in results[:2]],
+            [result["attendance_id"] for result in first],
+        )
+        self.assertEqual(Attendance.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(PunchReceipt.objects.filter(user=self.user).count(), 2)
+        summary.refresh_from_db()
+        self.assertEqual((summary.total, summary.total_hours), (1, 8.5))
+
+    def test_each_punch_gets_its_own_result(self):
+        two_days_ago = self.today - timedelta(days=2)
+        future = timezone.now() + timedelta(hours=1)
+        results = self.post(
+            [
+                self.punch("orphan", "exit", two_days_ago, 16),
+                self.punch("entry", "entry", self.yesterday, 7),
+                self.punch("twice", "entry", self.yesterday, 8),
+                self.punch("early", "exit", self.yesterday, 6),
+                self.punch("old", "entry", self.today - timedelta(days=5), 7),
+                {"key": "future", "action": "entry", "timestamp": future.isoformat()},
+                {"key": "bad", "action": "lunch", "timestamp": future.isoformat()},
+                {"key": "when", "action": "entry", "timestamp": "ayer"},
+                {"action": "entry", "timestamp": future.isoformat()},
+            ]
+        ).json()["results"]
+
+        self.assertEqual(
+            [result["success"] for result in results],
+            [False, True, False, False, False, False, False, False, False],
+        )
+        self.assertEqual(results[0]["message"], "Primero debes registrar tu entrada")
+        self.assertIn("jornada activa", results[2]["message"])
+        # Se aplican por hora: la salida de las 6:00 llega antes que la entrada
+        self.assertEqual(results[3]["message"], "Primero debes registrar tu entrada")
+        self.assertIn("fuera del rango", results[4]["message"])
+        self.assertIn("fuera del rango", results[5]["message"])
+        self.assertEqual(results[6]["message"], "Acción no válida")
+        self.assertEqual(results[7]["message"], "Hora de marcación no válida")
+        self.assertIsNone(results[8]["key"])
+        self.assertEqual(Attendance.objects.filter(user=self.user).count(), 1)
+        # Los rechazos también quedan registrados: un reenvío devuelve lo mismo
+        self.assertEqual(PunchReceipt.objects.filter(user=self.user).count(), 6)
+
+    def test_batch_respects_punches_registered_online(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceService.register_entry(self.user.id)
+        now = timezone.now()
+        results = self.post(
+            [
+                {"key": "in", "action": "entry", "timestamp": now.isoformat()},
+                {
+                    "key": "out",
+                    "action": "exit",
+                    "timestamp": (now + timedelta(seconds=1)).isoformat(),
+                },
+            ]
+        ).json()
+        self.assertFalse(results["results"][0]["success"])
+        self.assertTrue(results["results"][1]["success"])
+        self.assertEqual(results["status"]["status"], "completed")
+        self.assertEqual(
+            DailyAttendanceSummary.objects.get(date=self.today).open_shifts, 0
+        )
+
+    def test_batch_only_applies_to_the_session_user(self):
+        other = User.objects.create(name="Luis", email="luis@example.com")
+        punches = [self.punch("k1", "entry", self.yesterday, 7)]
+
+        # Cola de otro usuario enviada con esta sesión: no se aplica
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/punches/batch/",
+                json.dumps({"user_id": other.id, "punches": punches}),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Attendance.objects.exists())
+        self.assertFalse(PunchReceipt.objects.exists())
+
+        # La misma clave en la cola de cada usuario son marcaciones distintas
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/punches/batch/",
+                json.dumps({"user_id": self.user.id, "punches": punches}),
+                content_type="application/json",
+            )
+        self.assertTrue(response.json()["results"][0]["success"])
+        session = self.client.session
+        session["user_id"] = other.id
+        session["user_email"] = other.email
+        session.save()
+        result = self.post(punches).json()["results"][0]
+        self.assertTrue(result["success"])
+        self.assertNotIn("replayed", result)
+        self.assertEqual(
+            set(Attendance.objects.values_list("user_id", flat=True)),
+            {self.user.id, other.id},
+        )
+
+    def test_request_errors(self):
+        self.assertEqual(self.client.get("/api/punches/batch/").status_code, 405)
+        response = self.client.post(
+            "/api/punches/batch/", "no es json", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        too_many = [
+            self.punch(str(n), "entry", self.today, 7)
+            for n in range(PunchBatchService.MAX_BATCH_SIZE + 1)
+        ]
+        self.assertEqual(self.post(too_many).status_code, 400)
+
+        self.client.session.flush()
+        self.client.cookies.clear()
+        self.assertEqual(self.post([]).status_code, 401)
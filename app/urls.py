@@ -8,6 +8,12 @@ urlpatterns = [
     path("attendance-action/", views.control_asistencia, name="attendance_action"),
     path("logout/", views.logout_view, name="logout"),
     path("dashboard/", views.dashboard_view, name="dashboard"),
+    path("dashboard/reports/", views.reports_view, name="attendance_reports"),
+    path(
+        "dashboard/export/",
+        views.export_attendance_view,
+        name="attendance_export",
+    ),
     path(
         "api/attendance-history/",
         views.get_attendance_history_api,
@@ -18,5 +24,20 @@ urlpatterns = [
         views.get_current_status_api,
         name="current_status_api",
     ),
+    path(
+        "api/dashboard/attendances/",
+        views.dashboard_attendances_api,
+        name="dashboard_attendances_api",
+    ),
+    path(
+        "api/punches/batch/",
+        views.punch_batch_api,
+        name="punch_batch_api",
+    ),
+    path(
+        "api/events/",
+        views.attendance_events_view,
+        name="attendance_events",
+    ),
    
 ]
@@ -1,11 +1,19 @@
+import json
+from datetime import date
+
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.functional import SimpleLazyObject
 from app.services.login_service import LoginService
 from app.services.attendance_service import AttendanceService
-from app.models import Attendance, User
-
-
-
+from app.services.summary_service import SummaryService
+from app.services.export_service import ExportService
+from app.services.event_service import EventService
+from app.services.report_service import ReportService
+from app.services.dashboard_service import DashboardService
+from app.services.punch_batch_service import PunchBatchService
+from app.routers import pin_to_primary, reading_replica, reporting_view
 
 
 # Create your views here.
@@ -29,28 +37,87 @@ def control_asistencia(request):
 
     # Si es una petición POST para registrar asistencia
     if request.method == "POST":
-        return AttendanceService.process_attendance_action(request)
+        response = AttendanceService.process_attendance_action(request)
+        # Las lecturas siguientes de esta sesión van al primario por un tiempo
+        return pin_to_primary(response)
 
     # Obtener información del usuario actual y su estado de asistencia
     current_user = LoginService.get_current_user(request)
     attendance_status = AttendanceService.get_current_status(current_user["id"])
-    # Obtener TODOS los registros del usuario (sin límite de días)
-    attendance_history = AttendanceService.get_attendance_history(current_user["id"])
-
-    # Importar json para pasar datos al template
-    import json
+    # Obtener solo la primera página del historial; el resto se carga bajo demanda
+    attendance_history = AttendanceService.get_attendance_history_page(
+        current_user["id"]
+    )
 
+    # El template los entrega al script estático con json_script
     context = {
         "user": current_user,
         "attendance_status": attendance_status,
-        "attendance_status_json": json.dumps(attendance_status),
         "attendance_history": attendance_history,
-        "attendance_history_json": json.dumps(attendance_history),
     }
 
     return render(request, "controlAsistencia.html", context)
 
 
+def punch_batch_api(request):
+    """
+    API para kioscos: registra en un solo pedido las marcaciones guardadas
+    mientras no había conexión
+    Cuerpo JSON: {"punches": [{"key", "action", "timestamp"}, ...]} con una
+    clave de idempotencia por marcación y la hora ISO del reloj del kiosco;
+    user_id (opcional) es el dueño de la cola y debe ser el de la sesión.
+    Devuelve el resultado de cada marcación y el estado actual del usuario
+    """
+    if request.method != "POST":
+        return JsonResponse(
+            {"success": False, "message": "Método no permitido"}, status=405
+        )
+
+    current_user = LoginService.get_current_user(request)
+    if not current_user:
+        return JsonResponse(
+            {"success": False, "message": "Usuario no autenticado"}, status=401
+        )
+
+    try:
+        payload = json.loads(request.body)
+        punches = payload["punches"]
+    except (ValueError, KeyError, TypeError):
+        punches = None
+    if not isinstance(punches, list) or not punches:
+        return JsonResponse(
+            {"success": False, "message": "Formato de lote no válido"}, status=400
+        )
+    if len(punches) > PunchBatchService.MAX_BATCH_SIZE:
+        return JsonResponse(
+            {
+                "success": False,
+                "message": f"Máximo {PunchBatchService.MAX_BATCH_SIZE} marcaciones por lote",
+            },
+            status=400,
+        )
+
+    # La cola guardada en el navegador es de un usuario: si la sesión ya es
+    # de otro (cerró sesión en otra pestaña), el lote no se aplica
+    owner = payload.get("user_id")
+    if owner is not None and owner != current_user["id"]:
+        return JsonResponse(
+            {"success": False, "message": "El lote pertenece a otro usuario"},
+            status=409,
+        )
+
+    results = PunchBatchService.process_batch(current_user["id"], punches)
+    response = JsonResponse(
+        {
+            "success": True,
+            "results": results,
+            "status": AttendanceService.get_current_status(current_user["id"]),
+        }
+    )
+    # Las lecturas siguientes de esta sesión van al primario por un tiempo
+    return pin_to_primary(response)
+
+
 def logout_view(request):
     """
     Vista para cerrar sesión
@@ -62,12 +129,17 @@ def logout_view(request):
     return redirect("index")
 
 
-def get_attendance_history_api(request):
+@reporting_view
+async def get_attendance_history_api(request):
     """
     API endpoint para obtener el historial de asistencia actualizado
+    Paginado por cursor: acepta los parámetros GET `cursor` y `limit`
+    y devuelve `next_cursor` para pedir la siguiente página
+    Vista asíncrona: la sesión y la consulta usan las APIs async de Django
     """
     # Verificar que el usuario esté autenticado
-    if not LoginService.is_user_authenticated(request):
+    current_user = await LoginService.aget_current_user(request)
+    if not current_user:
         return JsonResponse({"success": False, "message": "Usuario no autenticado"})
 
     # Solo permitir GET requests
@@ -75,15 +147,42 @@ def get_attendance_history_api(request):
         return JsonResponse({"success": False, "message": "Método no permitido"})
 
     try:
-        # Obtener información del usuario actual
-        current_user = LoginService.get_current_user(request)
-
-        # Obtener TODOS los registros del usuario
-        attendance_history = AttendanceService.get_attendance_history(
-            current_user["id"]
+        user_id = current_user["id"]
+        cursor = request.GET.get("cursor")
+        limit = request.GET.get("limit")
+        version = await AttendanceService.aget_user_version(user_id)
+
+        # Con el estado del día en caché se sabe si hay una jornada en curso
+        # y se puede responder 304 sin consultar el historial
+        etag = None
+        snapshot = await AttendanceService.acache_get(
+            AttendanceService.get_status_cache_key(user_id)
+        )
+        if snapshot is not None:
+            in_progress = bool(snapshot["entry_time"] and not snapshot["exit_time"])
+            etag = AttendanceService.get_history_etag(version, cursor, limit, in_progress)
+            not_modified = AttendanceService.not_modified(request, etag)
+            if not_modified:
+                return not_modified
+
+        # Obtener una página del historial del usuario
+        attendance_history = await AttendanceService.aget_attendance_history_page(
+            user_id, cursor=cursor, limit=limit
         )
+        if not attendance_history["success"]:
+            return JsonResponse(attendance_history)
 
-        return JsonResponse(attendance_history)
+        if etag is None:
+            in_progress = any(
+                record["status"] == "in_progress"
+                for record in attendance_history["history"]
+            )
+            etag = AttendanceService.get_history_etag(version, cursor, limit, in_progress)
+            not_modified = AttendanceService.not_modified(request, etag)
+            if not_modified:
+                return not_modified
+
+        return AttendanceService.with_etag(JsonResponse(attendance_history), etag)
 
     except Exception as e:
         return JsonResponse(
@@ -91,12 +190,14 @@ def get_attendance_history_api(request):
         )
 
 
-def get_current_status_api(request):
+async def get_current_status_api(request):
     """
     API endpoint para obtener el estado actual de asistencia en tiempo real
+    Vista asíncrona: con el estado del día en caché no ocupa un hilo del pool
     """
     # Verificar que el usuario esté autenticado
-    if not LoginService.is_user_authenticated(request):
+    current_user = await LoginService.aget_current_user(request)
+    if not current_user:
         return JsonResponse({"success": False, "message": "Usuario no autenticado"})
 
     # Solo permitir GET requests
@@ -104,19 +205,70 @@ def get_current_status_api(request):
         return JsonResponse({"success": False, "message": "Método no permitido"})
 
     try:
-        # Obtener información del usuario actual
-        current_user = LoginService.get_current_user(request)
-
-        # Obtener estado actual calculado desde la base de datos
-        current_status = AttendanceService.get_current_status(current_user["id"])
+        # La versión cambia solo con las marcaciones del usuario: si el cliente
+        # ya tiene esta versión se responde 304 sin armar el estado
+        version = await AttendanceService.aget_user_version(current_user["id"])
+        etag = AttendanceService.get_status_etag(version)
+        not_modified = AttendanceService.not_modified(request, etag)
+        if not_modified:
+            return not_modified
+
+        # Obtener estado actual (caché del día o base de datos)
+        current_status = await AttendanceService.aget_current_status(
+            current_user["id"]
+        )
+        response = JsonResponse({"success": True, "status": current_status})
+        if current_status["status"] == "error":
+            return response
 
-        return JsonResponse({"success": True, "status": current_status})
+        return AttendanceService.with_etag(response, etag)
 
     except Exception as e:
         return JsonResponse(
             {"success": False, "message": f"Error al obtener estado: {str(e)}"}
         )
 
+
+async def attendance_events_view(request):
+    """
+    Stream de Server-Sent Events con el estado de asistencia del usuario
+    (y los contadores del día para administradores). Reemplaza el sondeo
+    periódico: solo se envían datos cuando una entrada/salida cambia algo.
+    Requiere servir la aplicación con ASGI (sistema_entrada_salida/asgi.py)
+    """
+    if request.method != "GET":
+        return JsonResponse(
+            {"success": False, "message": "Método no permitido"}, status=405
+        )
+
+    # Con WSGI (runserver, gunicorn) Django acumula el stream completo antes de
+    # enviarlo: cada pestaña ocuparía un hilo sin recibir eventos. Un 204 hace
+    # que el EventSource se cierre y la página vuelva al sondeo
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    current_user = await LoginService.aget_current_user(request)
+    if not current_user:
+        return JsonResponse(
+            {"success": False, "message": "Usuario no autenticado"}, status=401
+        )
+
+    response = StreamingHttpResponse(
+        EventService.stream_events(
+            current_user["id"],
+            is_admin=LoginService.is_admin_email(current_user["email"]),
+        ),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Evitar que nginx acumule la respuesta en su búfer
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# Sin reporting_view: la página solo lee para armar los fragmentos que se
+# guardan en caché con la versión de la fecha, y una lectura atrasada de la
+# réplica quedaría guardada hasta el siguiente cambio de esa fecha
 def dashboard_view(request):
     # Verificar que el usuario esté autenticado
     if not LoginService.is_user_authenticated(request):
@@ -124,16 +276,11 @@ def dashboard_view(request):
 
     # Obtener información del usuario actual
     current_user = LoginService.get_current_user(request)
-    email = current_user.get("email", "")
     
     # Validar si el usuario es administrador por extensión de correo
-    if not email.endswith("@admin.com"):
+    if not LoginService.is_admin_user(request):
         return render(request, "no_autorizado.html")
 
-    # Obtener datos dinámicos para el dashboard
-    from django.utils import timezone
-    from datetime import timedelta
-    
     # Obtener fecha local actual
     from app.services.attendance_service import AttendanceService
     local_now = AttendanceService.get_local_time()
@@ -154,46 +301,15 @@ def dashboard_view(request):
     else:
         selected_date = local_now.date()
     
-    # Obtener registros de asistencia filtrados por fecha
-    if filter_date:
-        # Use timezone-aware date filtering
-        from django.utils import timezone
-        start_of_day = timezone.make_aware(
-            datetime.combine(selected_date, datetime.min.time())
-        )
-        end_of_day = timezone.make_aware(
-            datetime.combine(selected_date, datetime.max.time())
-        )
-        
-        recent_attendances = Attendance.objects.select_related('user').filter(
-            entry_time__range=(start_of_day, end_of_day)
-        ).order_by('-entry_time')
-    else:
-        recent_attendances = Attendance.objects.select_related('user').order_by('-entry_time')[:10]
-    
-    # Calcular estadísticas para la fecha seleccionada
-    today_attendances = Attendance.objects.filter(entry_time__date=selected_date)
-    
-    # Estadísticas del día
-    total_today = today_attendances.count()
-    late_arrivals = 0
-    on_time = 0
-    for attendance in today_attendances:
-        entry_time = attendance.entry_time.time()
-        if entry_time > timezone.datetime.strptime('08:30', '%H:%M').time():
-            late_arrivals += 1
-        else:
-            on_time += 1
-
-    # Update context to reflect filtered data
-    
-    # Preparar contexto con datos dinámicos
+    # Primera página de la tabla y estadísticas; se calculan solo si el
+    # template no tiene en caché el fragmento de la fecha (ver DashboardService).
+    # Las páginas siguientes las pide el navegador a dashboard_attendances_api
     context = {
-        'recent_attendances': recent_attendances,
-        'total_today': total_today,
-        'late_arrivals': late_arrivals,
-        'on_time': on_time,
-        'attendance_percentage': (on_time / max(total_today, 1)) * 100,
+        'attendance_page': SimpleLazyObject(
+            lambda: DashboardService.get_attendance_page(selected_date)
+        ),
+        'daily_stats': SimpleLazyObject(lambda: SummaryService.get_summary(selected_date)),
+        'dashboard_cache': DashboardService.get_fragment_cache(selected_date),
         'current_user': current_user,
         'selected_date': selected_date,
         'is_filtered': bool(filter_date),
@@ -201,3 +317,142 @@ def dashboard_view(request):
     
     return render(request, "dashboard.html", context)
 
+
+@reporting_view
+def dashboard_attendances_api(request):
+    """
+    Página de registros de un día para la tabla del dashboard (JSON)
+    Parámetros GET: date (YYYY-MM-DD, por defecto hoy), cursor y limit
+    (paginación por cursor sobre la hora de entrada), sort (-entry_time |
+    entry_time), status (in_progress | completed) y late (late | on_time).
+    Solo disponible para administradores
+    """
+    if not LoginService.is_user_authenticated(request):
+        return JsonResponse(
+            {"success": False, "message": "Usuario no autenticado"}, status=401
+        )
+
+    if not LoginService.is_admin_user(request):
+        return JsonResponse(
+            {"success": False, "message": "No autorizado"}, status=403
+        )
+
+    try:
+        selected_date = date.fromisoformat(
+            request.GET.get("date") or AttendanceService.get_local_time().date().isoformat()
+        )
+    except ValueError:
+        return JsonResponse(
+            {"success": False, "message": "Fecha inválida, use YYYY-MM-DD"}, status=400
+        )
+
+    params = [request.GET.get(name) for name in ("cursor", "limit", "sort", "status", "late")]
+    # La versión de los fragmentos de la fecha cambia con cada marcación o
+    # corrección: sin cambios se responde 304 sin consultar los registros
+    etag = AttendanceService.build_etag(
+        "dashboard", DashboardService.get_fragment_cache(selected_date)["version"], *params
+    )
+    not_modified = AttendanceService.not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    page = DashboardService.get_attendance_page(selected_date, *params)
+    if not page["success"]:
+        return JsonResponse(page, status=400)
+    if reading_replica():
+        # Una página atrasada de la réplica no debe quedar validada por el
+        # ETag de la versión actual
+        return JsonResponse(page)
+    return AttendanceService.with_etag(JsonResponse(page), etag)
+
+
+@reporting_view
+def reports_view(request):
+    """
+    Reporte semanal o mensual de asistencia por día y por empleado
+    Parámetros GET: period (week | month) y date (YYYY-MM-DD, cualquier día
+    del periodo; por defecto hoy). Solo disponible para administradores
+    """
+    if not LoginService.is_user_authenticated(request):
+        return redirect("index")
+
+    if not LoginService.is_admin_user(request):
+        return JsonResponse(
+            {"success": False, "message": "No autorizado"}, status=403
+        )
+
+    today = AttendanceService.get_local_time().date()
+    period = request.GET.get("period", "week")
+    if period not in ReportService.PERIODS:
+        period = "week"
+    try:
+        selected_date = date.fromisoformat(request.GET.get("date") or today.isoformat())
+    except ValueError:
+        selected_date = today
+    # Fechas extremas (0001-01-01, 9999-12-31) desbordan el cálculo de los
+    # periodos vecinos; no hay reportes futuros
+    if not ReportService.EARLIEST_DATE <= selected_date <= today:
+        selected_date = today
+
+    report = ReportService.get_report(period, selected_date)
+    next_date = ReportService.get_adjacent_period(period, selected_date, 1)
+
+    context = {
+        'report': report,
+        'period': period,
+        'current_user': LoginService.get_current_user(request),
+        'previous_date': ReportService.get_adjacent_period(period, selected_date, -1),
+        # No se navega a periodos futuros
+        'next_date': next_date if next_date <= today else None,
+    }
+    return render(request, "reports.html", context)
+
+
+def export_attendance_view(request):
+    """
+    Exporta los registros de asistencia de un rango de fechas en streaming
+    Parámetros GET: start, end (YYYY-MM-DD, fechas locales) y format (csv | ndjson)
+    Solo disponible para administradores
+    """
+    if not LoginService.is_user_authenticated(request):
+        return redirect("index")
+
+    if not LoginService.is_admin_user(request):
+        return JsonResponse(
+            {"success": False, "message": "No autorizado"}, status=403
+        )
+
+    today = AttendanceService.get_local_time().date()
+    try:
+        start_date = date.fromisoformat(request.GET.get("start") or today.isoformat())
+        end_date = date.fromisoformat(request.GET.get("end") or start_date.isoformat())
+    except ValueError:
+        return JsonResponse(
+            {"success": False, "message": "Fecha inválida, use YYYY-MM-DD"}, status=400
+        )
+
+    if end_date < start_date:
+        return JsonResponse(
+            {"success": False, "message": "La fecha final es anterior a la inicial"},
+            status=400,
+        )
+
+    export_format = request.GET.get("format", "csv")
+    if export_format not in ExportService.FORMATS:
+        return JsonResponse(
+            {"success": False, "message": "Formato no soportado"}, status=400
+        )
+
+    # Bajo ASGI un iterador síncrono se acumularía completo en memoria
+    if isinstance(request, ASGIRequest):
+        content = ExportService.astream(export_format, start_date, end_date)
+    else:
+        content = ExportService.stream(export_format, start_date, end_date)
+    response = StreamingHttpResponse(
+        content,
+        content_type=ExportService.FORMATS[export_format],
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="asistencia_{start_date}_{end_date}.{export_format}"'
+    )
+    return response
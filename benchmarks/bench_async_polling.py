@@ -0,0 +1,204 @@
+"""
+Vistas síncronas vs. asíncronas bajo sondeo concurrente por ASGI.
+
+Simula varios miles de kioscos que consultan /api/current-status/ (y el
+historial) al mismo tiempo, enviando las peticiones directamente a la
+aplicación ASGI. Compara las vistas async del proyecto con versiones síncronas
+equivalentes (las que había antes), que bajo ASGI ocupan un hilo del pool por
+petición. Reporta throughput, latencias y el máximo de hilos vivos.
+
+Se mide con sesiones en base de datos (configuración del proyecto) y con
+sesiones en cookies firmadas, para separar el costo de cargar la sesión del
+costo de la vista.
+
+    python -m benchmarks.bench_async_polling [pollers] [rondas]
+"""
+
+import asyncio
+import sys
+import threading
+from time import perf_counter
+
+from django.urls import path
+
+from benchmarks.common import asgi_request, percentile, print_table, setup_django
+
+DB_SESSIONS = "django.contrib.sessions.backends.db"
+COOKIE_SESSIONS = "django.contrib.sessions.backends.signed_cookies"
+
+
+def sync_status_view(request):
+    """
+    Versión síncrona de get_current_status_api (como era antes)
+    """
+    from django.http import JsonResponse
+
+    from app.services.attendance_service import AttendanceService
+    from app.services.login_service import LoginService
+
+    if not LoginService.is_user_authenticated(request):
+        return JsonResponse({"success": False, "message": "Usuario no autenticado"})
+    current_user = LoginService.get_current_user(request)
+    status = AttendanceService.get_current_status(current_user["id"])
+    return JsonResponse({"success": True, "status": status})
+
+
+def sync_history_view(request):
+    """
+    Versión síncrona de get_attendance_history_api (como era antes)
+    """
+    from django.http import JsonResponse
+
+    from app.services.attendance_service import AttendanceService
+    from app.services.login_service import LoginService
+
+    if not LoginService.is_user_authenticated(request):
+        return JsonResponse({"success": False, "message": "Usuario no autenticado"})
+    current_user = LoginService.get_current_user(request)
+    return JsonResponse(
+        AttendanceService.get_attendance_history_page(current_user["id"])
+    )
+
+
+def get_urlpatterns():
+    from app import views
+
+    return [
+        path("sync/status/", sync_status_view),
+        path("async/status/", views.get_current_status_api),
+        path("sync/history/", sync_history_view),
+        path("async/history/", views.get_attendance_history_api),
+    ]
+
+
+urlpatterns = []
+
+
+def create_sessions(users, session_engine):
+    from importlib import import_module
+
+    session_store = import_module(session_engine).SessionStore
+    session_keys = []
+    for user in users:
+        session = session_store()
+        session["user_id"] = user.id
+        session["user_name"] = user.name
+        session["user_email"] = user.email
+        session["is_logged_in"] = True
+        session.save()
+        session_keys.append(session.session_key)
+    return session_keys
+
+
+async def run_pollers(application, url, session_keys, rounds):
+    """
+    Cada poller hace `rounds` peticiones seguidas; todos corren a la vez
+    """
+    latencies = []
+    errors = 0
+    peak_threads = threading.active_count()
+    running = True
+
+    async def watch_threads():
+        nonlocal peak_threads
+        while running:
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.005)
+
+    async def poller(session_key):
+        nonlocal errors
+        for _ in range(rounds):
+            started = perf_counter()
+            status, _, _ = await asgi_request(
+                application, url, cookies={"sessionid": session_key}
+            )
+            latencies.append((perf_counter() - started) * 1000)
+            if status != 200:
+                errors += 1
+
+    watcher = asyncio.create_task(watch_threads())
+    started = perf_counter()
+    await asyncio.gather(*(poller(session_key) for session_key in session_keys))
+    elapsed = perf_counter() - started
+    running = False
+    await watcher
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "peak_threads": peak_threads,
+        "errors": errors,
+    }
+
+
+def main(pollers=2000, rounds=3):
+    setup_django()
+
+    import logging
+
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+    from django.utils import timezone
+
+    from app.models import Attendance, User
+    from app.services.attendance_service import AttendanceService
+
+    logging.disable(logging.INFO)
+    settings.ROOT_URLCONF = __name__
+    urlpatterns[:] = get_urlpatterns()
+
+    users = User.objects.bulk_create(
+        User(name=f"Kiosco {n}", email=f"kiosco{n}@example.com") for n in range(pollers)
+    )
+    # La mitad tiene una jornada en curso; el estado de todos queda en caché,
+    # que es el caso normal del sondeo cada 30 segundos
+    now = timezone.now()
+    Attendance.objects.bulk_create(
+        Attendance(user=user, entry_time=now, work_date=now.date())
+        for user in users[::2]
+    )
+    for user in users:
+        AttendanceService.get_current_status(user.id)
+
+    results = []
+    for session_engine, label in (
+        (DB_SESSIONS, "sesión BD"),
+        (COOKIE_SESSIONS, "cookie"),
+    ):
+        settings.SESSION_ENGINE = session_engine
+        session_keys = create_sessions(users, session_engine)
+        # La aplicación se crea después de cambiar SESSION_ENGINE (middleware)
+        application = get_asgi_application()
+        endpoints = (
+            ["status"] if session_engine == COOKIE_SESSIONS else ["status", "history"]
+        )
+        for endpoint in endpoints:
+            for kind in ("sync", "async"):
+                metrics = asyncio.run(
+                    run_pollers(
+                        application, f"/{kind}/{endpoint}/", session_keys, rounds
+                    )
+                )
+                results.append((f"{endpoint} {kind} ({label})", metrics))
+
+    print_table(
+        f"{pollers} pollers concurrentes x {rounds} rondas por ASGI",
+        results,
+        [
+            "requests",
+            "per_second",
+            "p50_ms",
+            "p95_ms",
+            "p99_ms",
+            "peak_threads",
+            "errors",
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,66 @@
+"""
+Sondeos de estado e historial con y sin If-None-Match.
+
+Un cliente inactivo (sin marcaciones entre sondeos) repite las peticiones de
+/api/current-status/ y /api/attendance-history/. Sin ETag cada sondeo arma y
+envía el JSON completo; con el ETag de la respuesta anterior el servidor
+contesta 304 sin cuerpo.
+
+    python -m benchmarks.bench_conditional_get [sondeos] [jornadas]
+"""
+
+import sys
+from datetime import timedelta
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def main(polls=2000, days=60):
+    setup_django()
+
+    import logging
+
+    from django.test import Client
+    from django.utils import timezone
+
+    from app.models import Attendance, User
+
+    logging.disable(logging.INFO)
+    user = User.objects.create(name="Ana", email="ana@example.com", password="x")
+    now = timezone.now()
+    Attendance.objects.bulk_create(
+        Attendance(
+            user=user,
+            entry_time=now - timedelta(days=n),
+            exit_time=now - timedelta(days=n) + timedelta(hours=8),
+        )
+        for n in range(1, days + 1)
+    )
+    client = Client(HTTP_HOST="localhost")
+    client.post("/", {"email": user.email, "password": "x"})
+
+    results = []
+    for name, path in (
+        ("estado", "/api/current-status/"),
+        ("historial", "/api/attendance-history/"),
+    ):
+        first = client.get(path)
+        for label, headers in (
+            ("sin ETag", {}),
+            ("If-None-Match", {"If-None-Match": first["ETag"]}),
+        ):
+            response = client.get(path, headers=headers)
+            metrics = measure(lambda: client.get(path, headers=headers), polls)
+            metrics["status"] = response.status_code
+            metrics["bytes"] = len(response.content)
+            results.append((f"{name} {label}", metrics))
+
+    print_table(
+        f"Sondeos de un cliente inactivo ({polls} peticiones, {days} jornadas)",
+        results,
+        ["status", "bytes", "mean_us", "p95_us", "per_second"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
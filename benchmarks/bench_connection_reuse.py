@@ -0,0 +1,114 @@
+"""
+Latencia por petición abriendo una conexión nueva en cada petición frente a
+reutilizarla (CONN_MAX_AGE / pool nativo de PostgreSQL).
+
+Las peticiones pasan por el WSGIHandler completo, que emite request_started y
+request_finished: ahí Django cierra las conexiones vencidas, igual que en
+producción (el Client de pruebas desactiva ese cierre). La vista medida es
+/api/attendance-history/, una sola consulta pequeña, donde abrir la conexión
+pesa más. Solo mide WSGI: bajo ASGI las conexiones persistentes no se
+reutilizan entre peticiones (por eso DB_CONN_MAX_AGE es 0 por defecto).
+
+Por defecto usa una base SQLite temporal, donde abrir una conexión es barato;
+con DB_ENGINE=mysql|postgresql mide contra la base de settings, que debe
+existir y estar migrada (ahí la diferencia es mucho mayor).
+
+    python -m benchmarks.bench_connection_reuse [peticiones]
+    DB_ENGINE=postgresql DB_NAME=horarios python -m benchmarks.bench_connection_reuse
+"""
+
+import io
+import os
+import sys
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks.common import measure, print_table, setup_django
+
+PATH = "/api/attendance-history/"
+
+
+def apply_mode(connection, conn_max_age, pool_options):
+    """
+    Cambia la reutilización de conexiones de "default" en caliente
+    """
+    connection.close()
+    if connection.vendor == "postgresql":
+        connection.close_pool()
+        if pool_options:
+            connection.settings_dict["OPTIONS"]["pool"] = pool_options
+        else:
+            connection.settings_dict["OPTIONS"].pop("pool", None)
+    connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+    connection.settings_dict["CONN_HEALTH_CHECKS"] = conn_max_age != 0
+
+
+def main(requests=2000):
+    setup_django(use_settings_database=bool(os.environ.get("DB_ENGINE")))
+
+    import logging
+
+    from django.contrib.sessions.backends.cached_db import SessionStore
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from django.utils import timezone
+
+    from app.models import Attendance, User
+
+    logging.disable(logging.INFO)
+    user, _ = User.objects.get_or_create(
+        email="bench-conexiones@example.com", defaults={"name": "Bench"}
+    )
+    if not Attendance.objects.filter(user=user).exists():
+        now = timezone.now()
+        Attendance.objects.create(user=user, entry_time=now, work_date=now.date())
+    session = SessionStore()
+    session["user_id"] = user.id
+    session["user_name"] = user.name
+    session["user_email"] = user.email
+    session.create()
+
+    application = get_wsgi_application()
+
+    def request():
+        environ = {
+            "PATH_INFO": PATH,
+            "HTTP_HOST": "localhost",
+            "HTTP_COOKIE": f"sessionid={session.session_key}",
+            "wsgi.input": io.BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        response = application(environ, lambda status, headers: None)
+        b"".join(response)
+        # Dispara request_finished, donde se cierra la conexión si venció
+        response.close()
+
+    opened = []
+    connection_created.connect(lambda **kwargs: opened.append(1), weak=False)
+
+    pool_options = connection.settings_dict["OPTIONS"].get("pool")
+    modes = [
+        ("conexión nueva (CONN_MAX_AGE=0)", 0, None),
+        ("persistente (CONN_MAX_AGE=60)", 60, None),
+    ]
+    if connection.vendor == "postgresql":
+        modes.append(("pool nativo", 0, pool_options or True))
+
+    results = []
+    for label, conn_max_age, pool in modes:
+        apply_mode(connection, conn_max_age, pool)
+        request()  # Calienta sesión en caché y URLconf
+        opened.clear()
+        metrics = measure(request, requests)
+        metrics["connections_opened"] = len(opened)
+        results.append((label, metrics))
+
+    print_table(
+        f"GET {PATH} por WSGI ({connection.vendor}, {requests} peticiones)",
+        results,
+        ["connections_opened", "mean_us", "p50_us", "p95_us", "per_second"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
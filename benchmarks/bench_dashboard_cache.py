@@ -0,0 +1,95 @@
+"""
+Tiempo de respuesta del dashboard con los fragmentos en caché fríos y tibios.
+
+Crea un día con N empleados (todos con entrada) y mide /dashboard/ filtrado
+por esa fecha pasada y por hoy: "fría" invalida la versión de la fecha antes
+de cada petición (consultas, clasificación de llegadas tarde y render de la
+tabla completa); "tibia" reutiliza los fragmentos guardados.
+
+    python -m benchmarks.bench_dashboard_cache [empleados] [peticiones]
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def main(employees=5000, requests=20):
+    setup_django()
+
+    import logging
+
+    from django.db import connection
+    from django.test import Client
+
+    from app.models import Attendance, User
+    from app.services import localization
+    from app.services.dashboard_service import DashboardService
+    from app.services.schedule_service import ScheduleService
+    from app.services.summary_service import SummaryService
+
+    logging.disable(logging.INFO)
+    today = localization.local_now().date()
+    past_date = today - timedelta(days=1)
+    users = User.objects.bulk_create(
+        User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+        for n in range(employees)
+    )
+    records = []
+    for day in (past_date, today):
+        for n, user in enumerate(users):
+            entry = localization.local_to_utc(
+                day, (datetime.min + timedelta(hours=7, minutes=n % 120)).time()
+            )
+            records.append(
+                Attendance(
+                    user=user,
+                    work_date=day,
+                    entry_time=entry,
+                    exit_time=entry + timedelta(hours=8) if day < today else None,
+                )
+            )
+    Attendance.objects.bulk_create(records, batch_size=5000)
+    for day in (past_date, today):
+        SummaryService.rebuild(day)
+    ScheduleService.get_schedule()
+
+    admin = User.objects.create(name="Admin", email="jefe@admin.com", password="x")
+    client = Client(HTTP_HOST="localhost")
+    client.post("/", {"email": admin.email, "password": "x"})
+
+    results = []
+    for label, day in (("fecha pasada", past_date), ("hoy", today)):
+        params = {"date": day.isoformat()}
+
+        def request(invalidate):
+            if invalidate:
+                DashboardService.invalidate_dates([day])
+            return client.get("/dashboard/", params)
+
+        for state, invalidate in (("fría", True), ("tibia", False)):
+            request(False)
+            # La conexión se cierra al terminar cada petición (CONN_MAX_AGE=0),
+            # así que las consultas se cuentan con un execute_wrapper
+            queries = []
+            with connection.execute_wrapper(
+                lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)
+            ):
+                response = request(invalidate)
+            metrics = measure(lambda: request(invalidate), requests)
+            metrics["mean_ms"] = metrics["mean_us"] / 1000
+            metrics["p95_ms"] = metrics["p95_us"] / 1000
+            metrics["queries"] = len(queries)
+            metrics["kb"] = len(response.content) / 1024
+            results.append((f"{label}: caché {state}", metrics))
+
+    print_table(
+        f"Dashboard de un día con {employees} empleados ({requests} peticiones)",
+        results,
+        ["queries", "kb", "mean_ms", "p95_ms", "per_second"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
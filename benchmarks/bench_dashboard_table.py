@@ -0,0 +1,105 @@
+"""
+Tabla del dashboard de un día completo frente a la tabla por páginas.
+
+Crea un día pasado con N marcaciones y mide, con los fragmentos en caché
+fríos: "tabla completa" arma todas las filas del día en una respuesta (como
+renderizaba el dashboard antes); "primera página" es /dashboard/ filtrado por
+esa fecha; "página siguiente" es una página de /api/dashboard/attendances/ a
+mitad del día (la consulta por cursor usa el índice y no recorre las filas
+anteriores).
+
+    python -m benchmarks.bench_dashboard_table [marcaciones] [peticiones]
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def main(punches=20000, requests=20):
+    setup_django()
+
+    import logging
+
+    from django.test import Client
+
+    from app.models import Attendance, User
+    from app.services import localization
+    from app.services.attendance_service import AttendanceService
+    from app.services.dashboard_service import DashboardService
+    from app.services.summary_service import SummaryService
+
+    logging.disable(logging.INFO)
+    day = localization.local_now().date() - timedelta(days=1)
+    users = User.objects.bulk_create(
+        User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+        for n in range(punches)
+    )
+    records = []
+    for n, user in enumerate(users):
+        entry = localization.local_to_utc(
+            day, (datetime.min + timedelta(hours=6, seconds=n * 2)).time()
+        )
+        records.append(
+            Attendance(
+                user=user,
+                work_date=day,
+                entry_time=entry,
+                exit_time=entry + timedelta(hours=8),
+            )
+        )
+    Attendance.objects.bulk_create(records, batch_size=5000)
+    SummaryService.rebuild(day)
+
+    admin = User.objects.create(name="Admin", email="jefe@admin.com", password="x")
+    client = Client(HTTP_HOST="localhost")
+    client.post("/", {"email": admin.email, "password": "x"})
+
+    middle = Attendance.objects.order_by("-entry_time", "-id")[punches // 2]
+    cursor = AttendanceService.encode_history_cursor(middle.entry_time, middle.id)
+
+    def full_table():
+        rows = DashboardService.serialize_rows(
+            Attendance.objects.filter(
+                entry_time__range=localization.local_day_range(day)
+            )
+            .order_by("-entry_time", "-id")
+            .values_list("id", "user_id", "user__name", "entry_time", "exit_time")
+        )
+        return json.dumps(rows).encode()
+
+    def first_page():
+        DashboardService.invalidate_dates([day])
+        return client.get("/dashboard/", {"date": day.isoformat()}).content
+
+    def next_page():
+        return client.get(
+            "/api/dashboard/attendances/",
+            {"date": day.isoformat(), "cursor": cursor},
+        ).content
+
+    results = []
+    for label, request in (
+        ("tabla completa (antes)", full_table),
+        ("primera página (dashboard)", first_page),
+        ("página siguiente (API)", next_page),
+    ):
+        size = len(request())
+        metrics = measure(request, requests)
+        metrics["kb"] = size / 1024
+        metrics["mean_ms"] = metrics["mean_us"] / 1000
+        metrics["p95_ms"] = metrics["p95_us"] / 1000
+        results.append((label, metrics))
+
+    print_table(
+        f"Tabla del dashboard de un día con {punches} marcaciones "
+        f"({requests} peticiones)",
+        results,
+        ["kb", "mean_ms", "p95_ms", "per_second"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,140 @@
+"""
+Filas por segundo de la serialización del historial de asistencia.
+
+Compara el serializador anterior (pytz.timezone() por fila, diccionarios de
+días/meses reconstruidos por fila y cuatro strftime) con
+localization.serialize_history_rows. No usa la base de datos: las filas son
+pares (entry_time, exit_time) en UTC como los devuelve el ORM.
+
+    python -m benchmarks.bench_history_serialization [filas]
+"""
+
+import sys
+from datetime import timedelta
+from types import SimpleNamespace
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def legacy_serialize(attendance, local_now):
+    """
+    Copia del serializador anterior a la capa de localización (referencia)
+    """
+    import pytz
+    from django.conf import settings
+    from django.utils import timezone
+
+    local_tz = pytz.timezone(settings.TIME_ZONE)
+    entry_local = attendance.entry_time.astimezone(local_tz)
+
+    if attendance.exit_time:
+        exit_local = attendance.exit_time.astimezone(local_tz)
+        work_duration = attendance.exit_time - attendance.entry_time
+        hours_worked = work_duration.total_seconds() / 3600
+        exit_time = exit_local.strftime("%I:%M %p")
+        status = "completed"
+    else:
+        hours_worked = 0
+        exit_time = None
+        if entry_local.date() == local_now.date():
+            status = "in_progress"
+            current_duration = timezone.now() - attendance.entry_time
+            hours_worked = current_duration.total_seconds() / 3600
+        else:
+            status = "incomplete"
+
+    day_names = {
+        "Monday": "Lunes",
+        "Tuesday": "Martes",
+        "Wednesday": "Miércoles",
+        "Thursday": "Jueves",
+        "Friday": "Viernes",
+        "Saturday": "Sábado",
+        "Sunday": "Domingo",
+    }
+    month_names = {
+        "January": "enero",
+        "February": "febrero",
+        "March": "marzo",
+        "April": "abril",
+        "May": "mayo",
+        "June": "junio",
+        "July": "julio",
+        "August": "agosto",
+        "September": "septiembre",
+        "October": "octubre",
+        "November": "noviembre",
+        "December": "diciembre",
+    }
+    day_name_en = entry_local.strftime("%A")
+    month_name_en = entry_local.strftime("%B")
+
+    return {
+        "date": entry_local.date().strftime("%Y-%m-%d"),
+        "day_name": day_names.get(day_name_en, day_name_en),
+        "day_number": entry_local.day,
+        "month_name": month_names.get(month_name_en, month_name_en),
+        "entry_time": entry_local.strftime("%I:%M %p"),
+        "exit_time": exit_time,
+        "hours_worked": round(hours_worked, 2),
+        "status": status,
+    }
+
+
+def main(rows=10000):
+    setup_django()
+
+    from django.utils import timezone
+
+    from app.services import localization
+
+    now = timezone.now()
+    # Un año de jornadas, una de cada diez sin salida
+    records = [
+        (
+            now - timedelta(days=n % 365, hours=n % 5),
+            None if n % 10 == 0 else now - timedelta(days=n % 365, hours=n % 5 - 8),
+        )
+        for n in range(rows)
+    ]
+    attendances = [
+        SimpleNamespace(entry_time=entry_time, exit_time=exit_time)
+        for entry_time, exit_time in records
+    ]
+    local_now = localization.local_now()
+
+    # Ambas versiones deben producir el mismo resultado
+    expected = [legacy_serialize(attendance, local_now) for attendance in attendances]
+    current = localization.serialize_history_rows(records, local_now.date(), now)
+    mismatches = sum(
+        1
+        for old, new in zip(expected, current)
+        if {**old, "hours_worked": 0} != {**new, "hours_worked": 0}
+    )
+
+    def run_legacy():
+        for attendance in attendances:
+            legacy_serialize(attendance, local_now)
+
+    def run_current():
+        localization.serialize_history_rows(records, local_now.date(), now)
+
+    results = []
+    for label, func in (
+        ("antes (pytz + strftime)", run_legacy),
+        ("localization", run_current),
+    ):
+        metrics = measure(func, 5)
+        metrics["rows_per_second"] = rows * metrics["per_second"]
+        metrics["ms_per_batch"] = metrics["mean_us"] / 1000
+        results.append((label, metrics))
+
+    print_table(
+        f"Serialización del historial ({rows} filas, diferencias: {mismatches})",
+        results,
+        ["ms_per_batch", "rows_per_second"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
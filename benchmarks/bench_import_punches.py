@@ -0,0 +1,88 @@
+"""
+Rendimiento de la importación masiva de marcaciones (import_punches).
+
+Genera un archivo CSV sintético (una entrada y una salida por empleado y día)
+sin cargarlo completo en memoria y mide filas por segundo y memoria máxima
+usada por la importación para varios tamaños de lote.
+
+    python -m benchmarks.bench_import_punches [filas]
+"""
+
+import sys
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.common import print_table, setup_django
+
+EMPLOYEES = 500
+
+
+class SyntheticPunchFile:
+    """
+    Archivo de texto que genera las líneas bajo demanda (iterable como un archivo)
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __iter__(self):
+        yield "email,timestamp,type\n"
+        first_day = date(2025, 1, 1)
+        emitted = 0
+        day_offset = 0
+        while emitted < self.rows:
+            day = (first_day + timedelta(days=day_offset)).isoformat()
+            for employee in range(EMPLOYEES):
+                minute = employee % 60
+                yield f"empleado{employee}@example.com,{day} 07:{minute:02d}:00,entry\n"
+                yield f"empleado{employee}@example.com,{day} 16:{minute:02d}:00,exit\n"
+                emitted += 2
+                if emitted >= self.rows:
+                    return
+            day_offset += 1
+
+
+def main(rows=200000):
+    setup_django()
+
+    import logging
+
+    from app.models import Attendance, DailyAttendanceSummary, User
+    from app.services.import_service import ImportService
+
+    logging.disable(logging.INFO)
+    User.objects.bulk_create(
+        User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+        for n in range(EMPLOYEES)
+    )
+
+    results = []
+    for batch_size in (1000, 5000):
+        Attendance.objects.all().delete()
+        DailyAttendanceSummary.objects.all().delete()
+
+        tracemalloc.start()
+        stats = ImportService(batch_size=batch_size).import_file(
+            SyntheticPunchFile(rows)
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats["peak_mb"] = peak / (1024 * 1024)
+        results.append((f"lote de {batch_size} jornadas", stats))
+
+        # Segunda pasada: todas las jornadas ya existen (deduplicación)
+        stats = ImportService(batch_size=batch_size).import_file(
+            SyntheticPunchFile(rows)
+        )
+        stats["peak_mb"] = 0.0
+        results.append((f"  reimportación ({batch_size})", stats))
+
+    print_table(
+        f"Importación de {rows} marcaciones ({EMPLOYEES} empleados)",
+        results,
+        ["rows", "created", "unchanged", "batches", "rows_per_second", "peak_mb"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,64 @@
+"""
+Consultas SQL y tiempo por petición de sondeo de estado según el backend de
+sesiones.
+
+Para cada SESSION_ENGINE inicia sesión, hace un primer sondeo (frío: el
+estado del día aún no está en caché) y luego mide los sondeos siguientes, que
+son el caso normal de cada 30 segundos.
+
+    python -m benchmarks.bench_poll_queries [sondeos]
+"""
+
+import sys
+
+from benchmarks.common import measure, print_table, setup_django
+
+ENGINES = (
+    ("db (antes)", "django.contrib.sessions.backends.db"),
+    ("cached_db (por defecto)", "django.contrib.sessions.backends.cached_db"),
+    ("cache", "django.contrib.sessions.backends.cache"),
+    ("signed_cookies", "django.contrib.sessions.backends.signed_cookies"),
+)
+
+
+def main(polls=2000):
+    setup_django()
+
+    import logging
+
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from app.models import User
+
+    logging.disable(logging.INFO)
+    user = User.objects.create(name="Ana", email="ana@example.com", password="x")
+
+    results = []
+    for label, engine in ENGINES:
+        settings.SESSION_ENGINE = engine
+        cache.clear()
+        client = Client(HTTP_HOST="localhost")
+        client.post("/", {"email": user.email, "password": "x"})
+
+        with CaptureQueriesContext(connection) as cold:
+            client.get("/api/current-status/")
+        with CaptureQueriesContext(connection) as warm:
+            metrics = measure(lambda: client.get("/api/current-status/"), polls)
+
+        metrics["cold_queries"] = len(cold)
+        metrics["queries_per_poll"] = len(warm) / polls
+        results.append((label, metrics))
+
+    print_table(
+        f"Sondeo de /api/current-status/ ({polls} peticiones por backend)",
+        results,
+        ["cold_queries", "queries_per_poll", "mean_us", "p95_us", "per_second"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
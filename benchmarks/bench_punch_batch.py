@@ -0,0 +1,135 @@
+"""
+Marcaciones una por una frente a lotes de /api/punches/batch/.
+
+N empleados registran su entrada y su salida del día: "una por petición" usa
+un POST a /control-asistencia/ por marcación; "lote" envía ambas en un solo
+POST con claves de idempotencia; "lote reenviado" repite el mismo lote (el
+kiosco no recibió la respuesta) y solo lee los comprobantes. La última fila
+es un kiosco que estuvo D días sin conexión y envía todas sus marcaciones
+juntas.
+
+    python -m benchmarks.bench_punch_batch [empleados] [días]
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from benchmarks.common import print_table, setup_django
+
+
+def main(employees=300, days=3):
+    setup_django()
+
+    import logging
+
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.utils import timezone
+
+    from app.models import User
+    from app.services import localization
+
+    logging.disable(logging.INFO)
+    users = User.objects.bulk_create(
+        User(name=f"Empleado {n}", email=f"empleado{n}@example.com", password="x")
+        for n in range(employees * 2 + 1)
+    )
+
+    def login(user):
+        client = Client(HTTP_HOST="localhost")
+        client.post("/", {"email": user.email, "password": "x"})
+        return client
+
+    def post_batch(client, punches):
+        return client.post(
+            "/api/punches/batch/",
+            json.dumps({"punches": punches}),
+            content_type="application/json",
+        )
+
+    def run(label, clients, send, punches_per_client):
+        # La conexión se cierra al terminar cada petición (CONN_MAX_AGE=0),
+        # así que las consultas se cuentan con un execute_wrapper
+        queries = []
+        with connection.execute_wrapper(
+            lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)
+        ):
+            started = perf_counter()
+            requests = sum(send(client) for client in clients)
+            elapsed = perf_counter() - started
+        punches = len(clients) * punches_per_client
+        return (
+            label,
+            {
+                "punches": punches,
+                "requests": requests,
+                "queries": len(queries),
+                "total_ms": elapsed * 1000,
+                "ms_per_punch": elapsed * 1000 / punches,
+            },
+        )
+
+    def one_by_one(client):
+        client.post("/control-asistencia/", {"action": "entry"})
+        client.post("/control-asistencia/", {"action": "exit"})
+        return 2
+
+    now = timezone.now()
+    day_punches = [
+        {"key": "entrada", "action": "entry", "timestamp": now.isoformat()},
+        {
+            "key": "salida",
+            "action": "exit",
+            "timestamp": (now + timedelta(seconds=1)).isoformat(),
+        },
+    ]
+
+    def batch(client):
+        post_batch(client, day_punches)
+        return 1
+
+    single_clients = [login(user) for user in users[:employees]]
+    batch_clients = [login(user) for user in users[employees : employees * 2]]
+    results = [
+        run("una por petición", single_clients, one_by_one, 2),
+        run("lote", batch_clients, batch, 2),
+        run("lote reenviado", batch_clients, batch, 2),
+    ]
+
+    # Kiosco sin conexión durante varios días (se amplía la ventana aceptada)
+    today = localization.local_now().date()
+    offline = []
+    for days_ago in range(days, 0, -1):
+        day = today - timedelta(days=days_ago)
+        for action, hour in (("entry", 7), ("exit", 16)):
+            timestamp = localization.local_to_utc(
+                day, datetime.min.replace(hour=hour).time()
+            )
+            offline.append(
+                {
+                    "key": f"{day.isoformat()}-{action}",
+                    "action": action,
+                    "timestamp": timestamp.isoformat(),
+                }
+            )
+    with override_settings(ATTENDANCE_OFFLINE_MAX_HOURS=24 * (days + 1)):
+        results.append(
+            run(
+                f"kiosco {days} días sin red",
+                [login(users[-1])],
+                lambda client: post_batch(client, offline) and 1,
+                len(offline),
+            )
+        )
+
+    print_table(
+        f"Entrada y salida de {employees} empleados",
+        results,
+        ["punches", "requests", "queries", "total_ms", "ms_per_punch"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,81 @@
+"""
+Recorrer un año de reportes semanales y mensuales.
+
+Genera un año de jornadas para N empleados y mide el recorrido completo
+(52 semanas y 12 meses hacia atrás, como un gerente que pagina los reportes)
+con la caché vacía y luego de nuevo con los periodos cerrados ya en caché.
+
+    python -m benchmarks.bench_reports [empleados] [días]
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from benchmarks.common import print_table, setup_django
+
+
+def main(employees=300, days=365):
+    setup_django()
+
+    from time import perf_counter
+
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from app.models import Attendance, User
+    from app.services import localization
+    from app.services.report_service import ReportService
+
+    today = localization.local_now().date()
+    users = User.objects.bulk_create(
+        User(name=f"Empleado {n}", email=f"empleado{n}@example.com")
+        for n in range(employees)
+    )
+    records = []
+    for days_ago in range(1, days + 1):
+        day = today - timedelta(days=days_ago)
+        for n, user in enumerate(users):
+            entry = localization.local_to_utc(
+                day, (datetime.min + timedelta(hours=7, minutes=n % 120)).time()
+            )
+            records.append(
+                Attendance(
+                    user=user,
+                    work_date=day,
+                    entry_time=entry,
+                    exit_time=entry + timedelta(hours=8) if n % 20 else None,
+                )
+            )
+    Attendance.objects.bulk_create(records, batch_size=5000)
+
+    month = today.replace(day=1)
+    periods = [("week", today - timedelta(weeks=n)) for n in range(52)]
+    for _ in range(12):
+        periods.append(("month", month))
+        month = (month - timedelta(days=1)).replace(day=1)
+
+    def walk():
+        with CaptureQueriesContext(connection) as queries:
+            started = perf_counter()
+            for period, local_date in periods:
+                ReportService.get_report(period, local_date)
+            elapsed = perf_counter() - started
+        return {
+            "reports": len(periods),
+            "queries": len(queries),
+            "total_ms": elapsed * 1000,
+            "ms_per_report": elapsed * 1000 / len(periods),
+        }
+
+    cache.clear()
+    results = [("caché vacía", walk()), ("periodos cerrados en caché", walk())]
+    print_table(
+        f"Reportes de un año ({employees} empleados, {len(records)} jornadas)",
+        results,
+        ["reports", "queries", "total_ms", "ms_per_report"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,117 @@
+"""
+Costo de las reglas de horario por marcación y de la clasificación en bloque
+del dashboard.
+
+Compara la verificación anterior (constantes de AttendanceService y ventanas
+de time() reconstruidas en cada llamada) con ScheduleService, que busca la
+ventana compilada del usuario en un diccionario. Luego clasifica N entradas
+(llegada tarde o a tiempo) con reglas por departamento y día de la semana.
+
+    python -m benchmarks.bench_schedule_rules [entradas] [departamentos]
+"""
+
+import sys
+from datetime import time, timedelta
+
+from benchmarks.common import measure, print_table, setup_django
+
+STANDARD_ENTRY_TIME = time(7, 0)
+TOLERANCE_MINUTES = 30
+
+
+def legacy_is_outside_entry(current_time):
+    """
+    Copia de la verificación de entrada anterior a las reglas (referencia)
+    """
+    from app.services import localization
+
+    current_hour_minute = localization.to_local(current_time).time()
+    early_limit = time(max(0, STANDARD_ENTRY_TIME.hour - 1), STANDARD_ENTRY_TIME.minute)
+    late_limit = time(
+        STANDARD_ENTRY_TIME.hour, STANDARD_ENTRY_TIME.minute + TOLERANCE_MINUTES
+    )
+    if current_hour_minute < early_limit or current_hour_minute > late_limit:
+        return (
+            True,
+            f"Horario estándar de entrada: {localization.format_time(STANDARD_ENTRY_TIME)}",
+        )
+    return False, ""
+
+
+def main(entries=5000, departments=20):
+    setup_django()
+
+    from django.utils import timezone
+
+    from app.models import Department, ScheduleRule, Shift, User
+    from app.services.schedule_service import ScheduleService
+
+    # Un turno por departamento y una excepción de fin de semana para cada uno
+    shifts = Shift.objects.bulk_create(
+        Shift(name=f"Turno {n}", entry_time=time(6 + n % 6), late_after=time(7 + n % 6))
+        for n in range(departments)
+    )
+    weekend = Shift.objects.create(name="Fin de semana", entry_time=time(9))
+    depts = Department.objects.bulk_create(
+        Department(name=f"Departamento {n}") for n in range(departments)
+    )
+    ScheduleRule.objects.bulk_create(
+        [
+            ScheduleRule(shift=shift, department=dept)
+            for shift, dept in zip(shifts, depts)
+        ]
+        + [
+            ScheduleRule(shift=weekend, department=dept, weekday=weekday)
+            for dept in depts
+            for weekday in (5, 6)
+        ]
+    )
+    users = User.objects.bulk_create(
+        User(
+            name=f"Empleado {n}",
+            email=f"empleado{n}@example.com",
+            department=depts[n % departments] if n % 4 else None,
+        )
+        for n in range(entries)
+    )
+    now = timezone.now()
+    rows = [
+        (user.id, now - timedelta(days=n % 7, minutes=n % 240))
+        for n, user in enumerate(users)
+    ]
+    ScheduleService.invalidate()
+    ScheduleService.get_schedule()
+
+    single = rows[0]
+    results = []
+    for label, func, count in (
+        (
+            "marcación: antes (constantes)",
+            lambda: legacy_is_outside_entry(single[1]),
+            1,
+        ),
+        (
+            "marcación: reglas compiladas",
+            lambda: ScheduleService.is_outside_schedule("entry", single[1], single[0]),
+            1,
+        ),
+        (
+            f"dashboard: {entries} entradas",
+            lambda: ScheduleService.classify_late(rows),
+            entries,
+        ),
+        ("compilación de reglas", lambda: ScheduleService.compile("bench"), 1),
+    ):
+        metrics = measure(func, 2000 if count == 1 else 20)
+        metrics["rows_per_second"] = count * metrics["per_second"]
+        results.append((label, metrics))
+
+    print_table(
+        f"Reglas de horario ({departments} departamentos, {entries} empleados)",
+        results,
+        ["mean_us", "p95_us", "rows_per_second"],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,137 @@
+"""
+Bytes transferidos al cargar las páginas con CSS/JS en línea y con bundles.
+
+Ejecuta collectstatic (nombres con hash y versiones .gz/.br) y renderiza el
+login, el control de asistencia y el dashboard. "Antes" reconstruye cada página
+con el contenido de sus bundles en línea, como estaban los templates; "después"
+es la página tal como se sirve, con el HTML comprimido en gzip y los bundles
+en brotli. Los bundles con hash se guardan en el navegador (immutable), así que
+solo la primera visita los descarga.
+
+    python -m benchmarks.bench_static_assets [visitas] [jornadas]
+"""
+
+import gzip
+import os
+import re
+import sys
+import tempfile
+from datetime import timedelta
+
+from benchmarks.common import print_table, setup_django
+
+BUNDLE_PATTERN = re.compile(
+    r'<link rel="stylesheet" href="/static/(app/[^"]+)">'
+    r'|<script src="/static/(app/[^"]+)"[^>]*></script>'
+)
+
+
+def main(visits=10, days=60):
+    setup_django()
+
+    import logging
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.test import Client, override_settings
+    from django.utils import timezone
+
+    from app.models import Attendance, User
+
+    logging.disable(logging.INFO)
+    user = User.objects.create(name="Ana", email="ana@admin.com", password="x")
+    now = timezone.now()
+    Attendance.objects.bulk_create(
+        Attendance(
+            user=user,
+            entry_time=now - timedelta(days=n),
+            exit_time=now - timedelta(days=n) + timedelta(hours=8),
+        )
+        for n in range(1, days + 1)
+    )
+
+    static_root = tempfile.mkdtemp()
+    storages = {
+        **settings.STORAGES,
+        "staticfiles": {
+            "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+        },
+    }
+    with override_settings(
+        DEBUG=False,
+        ALLOWED_HOSTS=["localhost"],
+        STATIC_ROOT=static_root,
+        STORAGES=storages,
+    ):
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+        def file_size(name):
+            return os.path.getsize(os.path.join(static_root, name))
+
+        anonymous = Client(HTTP_HOST="localhost")
+        client = Client(HTTP_HOST="localhost")
+        client.post("/", {"email": user.email, "password": "x"})
+
+        results = []
+        for label, page_client, path in (
+            ("login", anonymous, "/"),
+            ("control", client, "/control-asistencia/"),
+            ("dashboard", client, "/dashboard/"),
+        ):
+            html = page_client.get(path).content
+            bundles = [css or js for css, js in BUNDLE_PATTERN.findall(html.decode())]
+
+            def inline(match):
+                css, js = match.groups()
+                with open(os.path.join(static_root, css or js)) as bundle:
+                    code = bundle.read()
+                return f"<style>{code}</style>" if css else f"<script>{code}</script>"
+
+            inlined = BUNDLE_PATTERN.sub(inline, html.decode()).encode()
+            html_gzip = len(gzip.compress(html))
+            inlined_gzip = len(gzip.compress(inlined))
+            bundles_br = sum(file_size(name + ".br") for name in bundles)
+
+            results.append(
+                (
+                    f"{label}: en línea (antes)",
+                    {
+                        "html_bytes": len(inlined),
+                        "html_gzip": inlined_gzip,
+                        "bundles_br": 0,
+                        "first_visit": inlined_gzip,
+                        "repeat_visit": inlined_gzip,
+                        f"{visits}_visits": inlined_gzip * visits,
+                    },
+                )
+            )
+            results.append(
+                (
+                    f"{label}: bundles (después)",
+                    {
+                        "html_bytes": len(html),
+                        "html_gzip": html_gzip,
+                        "bundles_br": bundles_br,
+                        "first_visit": html_gzip + bundles_br,
+                        "repeat_visit": html_gzip,
+                        f"{visits}_visits": html_gzip * visits + bundles_br,
+                    },
+                )
+            )
+
+    print_table(
+        f"Carga de páginas ({visits} visitas, {days} jornadas en el historial)",
+        results,
+        [
+            "html_bytes",
+            "html_gzip",
+            "bundles_br",
+            "first_visit",
+            "repeat_visit",
+            f"{visits}_visits",
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
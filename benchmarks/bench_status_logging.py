@@ -0,0 +1,68 @@
+"""
+Costo por petición del logging en la ruta de sondeo de estado.
+
+Compara AttendanceService.get_current_status (con la caché caliente, es decir,
+el caso de cada sondeo de 30 segundos) con el logging deshabilitado, con el
+muestreo configurado y sin muestreo.
+
+    python -m benchmarks.bench_status_logging [iteraciones]
+"""
+
+import logging
+import os
+import sys
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def main(iterations=20000):
+    setup_django()
+
+    from app.models import User
+    from app.services.attendance_service import AttendanceService
+    from app.services.logging_config import SamplingFilter
+
+    user = User.objects.create(name="Benchmark", email="bench@example.com")
+    AttendanceService.register_entry(user.id)
+    AttendanceService.get_current_status(user.id)  # Calentar la caché
+
+    # Escribir los logs a /dev/null para medir formateo y E/S sin llenar la consola
+    devnull = open(os.devnull, "w")
+    for handler in logging.getLogger("app.services").handlers:
+        handler.setStream(devnull)
+    status_logger = logging.getLogger("app.services.attendance_service.status")
+
+    def poll():
+        AttendanceService.get_current_status(user.id)
+
+    rows = []
+
+    logging.disable(logging.CRITICAL)
+    rows.append(("logging deshabilitado", measure(poll, iterations)))
+    logging.disable(logging.NOTSET)
+
+    rows.append(("muestreo configurado", measure(poll, iterations)))
+
+    sampling_filters = [
+        f for f in status_logger.filters if isinstance(f, SamplingFilter)
+    ]
+    for sampling_filter in sampling_filters:
+        status_logger.removeFilter(sampling_filter)
+    rows.append(("sin muestreo (cada petición)", measure(poll, iterations)))
+    for sampling_filter in sampling_filters:
+        status_logger.addFilter(sampling_filter)
+
+    baseline = rows[0][1]["mean_us"]
+    for _, metrics in rows:
+        metrics["overhead_us"] = metrics["mean_us"] - baseline
+
+    print_table(
+        f"get_current_status con caché caliente ({iterations} llamadas)",
+        rows,
+        ["mean_us", "p50_us", "p95_us", "overhead_us", "per_second"],
+    )
+    devnull.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,164 @@
+"""
+Utilidades compartidas por los benchmarks del proyecto.
+
+Los benchmarks configuran Django con una base de datos SQLite temporal para
+poder ejecutarse sin MySQL. Se ejecutan desde la raíz del proyecto, por ejemplo:
+
+    python -m benchmarks.bench_status_logging
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+from time import perf_counter
+
+import django
+
+
+def setup_django(database_name=None, use_settings_database=False):
+    """
+    Configura Django sobre una base SQLite temporal y aplica las migraciones
+    Con use_settings_database usa la base de settings (DB_ENGINE, ya migrada)
+    Returns: ruta del archivo de base de datos
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sistema_entrada_salida.settings")
+    if use_settings_database:
+        django.setup()
+        from django.conf import settings
+
+        return settings.DATABASES["default"]["NAME"]
+
+    if database_name is None:
+        database_name = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+
+    from django.conf import settings
+
+    settings.DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": database_name,
+        # Espera por el bloqueo de escritura en lugar de fallar bajo concurrencia;
+        # IMMEDIATE evita el "database is locked" inmediato de las transacciones
+        # que leen y luego escriben (update_or_create) con varios hilos
+        "OPTIONS": {"timeout": 30, "transaction_mode": "IMMEDIATE"},
+    }
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+    return database_name
+
+
+def measure(func, iterations):
+    """
+    Ejecuta `func` `iterations` veces y devuelve estadísticas en microsegundos
+    """
+    samples = []
+    for _ in range(iterations):
+        started = perf_counter()
+        func()
+        samples.append((perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p95_us": samples[int(len(samples) * 0.95) - 1],
+        "per_second": iterations / (sum(samples) / 1_000_000),
+    }
+
+
+def print_table(title, rows, columns):
+    """
+    Imprime una tabla simple de resultados
+    rows: lista de (etiqueta, dict de métricas)
+    """
+    print(f"\n{title}")
+    widths = [max(14, len(column) + 2) for column in columns]
+    header = f"{'':<28}" + "".join(
+        f"{column:>{width}}" for column, width in zip(columns, widths)
+    )
+    print(header)
+    print("-" * len(header))
+    for label, metrics in rows:
+        cells = "".join(
+            (
+                f"{metrics[column]:>{width}.2f}"
+                if isinstance(metrics[column], float)
+                else f"{metrics[column]:>{width}}"
+            )
+            for column, width in zip(columns, widths)
+        )
+        print(f"{label:<28}{cells}")
+
+
+async def asgi_request(
+    application, path, method="GET", cookies=None, body=b"", headers=()
+):
+    """
+    Envía una petición HTTP directamente a una aplicación ASGI, sin servidor
+    Returns: (status, lista de headers (nombre, valor), cuerpo en bytes)
+    """
+    path, _, query_string = path.partition("?")
+    request_headers = [(b"host", b"localhost"), *headers]
+    if cookies:
+        cookie = "; ".join(f"{name}={value}" for name, value in cookies.items())
+        request_headers.append((b"cookie", cookie.encode()))
+    if body:
+        request_headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "root_path": "",
+        "headers": request_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+
+    request_sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Mantener la conexión abierta hasta que la respuesta termine
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    response = {"status": None, "headers": [], "body": []}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = [
+                (name.decode().lower(), value.decode())
+                for name, value in message["headers"]
+            ]
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body", False):
+                disconnected.set()
+
+    await application(scope, receive, send)
+    return response["status"], response["headers"], b"".join(response["body"])
+
+
+def percentile(sorted_samples, fraction):
+    """
+    Percentil de una lista ya ordenada (fraction entre 0 y 1)
+    """
+    if not sorted_samples:
+        return 0.0
+    index = min(
+        len(sorted_samples) - 1, max(0, int(len(sorted_samples) * fraction) - 1)
+    )
+    return sorted_samples[index]
@@ -0,0 +1,281 @@
+"""
+Prueba de carga del inicio de turno.
+
+Simula N empleados que llegan al mismo tiempo y recorren el flujo completo del
+kiosco contra la aplicación ASGI: página de login, login, página de control de
+asistencia, registro de entrada, historial y varios sondeos de estado, y al
+final cierran sesión. En paralelo algunos administradores cargan el dashboard
+y exportan el día.
+
+Por cada endpoint de app/urls.py (nombre de la URL y método) reporta
+latencias p50/p95/p99, throughput, errores y consultas SQL por petición. Las
+consultas se atribuyen a la petición que las ejecuta con un execute_wrapper
+instalado en cada conexión y una ContextVar, que asgiref propaga a los hilos
+donde corren las vistas síncronas.
+
+    python -m benchmarks.load_shift_start [empleados] [sondeos] [rampa_ms] [admins]
+
+Con rampa_ms > 0 las llegadas se reparten uniformemente en ese intervalo en
+lugar de ser simultáneas.
+"""
+
+import asyncio
+import json
+import sys
+from collections import defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+from urllib.parse import urlencode
+
+from benchmarks.common import asgi_request, percentile, print_table, setup_django
+
+PASSWORD = "turno"
+
+# Contador de consultas de la petición en curso ([n] o None fuera de una)
+REQUEST_QUERIES = ContextVar("request_queries", default=None)
+
+# Endpoints que el recorrido no ejercita y por qué
+NOT_EXERCISED = {
+    "login": "alias de index",
+    "attendance_action": "alias de control_asistencia (el kiosco publica ahí)",
+    "attendance_events": "stream SSE de larga duración, sin latencia por petición",
+}
+
+
+def count_queries(execute, sql, params, many, context):
+    counter = REQUEST_QUERIES.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter():
+    """
+    Instala count_queries en la conexión actual y en cada conexión nueva (cada
+    hilo del pool abre la suya)
+    """
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def on_connection_created(sender, connection, **kwargs):
+        if count_queries not in connection.execute_wrappers:
+            connection.execute_wrappers.append(count_queries)
+
+    connection_created.connect(on_connection_created, weak=False)
+    for connection in connections.all():
+        on_connection_created(None, connection)
+
+
+class LoadStats:
+    """
+    Latencias, errores y consultas acumuladas por endpoint
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.first_error = None
+
+    def record(self, endpoint, latency_ms, queries, ok):
+        self.latencies[endpoint].append(latency_ms)
+        self.queries[endpoint] += queries
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def rows(self, elapsed):
+        results = []
+        all_latencies = []
+        for endpoint in sorted(self.latencies):
+            latencies = sorted(self.latencies[endpoint])
+            all_latencies.extend(latencies)
+            results.append((endpoint, self.summarize(latencies, endpoint, elapsed)))
+
+        all_latencies.sort()
+        total = self.summarize(all_latencies, None, elapsed)
+        total["errors"] = sum(self.errors.values())
+        total["queries_per_request"] = sum(self.queries.values()) / max(
+            len(all_latencies), 1
+        )
+        results.append(("TOTAL", total))
+        return results
+
+    def summarize(self, latencies, endpoint, elapsed):
+        return {
+            "requests": len(latencies),
+            "errors": self.errors[endpoint] if endpoint else 0,
+            "per_second": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "queries_per_request": (
+                self.queries[endpoint] / len(latencies) if endpoint else 0
+            ),
+        }
+
+
+class SimulatedClient:
+    """
+    Navegador mínimo: guarda cookies y envía el token CSRF en los POST como
+    lo hace el JavaScript de las plantillas
+    """
+
+    def __init__(self, application, stats):
+        self.application = application
+        self.stats = stats
+        self.cookies = {}
+
+    async def request(self, method, path, data=None, expected=200):
+        from django.urls import resolve
+
+        body = b""
+        headers = []
+        if method == "POST":
+            body = urlencode(data or {}).encode()
+            headers = [
+                (b"content-type", b"application/x-www-form-urlencoded"),
+                (b"x-csrftoken", self.cookies.get("csrftoken", "").encode()),
+            ]
+        endpoint = f"{method} {resolve(path.split('?')[0]).url_name}"
+
+        counter = [0]
+        token = REQUEST_QUERIES.set(counter)
+        started = perf_counter()
+        try:
+            status, response_headers, content = await asgi_request(
+                self.application,
+                path,
+                method=method,
+                cookies=self.cookies,
+                body=body,
+                headers=headers,
+            )
+        finally:
+            latency_ms = (perf_counter() - started) * 1000
+            REQUEST_QUERIES.reset(token)
+
+        self.store_cookies(response_headers)
+        ok = status == expected and self.is_success(response_headers, content)
+        if not ok and not self.stats.first_error:
+            self.stats.first_error = f"{endpoint}: {status} {content[:2000]!r}"
+        self.stats.record(endpoint, latency_ms, counter[0], ok)
+        return status, content
+
+    def store_cookies(self, headers):
+        for name, value in headers:
+            if name != "set-cookie":
+                continue
+            cookie_name, _, rest = value.partition("=")
+            cookie_value = rest.split(";", 1)[0]
+            if "max-age=0" in rest.lower() or not cookie_value:
+                self.cookies.pop(cookie_name, None)
+            else:
+                self.cookies[cookie_name] = cookie_value.strip('"')
+
+    @staticmethod
+    def is_success(headers, content):
+        # Las APIs responden 200 con {"success": false} ante un error
+        if ("content-type", "application/json") not in headers:
+            return True
+        return json.loads(content).get("success", True)
+
+
+async def employee_flow(application, stats, user, polls, delay):
+    await asyncio.sleep(delay)
+    client = SimulatedClient(application, stats)
+    await client.request("GET", "/")
+    await client.request(
+        "POST", "/", {"email": user.email, "password": PASSWORD}, expected=302
+    )
+    await client.request("GET", "/control-asistencia/")
+    await client.request("POST", "/control-asistencia/", {"action": "entry"})
+    await client.request("GET", "/api/attendance-history/")
+    for _ in range(polls):
+        await client.request("GET", "/api/current-status/")
+    await client.request("POST", "/logout/", expected=302)
+
+
+async def admin_flow(application, stats, admin, polls, today):
+    client = SimulatedClient(application, stats)
+    await client.request("GET", "/")
+    await client.request(
+        "POST", "/", {"email": admin.email, "password": PASSWORD}, expected=302
+    )
+    for _ in range(polls):
+        await client.request("GET", "/dashboard/")
+    await client.request("GET", f"/dashboard/export/?start={today}&format=csv")
+
+
+async def run_burst(application, employees, admins, polls, ramp_ms, today):
+    stats = LoadStats()
+    step = ramp_ms / 1000 / max(len(employees), 1)
+    started = perf_counter()
+    await asyncio.gather(
+        *(
+            employee_flow(application, stats, user, polls, n * step)
+            for n, user in enumerate(employees)
+        ),
+        *(admin_flow(application, stats, admin, polls, today) for admin in admins),
+    )
+    return stats, perf_counter() - started
+
+
+def main(employees=500, polls=5, ramp_ms=0, admins=2):
+    setup_django()
+
+    import logging
+
+    from django.core.asgi import get_asgi_application
+    from app.models import User
+    from app.services import localization
+    from app.urls import urlpatterns
+
+    logging.disable(logging.INFO)
+    users = User.objects.bulk_create(
+        User(name=f"Empleado {n}", email=f"empleado{n}@example.com", password=PASSWORD)
+        for n in range(employees)
+    )
+    admin_users = User.objects.bulk_create(
+        User(name=f"Admin {n}", email=f"admin{n}@admin.com", password=PASSWORD)
+        for n in range(admins)
+    )
+
+    install_query_counter()
+    application = get_asgi_application()
+    stats, elapsed = asyncio.run(
+        run_burst(
+            application,
+            users,
+            admin_users,
+            polls,
+            ramp_ms,
+            localization.local_now().date(),
+        )
+    )
+
+    print_table(
+        f"Inicio de turno: {employees} empleados, {admins} admins, {polls} sondeos, "
+        f"rampa {ramp_ms} ms ({elapsed:.1f} s)",
+        stats.rows(elapsed),
+        [
+            "requests",
+            "errors",
+            "per_second",
+            "p50_ms",
+            "p95_ms",
+            "p99_ms",
+            "queries_per_request",
+        ],
+    )
+
+    if stats.first_error:
+        print(f"  primer error: {stats.first_error}")
+    exercised = {endpoint.split(" ", 1)[1] for endpoint in stats.latencies}
+    for pattern in urlpatterns:
+        if pattern.name not in exercised:
+            reason = NOT_EXERCISED.get(pattern.name, "no incluido en el recorrido")
+            print(f"  sin medir: {pattern.name} ({reason})")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:5]))
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -20,7 +23,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-rr!y6g+#2^w#qxm2u-auw_-)%wzsm9at*8pgqq(#14_hjox$-w"
+# En producción se lee de SECRET_KEY; la clave de desarrollo está en el
+# repositorio y con ella cualquiera puede firmar cookies de sesión
+DEV_SECRET_KEY = "django-insecure-rr!y6g+#2^w#qxm2u-auw_-)%wzsm9at*8pgqq(#14_hjox$-w"
+SECRET_KEY = os.environ.get("SECRET_KEY", DEV_SECRET_KEY)
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -42,6 +48,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Sirve /static/ con caché de un año para los nombres con hash
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -73,20 +81,137 @@ WSGI_APPLICATION = "sistema_entrada_salida.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# El motor se elige con DB_ENGINE:
+#   mysql (por defecto), postgresql, o sqlite para kioscos de una sola sede.
+# Con DB_CONN_MAX_AGE > 0 las conexiones se reutilizan entre peticiones
+# durante esos segundos y se verifican antes de reutilizarlas
+# (CONN_HEALTH_CHECKS). Por defecto es 0 (abrir y cerrar una por petición):
+# bajo ASGI, el despliegue principal (vistas async, eventos en vivo,
+# exportación), Django recomienda desactivar las conexiones persistentes
+# porque cada petición puede correr en otro hilo y las conexiones no se
+# reutilizan sino que se acumulan. Activarlo solo al servir con WSGI.
+# PostgreSQL usa en su lugar el pool nativo de Django 5.2 (psycopg[pool]),
+# que no admite CONN_MAX_AGE.
+
+DB_ENGINE = os.environ.get("DB_ENGINE", "mysql")
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", "0"))
+
+if DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {
+                # WAL: las lecturas (sondeos, dashboard) no esperan a las
+                # escrituras; synchronous=NORMAL es seguro con WAL
+                "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL",
+                # Tomar el bloqueo de escritura al iniciar la transacción evita
+                # errores "database is locked" al pasar de lectura a escritura
+                "transaction_mode": "IMMEDIATE",
+                "timeout": 20,
+            },
+        }
+    }
+elif DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "horarios"),
+            "USER": os.environ.get("DB_USER", "postgres"),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "5432"),
+            "OPTIONS": {
+                "pool": {
+                    "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+                    "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+                    "timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),
+                },
+            },
+        }
+    }
+    DB_CONN_MAX_AGE = 0
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.mysql",
+            "NAME": os.environ.get("DB_NAME", "horarios"),
+            "USER": os.environ.get("DB_USER", "root"),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "3306"),
+            "OPTIONS": {
+                "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
+            },
+        }
+    }
+
+DATABASES["default"]["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = DB_CONN_MAX_AGE > 0
+
+# Réplica de lectura opcional para los reportes (dashboard e historial), ver
+# app/routers.py. Sin DB_REPLICA_HOST todas las consultas van a "default".
+# Después de registrar una marcación, las lecturas de esa sesión siguen en el
+# primario durante ATTENDANCE_REPLICA_STICKY_SECONDS (atraso de la réplica).
+
+if os.environ.get("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["DB_REPLICA_HOST"],
+        "PORT": os.environ.get("DB_REPLICA_PORT", DATABASES["default"].get("PORT")),
+        # En las pruebas la réplica es la misma base de datos de prueba
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["app.routers.ReplicaRouter"]
+ATTENDANCE_REPLICA_STICKY_SECONDS = int(
+    os.environ.get("ATTENDANCE_REPLICA_STICKY_SECONDS", "10")
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Guarda el estado de asistencia del día de cada usuario (ver AttendanceService),
+# los fragmentos del dashboard y los reportes de periodos cerrados. Por defecto
+# es una caché en memoria del proceso; con varios procesos/servidores, o si se
+# importan marcaciones con manage.py, usar un backend compartido para que las
+# invalidaciones sean visibles en todos:
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://127.0.0.1:6379/1
+# (también PyMemcacheCache o DatabaseCache con `createcachetable`).
+
+CACHE_BACKEND = os.environ.get(
+    "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
-        "NAME": "horarios",  # Cambia por el nombre de tu base de datos
-        "USER": "root",  # Cambia por tu usuario de MySQL
-        "PASSWORD": "",  # Cambia por tu contraseña de MySQL
-        "HOST": "localhost",  # Cambia si tu servidor MySQL está en otro host
-        "PORT": "3306",  # Puerto por defecto de MySQL
-        "OPTIONS": {
-            "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
-        },
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.environ.get("CACHE_LOCATION", "sistema-entrada-salida"),
     }
 }
 
+if CACHE_BACKEND.rsplit(".", 1)[-1] in (
+    "LocMemCache",
+    "FileBasedCache",
+    "DatabaseCache",
+):
+    # Sesiones (cached_db) y estado del día ocupan una entrada por empleado
+    # cada una; con el límite por defecto (300) el cache descarta entradas
+    # al inicio del turno y los sondeos vuelven a la base de datos
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.environ.get("ATTENDANCE_CACHE_MAX_ENTRIES", "20000"))
+    }
+
+# Las entradas que solo cambian con una invalidación explícita (fechas pasadas
+# del dashboard, reportes cerrados) no vencen en una caché compartida. En la
+# caché del proceso una invalidación hecha en otro proceso no llega, así que
+# vencen a los ATTENDANCE_LOCAL_CACHE_MAX_AGE segundos (ver app/services/caching.py)
+
+ATTENDANCE_LOCAL_CACHE_MAX_AGE = int(
+    os.environ.get("ATTENDANCE_LOCAL_CACHE_MAX_AGE", "300")
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -123,6 +248,125 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# El CSS y JS de las páginas están en app/static (ya no en línea en los
+# templates) para que el navegador los guarde entre visitas. Con DEBUG=False
+# `python manage.py collectstatic` copia cada archivo con el hash de su
+# contenido en el nombre (ManifestStaticFilesStorage) y deja junto a él las
+# versiones .gz y .br; WhiteNoise sirve la comprimida según Accept-Encoding y
+# marca los nombres con hash como immutable (max-age de diez años). Con
+# DEBUG=True se sirven los archivos originales sin manifiesto.
+
+STATICFILES_BACKEND = os.environ.get(
+    "STATICFILES_BACKEND",
+    (
+        "django.contrib.staticfiles.storage.StaticFilesStorage"
+        if DEBUG
+        else "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    ),
+)
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": STATICFILES_BACKEND},
+}
+
+# Sesiones
+# Por defecto se leen de la caché y se escriben también en la base de datos
+# (cached_db): el sondeo de estado no consulta django_session mientras la
+# sesión esté en caché. Con varios procesos la caché debe ser compartida
+# (CACHE_BACKEND): con la caché del proceso, cerrar sesión solo la borra del
+# proceso que atendió el logout y los demás la siguen aceptando. Sin caché
+# compartida usar SESSION_ENGINE=django.contrib.sessions.backends.db.
+# Las cookies firmadas (signed_cookies) dependen por completo de SECRET_KEY:
+# solo se aceptan con una clave propia leída del entorno.
+
+SESSION_ENGINE = os.environ.get(
+    "SESSION_ENGINE", "django.contrib.sessions.backends.cached_db"
+)
+
+if SESSION_ENGINE.endswith(".signed_cookies") and SECRET_KEY == DEV_SECRET_KEY:
+    raise ImproperlyConfigured(
+        "Las sesiones en cookies firmadas requieren SECRET_KEY en el entorno"
+    )
+
+# Eventos en vivo (Server-Sent Events, requieren servir con ASGI)
+# El broker en memoria solo funciona con un proceso; con varios workers se
+# debe apuntar a una implementación compartida con la misma interfaz.
+
+ATTENDANCE_EVENT_BROKER = os.environ.get(
+    "ATTENDANCE_EVENT_BROKER", "app.services.event_service.InMemoryEventBroker"
+)
+ATTENDANCE_SSE_KEEPALIVE_SECONDS = 15
+ATTENDANCE_SSE_MAX_SECONDS = 300
+
+# Archivo de jornadas antiguas (python manage.py archive_attendance)
+# Las jornadas con más de ATTENDANCE_ARCHIVE_AFTER_DAYS días pasan a la tabla
+# de archivo; el historial y la exportación la leen solo para rangos anteriores
+# a ese horizonte. No aumentar el valor después de archivar: las jornadas ya
+# archivadas dentro del nuevo horizonte dejarían de aparecer en esos rangos.
+
+ATTENDANCE_ARCHIVE_AFTER_DAYS = int(
+    os.environ.get("ATTENDANCE_ARCHIVE_AFTER_DAYS", "365")
+)
+
+# Marcaciones por lotes de kioscos sin conexión (/api/punches/batch/)
+# Se aceptan marcaciones con hasta ATTENDANCE_OFFLINE_MAX_HOURS horas de
+# antigüedad y hasta ATTENDANCE_CLOCK_SKEW_SECONDS en el futuro (reloj del
+# kiosco adelantado). Los comprobantes de idempotencia más antiguos que esa
+# ventana se eliminan al procesar el siguiente lote del usuario.
+
+ATTENDANCE_OFFLINE_MAX_HOURS = int(
+    os.environ.get("ATTENDANCE_OFFLINE_MAX_HOURS", "72")
+)
+ATTENDANCE_CLOCK_SKEW_SECONDS = int(
+    os.environ.get("ATTENDANCE_CLOCK_SKEW_SECONDS", "300")
+)
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# Los servicios usan loggers con nombre (app.services.*) y campos estructurados.
+# La ruta de sondeo de estado se muestrea para no escribir una línea por petición.
+
+ATTENDANCE_LOG_LEVEL = os.environ.get("ATTENDANCE_LOG_LEVEL", "INFO")
+ATTENDANCE_STATUS_LOG_SAMPLE_RATE = float(
+    os.environ.get("ATTENDANCE_STATUS_LOG_SAMPLE_RATE", "0.01")
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "sample_status": {
+            "()": "app.services.logging_config.SamplingFilter",
+            "sample_rate": ATTENDANCE_STATUS_LOG_SAMPLE_RATE,
+        },
+    },
+    "formatters": {
+        "structured": {
+            "()": "app.services.logging_config.StructuredFormatter",
+            "format": "%(asctime)s %(levelname)s %(name)s %(message)s",
+        },
+    },
+    "handlers": {
+        "services_console": {
+            "class": "logging.StreamHandler",
+            "formatter": "structured",
+        },
+    },
+    "loggers": {
+        "app.services": {
+            "handlers": ["services_console"],
+            "level": ATTENDANCE_LOG_LEVEL,
+            "propagate": False,
+        },
+        "app.services.attendance_service.status": {
+            "filters": ["sample_status"],
+        },
+    },
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field